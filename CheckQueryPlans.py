@@ -0,0 +1,81 @@
+# Query plan check
+# Runs EXPLAIN QUERY PLAN over the hot queries in LibraryManager and asserts that none of them scan
+# Loans, Copies or Reservations. Run from the project folder after changing a query or the index set:
+#     python CheckQueryPlans.py
+# The SQL below mirrors IssueLoan, GetOverdueLoans and __GetStockTimeline (which __LoanStockConflictCheck and the
+# reservation checks read), keep them in step
+
+# Imports SQLite for database operations
+import sqlite3
+# Imports the versioned index set so the check runs against an up to date database
+from Managers.SchemaManager import SchemaManager
+
+# Tables which must always be reached through an index
+CheckedTables = ("Loans", "Copies", "Reservations")
+
+# (Method name, SQL, example parameters)
+HotQueries = [
+    ("IssueLoan: active loan count",
+     "SELECT COUNT(*) FROM Loans WHERE UStuID = ? AND ReturnDate IS NULL",
+     (1,)),
+    ("IssueLoan: copy availability",
+     """SELECT ISBN
+        FROM Copies
+        WHERE UCID = ?
+        AND NOT EXISTS (SELECT 1 FROM Loans WHERE Loans.UCID = Copies.UCID AND Loans.ReturnDate IS NULL)
+        AND CurrentLocationID = HomeLocationID""",
+     (1,)),
+    ("GetOverdueLoans",
+     """SELECT Loans.ULoanID, Books.Title, Loans.DueDate, Loans.UStuID, Students.Forename, Students.Surname, Students.Email
+        FROM Loans
+        JOIN Copies ON Loans.UCID = Copies.UCID
+        JOIN Books ON Copies.ISBN = Books.ISBN
+        JOIN Students ON Loans.UStuID = Students.UStuID
+        WHERE Loans.ReturnDate IS NULL AND Loans.DueDate < ?""",
+     (20260101,)),
+    ("__GetStockTimeline: active loans",
+     """SELECT Loans.UCID, Loans.DueDate
+        FROM Loans
+        INNER JOIN Copies ON Loans.UCID = Copies.UCID
+        WHERE Copies.ISBN = ? AND Loans.ReturnDate IS NULL""",
+     (9780141396132,)),
+    ("__GetStockTimeline: copies",
+     "SELECT COUNT(*) FROM Copies WHERE ISBN = ?",
+     (9780141396132,)),
+    ("__GetStockTimeline: reservations",
+     """SELECT ReservationDate, SUM(Quantity)
+        FROM Reservations
+        WHERE ISBN = ? AND ReservationDate >= ?
+        GROUP BY ReservationDate""",
+     (9780141396132, 20260101)),
+]
+
+
+def FindScans(Conn, SQL, Params):
+    # Each plan row is (id, parent, notused, detail), a full table scan is reported as "SCAN <table>"
+    # A covering index scan still reads every row, so any SCAN of a checked table counts as a failure
+    Scans = []
+    for Row in Conn.execute(f"EXPLAIN QUERY PLAN {SQL}", Params).fetchall():
+        Detail = Row[3]
+        for Table in CheckedTables:
+            if Detail.startswith(f"SCAN {Table}"):
+                Scans.append(Detail)
+    return Scans
+
+
+def CheckQueryPlans(Conn):
+    # Brings the database up to the current index set before checking
+    SchemaManager.MigrateLibraryData(Conn)
+    Failures = []
+    for Name, SQL, Params in HotQueries:
+        for Detail in FindScans(Conn, SQL, Params):
+            Failures.append(f"{Name}: {Detail}")
+    return Failures
+
+
+if __name__ == "__main__":
+    Conn = sqlite3.connect("Databases/LibraryData.db")
+    Failures = CheckQueryPlans(Conn)
+    Conn.close()
+    assert not Failures, "Full scans found:\n" + "\n".join(Failures)
+    print(f"All {len(HotQueries)} hot queries use an index.")
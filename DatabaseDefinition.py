@@ -4,6 +4,8 @@
 
 # imports SQLite
 import sqlite3
+# Imports the versioned schema changes (indexes etc.) made after the original definition
+from Managers.SchemaManager import SchemaManager
 
 # Creates connections to database files and cursors for creating/editing tables
 conn1 = sqlite3.connect("Databases\LibraryData.db")
@@ -305,4 +307,8 @@ curs2.execute("""
               VALUES (3, 'ea0bd76c36f08ef064f6dbf29bb5c25b75cca79a23eab40baf4f6a070e94848e', '83d2bbecc0a140f38ec1e5ed72cec154', 'Example', 'SysAdmin', 'SysAdmin', 'sysadmin@example.com')
               """)
  
-conn2.commit()
\ No newline at end of file
+conn2.commit()
+
+# Applies the versioned schema changes, so a freshly defined database matches an upgraded one
+SchemaManager.MigrateLibraryData(conn1)
+SchemaManager.MigrateSystemConfig(conn2)
@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from Frames.TableRows import TableRows
+from Frames.ChangeWatch import ChangeWatch
 
 class AdminFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -30,11 +32,8 @@ class AdminFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for Label, TabClass in [("Student Mgmt", StudentMgmtTab), ("Account Mgmt", AccountMgmtTab), ("Library Admin", LibraryAdminTab), ("Settings", SettingsTab)]:
-            Frame = TabClass(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[TabClass] = Frame
 
         self.__ActiveTabClass = StudentMgmtTab
         self.__ShowTab(StudentMgmtTab, "Student Mgmt")
@@ -46,6 +45,10 @@ class AdminFrame(tk.Frame):
             else:
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         if self.__controller.GetAM().GetCurrentUser() is not None:
             if hasattr(self.__TabFrames[TabClass], "OnShow"):
@@ -99,6 +102,10 @@ class StudentMgmtTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Students",))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -119,6 +126,9 @@ class StudentMgmtTab(tk.Frame):
         ttk.Button(ActionBar, text="Update Max Loans", command=self.__ShowMaxLoansForm).pack(side="left", padx=(0, 8))
         ttk.Button(ActionBar, text="Batch Import", command=self.__BatchImport).pack(side="left", padx=(0, 8))
         ttk.Button(ActionBar, text="Purge by Year", command=self.__ShowPurgeForm).pack(side="left", padx=(0, 8))
+        # Shows progress while a batch import is running
+        self.__ImportProgress = tk.Label(ActionBar, text="", font=("Arial", 10), bg="#f0f4f8", fg="grey")
+        self.__ImportProgress.pack(side="left", padx=(8, 0))
 
         # --- Inline add form ---
         self.__AddForm = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -188,33 +198,32 @@ class StudentMgmtTab(tk.Frame):
         ttk.Button(self.__PurgeForm, text="Cancel", command=self.__HidePurgeForm).grid(row=3, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetAM().GetAllStudents()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer search or refresh from this tab cancels it
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: AM.GetAllStudents(), self.__PopulateTable)
 
     def __Search(self):
-        Results = self.__controller.GetAM().SearchStudents(self.__SearchEntry.get())
-        self.__PopulateTable(Results)
+        Term = self.__SearchEntry.get()
+        self.__Watch.Forget()
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: AM.SearchStudents(Term), self.__PopulateTable)
 
     def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        Rows = []
         if isinstance(Results, list):
+            self.__DetailsText.config(text="Select a student.")
             for Row in Results:
-                if len(Row) >= 7:
-                    ActiveStr = "Yes" if Row[4] else "No"
-                    self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], Row[3], ActiveStr, Row[5]))
-                elif len(Row) == 3:
-                    Details = self.__controller.GetAM().GetStudentDetails(Row[0])
-                    if isinstance(Details, tuple):
-                        ActiveStr = "Yes" if Details[4] else "No"
-                        self.__Table.insert("", "end", values=(Details[0], Details[1], Details[2], Details[3], ActiveStr, Details[5]))
-                    else:
-                        self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], "", "", ""))
+                ActiveStr = "Yes" if Row[4] else "No"
+                Rows.append((Row[0], Row[1], Row[2], Row[3], ActiveStr, Row[5]))
         else:
+            self.__Watch.Forget()
             self.__DetailsText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -343,10 +352,16 @@ class StudentMgmtTab(tk.Frame):
     def __BatchImport(self):
         FilePath = filedialog.askopenfilename(title="Select CSV file", filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")])
         if not FilePath: return
-        Result = self.__controller.GetAM().BatchImportStudents(FilePath)
+        Result = self.__controller.GetAM().BatchImportStudents(FilePath, ProgressCallback=self.__ShowImportProgress)
+        self.__ImportProgress.config(text="")
         messagebox.showinfo("Batch Import", str(Result))
         self.__ShowAll()
 
+    def __ShowImportProgress(self, RowsRead, Imported, Rejected):
+        # Called by BatchImportStudents after each chunk, update_idletasks redraws the label mid-import
+        self.__ImportProgress.config(text=f"Importing... {RowsRead} rows read, {Imported} imported, {Rejected} rejected")
+        self.update_idletasks()
+
     # --- Purge by entry year ---
     def __ShowPurgeForm(self):
         self.__HideAllForms()
@@ -1,5 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from Frames.PageLoader import PageLoader
+from Frames.VirtualTable import VirtualTable
+from Frames.ChangeWatch import ChangeWatch
+from Frames.LiveSearch import LiveSearch
+from Frames.TableRows import TableRows
 
 class CatalogueFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -33,11 +38,8 @@ class CatalogueFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for _, Tab in [("Books", BooksTab), ("Authors", AuthorsTab), ("Copies", CopiesTab), ("Locations", LocationsTab)]:
-            Frame = Tab(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[Tab] = Frame
 
         self.__ShowTab(BooksTab, "Books")
 
@@ -48,6 +50,10 @@ class CatalogueFrame(tk.Frame):
             else:
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         if self.__controller.GetAM().GetCurrentUser() is not None:
             if hasattr(self.__TabFrames[TabClass], "OnShow"):
@@ -76,6 +82,8 @@ class BooksTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -84,7 +92,7 @@ class BooksTab(tk.Frame):
         TableFrame.grid_columnconfigure(0, weight=1)
 
         Columns = ("ISBN", "Title", "Author", "Genre", "Subject")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("ISBN", width=130)
@@ -98,6 +106,12 @@ class BooksTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Books", "Authors", "BooksAuthors"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -145,36 +159,47 @@ class BooksTab(tk.Frame):
         ttk.Button(self.__AddForm, text="Cancel", command=self.__HideAddForm).grid(row=4, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetLM().GetAllBooks()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.GetAllBooks(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetLM().SearchBooks(Term)
-        self.__PopulateTable(Results)
-
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            # Results format: (ISBN, Title, Forename, Middlenames, Surname, Genre, Subject)
-            # Multi-author books return multiple rows - group by ISBN and join author names
-            BookData = {}
-            for Row in Results:
-                ISBN = Row[0]
-                MiddleName = f" {Row[3]}" if Row[3] else ""
-                AuthorName = f"{Row[2]}{MiddleName} {Row[4]}"
-                if ISBN not in BookData:
-                    BookData[ISBN] = {"Title": Row[1], "Genre": Row[5], "Subject": Row[6], "Authors": []}
-                BookData[ISBN]["Authors"].append(AuthorName)
-            for ISBN, Data in BookData.items():
-                AuthorStr = ", ".join(Data["Authors"])
-                self.__Table.insert("", "end", values=(ISBN, Data["Title"], AuthorStr, Data["Genre"], Data["Subject"]))
-        else:
-            self.__DetailsText.config(text=Results)
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        # Books are ranked by the full text index, so a longer search is always run rather than narrowed
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: Cache.Fetch(
+            LM, AM, "Books", Term, ("Books", "Authors", "BooksAuthors"),
+            lambda: LM.SearchBooks(Term, PageSize, Cursor), Cursor
+        ))
+
+    def __FormatRows(self, Results):
+        # Results format: (ISBN, Title, Forename, Middlenames, Surname, Genre, Subject)
+        # Multi-author books return multiple rows - group by ISBN and join author names
+        # Pages hold whole books, so a book's rows are never split across two pages
+        BookData = {}
+        for Row in Results:
+            ISBN = Row[0]
+            MiddleName = f" {Row[3]}" if Row[3] else ""
+            AuthorName = f"{Row[2]}{MiddleName} {Row[4]}"
+            if ISBN not in BookData:
+                BookData[ISBN] = {"Title": Row[1], "Genre": Row[5], "Subject": Row[6], "Authors": []}
+            BookData[ISBN]["Authors"].append(AuthorName)
+        Formatted = []
+        for ISBN, Data in BookData.items():
+            AuthorStr = ", ".join(Data["Authors"])
+            Formatted.append((ISBN, Data["Title"], AuthorStr, Data["Genre"], Data["Subject"]))
+        return Formatted
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        self.__DetailsText.config(text=Results)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -253,6 +278,8 @@ class AuthorsTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -274,6 +301,10 @@ class AuthorsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Authors",))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -312,23 +343,38 @@ class AuthorsTab(tk.Frame):
         ttk.Button(self.__AddForm, text="Cancel", command=self.__HideAddForm).grid(row=3, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetLM().GetAllAuthors()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer search or refresh from this tab cancels it
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAllAuthors(), self.__PopulateTable)
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetLM().SearchAuthors(Term)
-        self.__PopulateTable(Results)
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        self.__DetailsText.config(text="Loading...")
+        # Authors are ranked by the full text index, so a longer search is always run rather than narrowed
+        self.__controller.RunQuery(self, lambda LM, AM: Cache.Fetch(
+            LM, AM, "Authors", Term, ("Authors",), lambda: LM.SearchAuthors(Term)
+        ), self.__PopulateTable)
 
     def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        Rows = []
         if isinstance(Results, list):
             for Row in Results:
-                self.__Table.insert("", "end", values=Row)
+                Rows.append(Row)
+            self.__DetailsText.config(text="Select an author to view details.")
+        else:
+            self.__Watch.Forget()
+            self.__DetailsText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -396,6 +442,9 @@ class CopiesTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
+        tk.Label(SearchBar, text="e.g. copy:12  isbn:9780...  at:LIB01  home:ENG01", font=("Arial", 9), fg="grey", bg="#f0f4f8").pack(side="left")
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -404,7 +453,7 @@ class CopiesTab(tk.Frame):
         TableFrame.grid_columnconfigure(0, weight=1)
 
         Columns = ("UCID", "Title", "ISBN", "Current Location", "Home Location")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("UCID", width=50)
@@ -418,6 +467,12 @@ class CopiesTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Copies", "Books", "Locations"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -526,23 +581,32 @@ class CopiesTab(tk.Frame):
         ttk.Button(self.__UpdateCopyForm, text="Cancel", command=self.__HideUpdateCopyForm).grid(row=3, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetLM().GetAllCopies()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.GetAllCopies(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetLM().SearchCopies(Term)
-        self.__PopulateTable(Results)
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        # Plain words match every column shown: copy ID, title, ISBN and both locations
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: Cache.Fetch(
+            LM, AM, "Copies", Term, ("Copies", "Books", "Locations"),
+            lambda: LM.SearchCopies(Term, PageSize, Cursor), Cursor, ("words", (0, 1, 2, 3, 4))
+        ))
 
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            for Row in Results:
-                self.__Table.insert("", "end", values=Row)
+    def __FormatRows(self, Results):
+        return [tuple(Row) for Row in Results]
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        self.__DetailsText.config(text=str(Results))
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -613,10 +677,12 @@ class CopiesTab(tk.Frame):
         if Quantity < 1:
             self.__BulkAddFormError.config(text="Quantity must be at least 1.")
             return
+        # BulkAddCopies inserts the whole batch in one transaction and reports the copy IDs used
         Result = self.__controller.GetLM().BulkAddCopies(ISBN, LocID, Quantity)
         if "successfully" in Result:
             self.__HideBulkAddForm()
             self.__ShowAll()
+            self.__DetailsText.config(text=Result)
         else:
             self.__BulkAddFormError.config(text=Result)
 
@@ -741,6 +807,8 @@ class LocationsTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -760,6 +828,10 @@ class LocationsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Locations",))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -772,23 +844,38 @@ class LocationsTab(tk.Frame):
         # No action buttons - Add/Remove Location is in Admin Panel > Library Admin
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetLM().GetAllLocations()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer search or refresh from this tab cancels it
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAllLocations(), self.__PopulateTable)
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetLM().SearchLocations(Term)
-        self.__PopulateTable(Results)
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        self.__DetailsText.config(text="Loading...")
+        # The whole search is matched against the class code
+        self.__controller.RunQuery(self, lambda LM, AM: Cache.Fetch(
+            LM, AM, "Locations", Term, ("Locations",), lambda: LM.SearchLocations(Term), None, ("term", (1,))
+        ), self.__PopulateTable)
 
     def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        Rows = []
         if isinstance(Results, list):
             for Row in Results:
-                self.__Table.insert("", "end", values=Row)
+                Rows.append(Row)
+            self.__DetailsText.config(text="Select a location to view details.")
+        else:
+            self.__Watch.Forget()
+            self.__DetailsText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -0,0 +1,33 @@
+# This class tells a tab whether the tables it lists have been written to since its rows were loaded,
+# so OnShow can keep the rows already on screen rather than query them all again
+# It compares the tables' write counters (see LibraryManager.GetTableVersions), which are cheap to check,
+# along with the logged in user and today's date, as some lists (e.g. My Reservations, Overdue Loans) depend on those
+
+from datetime import datetime
+
+class ChangeWatch:
+
+    def __init__(self, controller, Tables):
+        # Tables are the tables the tab's list reads, by their names in TableVersions
+        self.__controller = controller
+        self.__Tables = tuple(Tables)
+        self.__Seen = None
+
+    def Mark(self):
+        # Called as the full list is loaded, records what it was loaded from
+        self.__Seen = self.__Current()
+
+    def Forget(self):
+        # Called when the rows shown are not the full list (e.g. a search) or failed to load, so the next OnShow loads it
+        self.__Seen = None
+
+    def HasChanged(self):
+        Current = self.__Current()
+        return self.__Seen is None or Current is None or Current != self.__Seen
+
+    def __Current(self):
+        Versions = self.__controller.GetLM().GetTableVersions(self.__Tables)
+        # Unknown versions (an error, or a database without the counters) always count as a change
+        if Versions is None or None in Versions:
+            return None
+        return (self.__controller.GetAM().GetCurrentUser(), int(datetime.now().strftime("%Y%m%d")), Versions)
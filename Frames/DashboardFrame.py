@@ -56,6 +56,11 @@ class DashboardFrame(tk.Frame):
             # Store button reference, its grid row, and the minimum access level required
             self.__NavButtons[Label] = (Btn, i+3, MinLevel)
 
+        # Background job status, shown above the logout button
+        self.__JobStatusLabel = tk.Label(Sidebar, text="", font=("Arial", 9), bg="#1e293b", fg="#94a3b8", anchor="sw", justify="left", wraplength=160)
+        self.__JobStatusLabel.grid(row=10, column=0, sticky="sew", padx=15, pady=(0, 6))
+        self.__PollID = None
+
         # Logout button pinned to bottom
         tk.Button(
             Sidebar, text="Log Out", font=("Arial", 11),
@@ -71,20 +76,35 @@ class DashboardFrame(tk.Frame):
         ContentArea.grid_rowconfigure(0, weight=1)
         ContentArea.grid_columnconfigure(0, weight=1)
 
-        # Stack all content frames in the content area
+        # Content frames are stacked in the content area as they are first opened (see __ShowContent), then kept
+        # so a Teacher never builds the Admin panels, and logging in only builds the Catalogue
+        self.__ContentArea = ContentArea
         self.__ContentFrames = {}
-        for F in (CatalogueFrame, LoansFrame, ReservationsFrame, StudentsFrame, StaffFrame, AdminFrame, SysAdminFrame):
-            Frame = F(ContentArea, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__ContentFrames[F] = Frame
-
-        self.__ShowContent(CatalogueFrame)
 
     def __ShowContent(self, FrameClass):
+        if FrameClass not in self.__ContentFrames:
+            Frame = self.__controller.GetStartupTimer().Time(FrameClass.__name__, lambda: FrameClass(self.__ContentArea, self.__controller))
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__ContentFrames[FrameClass] = Frame
         self.__ContentFrames[FrameClass].tkraise()
         if hasattr(self.__ContentFrames[FrameClass], "OnShow"):
             self.__ContentFrames[FrameClass].OnShow()
 
+    def __PollJobs(self):
+        # Checks the job runner for finished background jobs, rescheduling itself while StartUp is still running
+        if self.__PollID is not None:
+            self.after_cancel(self.__PollID)
+            self.__PollID = None
+        Jobs = self.__controller.GetJobs()
+        for Name, Result in Jobs.GetFinished():
+            if Name == "StartUp":
+                self.__JobStatusLabel.config(text=f"Start-up tasks finished:\n{Result}")
+                # Sends the emails StartUp queued now, rather than at the outbox's next poll
+                self.__controller.GetOutbox().Wake()
+        if Jobs.IsRunning("StartUp"):
+            self.__JobStatusLabel.config(text="Start-up tasks running...")
+            self.__PollID = self.after(1000, self.__PollJobs)
+
     def __HandleLogout(self):
         from Frames.LoginFrame import LoginFrame
         self.__controller.GetAM().LogOut()
@@ -108,6 +128,9 @@ class DashboardFrame(tk.Frame):
             else:
                 Btn.grid_remove()
 
+        # Starts watching for the result of the StartUp run begun at login
+        self.__PollJobs()
+
         # Reset to Catalogue view on each login to prevent a Teacher seeing
         # an Admin panel that was left open from a previous higher-level session
         self.__ShowContent(CatalogueFrame)
\ No newline at end of file
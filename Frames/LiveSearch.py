@@ -0,0 +1,39 @@
+# This class runs a tab's search as the user types into its search entry
+# The search waits until typing has paused for DebounceMs, so a word typed quickly runs one search rather than one per key
+# Enter runs the search straight away. The Search button still works as before
+
+class LiveSearch:
+
+    # Milliseconds of no typing before the search runs
+    DebounceMs = 300
+
+    def __init__(self, Entry, OnSearch):
+        # OnSearch is the tab's search method, called with no arguments
+        self.__Entry = Entry
+        self.__OnSearch = OnSearch
+        self.__AfterID = None
+        self.__LastText = Entry.get()
+        Entry.bind("<KeyRelease>", self.__OnKey)
+        Entry.bind("<Return>", lambda Event: self.SearchNow())
+
+    def SearchNow(self):
+        self.__CancelPending()
+        self.__LastText = self.__Entry.get()
+        self.__OnSearch()
+
+    def __OnKey(self, Event):
+        # Keys that do not change the text, such as arrows and Shift, do not start a search
+        if self.__Entry.get() == self.__LastText:
+            return
+        self.__CancelPending()
+        self.__AfterID = self.__Entry.after(self.DebounceMs, self.__Fire)
+
+    def __Fire(self):
+        self.__AfterID = None
+        if self.__Entry.get() != self.__LastText:
+            self.SearchNow()
+
+    def __CancelPending(self):
+        if self.__AfterID is not None:
+            self.__Entry.after_cancel(self.__AfterID)
+            self.__AfterID = None
@@ -1,5 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from Frames.PageLoader import PageLoader
+from Frames.VirtualTable import VirtualTable
+from Frames.ChangeWatch import ChangeWatch
+from Frames.LiveSearch import LiveSearch
+from Frames.TableRows import TableRows
 
 class LoansFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -32,11 +37,8 @@ class LoansFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for Label, TabClass in [("Active Loans", ActiveLoansTab), ("All Loans", AllLoansTab), ("Overdue Loans", OverdueLoansTab)]:
-            Frame = TabClass(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[TabClass] = Frame
 
         self.__ActiveTabClass = ActiveLoansTab
         self.__ShowTab(ActiveLoansTab, "Active Loans")
@@ -49,6 +51,10 @@ class LoansFrame(tk.Frame):
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
         
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         # Only refresh if we have a user logged in
         if self.__controller.GetAM().GetCurrentUser() is not None:
@@ -79,6 +85,9 @@ class ActiveLoansTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
+        tk.Label(SearchBar, text="e.g. student:45  copy:7  title:macbeth  due<20261101", font=("Arial", 9), fg="grey", bg="#f0f4f8").pack(side="left")
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -87,7 +96,7 @@ class ActiveLoansTab(tk.Frame):
         TableFrame.grid_columnconfigure(0, weight=1)
 
         Columns = ("Loan ID", "Book Title", "Copy ID", "Student", "Due Date")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("Loan ID", width=70)
@@ -101,6 +110,12 @@ class ActiveLoansTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Loans", "Copies", "Books", "Students"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -116,6 +131,7 @@ class ActiveLoansTab(tk.Frame):
         ttk.Button(ActionBar, text="Issue Loan", command=self.__ShowIssueForm).pack(side="left", padx=(0, 8))
         ttk.Button(ActionBar, text="Return Loan", command=self.__ReturnLoan).pack(side="left", padx=(0, 8))
         ttk.Button(ActionBar, text="Extend Loan", command=self.__ShowExtendForm).pack(side="left", padx=(0, 8))
+        ttk.Button(ActionBar, text="Issue Class Set", command=self.__ShowClassSetForm).pack(side="left", padx=(0, 8))
 
         # --- Inline issue form ---
         self.__IssueForm = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -152,38 +168,66 @@ class ActiveLoansTab(tk.Frame):
         ttk.Button(self.__ExtendForm, text="Submit", command=self.__SubmitExtend).grid(row=3, column=0, pady=8)
         ttk.Button(self.__ExtendForm, text="Cancel", command=self.__HideExtendForm).grid(row=3, column=1, pady=8)
 
+        # --- Inline class set form ---
+        self.__ClassSetForm = tk.Frame(self, bg="white", padx=15, pady=15)
+        self.__ClassSetForm.grid(row=5, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+        self.__ClassSetForm.grid_remove()
+
+        tk.Label(self.__ClassSetForm, text="Issue Class Set", font=("Arial", 11, "bold"), bg="white").grid(row=0, column=0, columnspan=6, sticky="w", pady=(0, 8))
+        tk.Label(self.__ClassSetForm, text="ISBN", font=("Arial", 10), bg="white").grid(row=1, column=0, sticky="e", padx=(10, 4))
+        self.__ClassSetISBN = ttk.Entry(self.__ClassSetForm, width=15, font=("Arial", 10))
+        self.__ClassSetISBN.grid(row=1, column=1, padx=(0, 10))
+        tk.Label(self.__ClassSetForm, text="Student IDs", font=("Arial", 10), bg="white").grid(row=1, column=2, sticky="e", padx=(10, 4))
+        self.__ClassSetStudents = ttk.Entry(self.__ClassSetForm, width=40, font=("Arial", 10))
+        self.__ClassSetStudents.grid(row=1, column=3, padx=(0, 4))
+        tk.Label(self.__ClassSetForm, text="(e.g. 12, 15, 20-48)", font=("Arial", 9), bg="white", fg="grey").grid(row=1, column=4, sticky="w")
+        self.__ClassSetFormError = tk.Label(self.__ClassSetForm, text="", fg="red", font=("Arial", 10), bg="white", wraplength=600, justify="left")
+        self.__ClassSetFormError.grid(row=2, column=0, columnspan=6)
+        ttk.Button(self.__ClassSetForm, text="Submit", command=self.__SubmitClassSet).grid(row=3, column=0, pady=8)
+        ttk.Button(self.__ClassSetForm, text="Cancel", command=self.__HideClassSetForm).grid(row=3, column=1, pady=8)
+
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
         # GetAllActiveLoans returns: (ULoanID, Title, LoanDate, DueDate, UStuID, UStaID, UCID, Forename, Surname)
-        Results = self.__controller.GetLM().GetAllActiveLoans()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.GetAllActiveLoans(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
         # SearchLoans returns: (ULoanID, Title, LoanDate, DueDate, ReturnDate, UStuID, UStaID, UCID, Forename, Surname)
-        Results = self.__controller.GetLM().SearchLoans(Term)
-        self.__PopulateTable(Results)
-
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            for Row in Results:
-                if len(Row) == 10:
-                    # SearchLoans format - filter to active only (ReturnDate at index 4 is None)
-                    if Row[4] is not None:
-                        continue
-                    StudentName = f"{Row[8]} {Row[9]}"
-                    self.__Table.insert("", "end", values=(Row[0], Row[1], Row[7], StudentName, Row[3]))
-                elif len(Row) == 9:
-                    # GetAllActiveLoans format
-                    StudentName = f"{Row[7]} {Row[8]}"
-                    self.__Table.insert("", "end", values=(Row[0], Row[1], Row[6], StudentName, Row[3]))
-        else:
-            # Display the error (like 'Access Denied') in the details text instead of crashing
-            self.__DetailsText.config(text=str(Results))
+        # Plain words match the loan, student, staff and copy IDs, the title and the student's names
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: Cache.Fetch(
+            LM, AM, "Loans", Term, ("Loans", "Copies", "Books", "Students"),
+            lambda: LM.SearchLoans(Term, PageSize, Cursor), Cursor, ("words", (0, 1, 8, 9, 5, 6, 7))
+        ))
+
+    def __FormatRows(self, Results):
+        Formatted = []
+        for Row in Results:
+            if len(Row) == 10:
+                # SearchLoans format - filter to active only (ReturnDate at index 4 is None)
+                if Row[4] is not None:
+                    continue
+                StudentName = f"{Row[8]} {Row[9]}"
+                Formatted.append((Row[0], Row[1], Row[7], StudentName, Row[3]))
+            elif len(Row) == 9:
+                # GetAllActiveLoans format
+                StudentName = f"{Row[7]} {Row[8]}"
+                Formatted.append((Row[0], Row[1], Row[6], StudentName, Row[3]))
+        return Formatted
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        # Display the error (like 'Access Denied') in the details text instead of crashing
+        self.__DetailsText.config(text=str(Results))
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -202,6 +246,7 @@ class ActiveLoansTab(tk.Frame):
     def __HideAllForms(self):
         self.__HideIssueForm()
         self.__HideExtendForm()
+        self.__HideClassSetForm()
 
     # --- Issue loan ---
     def __ShowIssueForm(self):
@@ -283,6 +328,53 @@ class ActiveLoansTab(tk.Frame):
         else:
             self.__ExtendFormError.config(text=Result)
 
+    # --- Issue class set ---
+    def __ShowClassSetForm(self):
+        self.__HideAllForms()
+        self.__ClassSetForm.grid()
+
+    def __HideClassSetForm(self):
+        self.__ClassSetForm.grid_remove()
+        self.__ClassSetFormError.config(text="")
+        self.__ClassSetISBN.delete(0, "end")
+        self.__ClassSetStudents.delete(0, "end")
+
+    def __SubmitClassSet(self):
+        try:
+            ISBN = int(self.__ClassSetISBN.get())
+            # Student IDs are separated by commas or spaces, and a range such as 20-48 includes both ends
+            StudentIDs = []
+            for Part in self.__ClassSetStudents.get().replace(",", " ").split():
+                if "-" in Part:
+                    First, Last = Part.split("-")
+                    StudentIDs.extend(range(int(First), int(Last) + 1))
+                else:
+                    StudentIDs.append(int(Part))
+        except ValueError:
+            self.__ClassSetFormError.config(text="ISBN and student IDs must be numeric, ranges as 20-48.")
+            return
+        if not StudentIDs:
+            self.__ClassSetFormError.config(text="Enter at least one student ID.")
+            return
+        # One copy of the book is issued to each student, all in one transaction
+        Result = self.__controller.GetLM().IssueClassSet(ISBN, StudentIDs)
+        if "successfully" in Result.lower():
+            self.__HideClassSetForm()
+            self.__ShowAll()
+            messagebox.showinfo("Result", Result)
+        elif "loan limit" in Result.lower():
+            # Some students are at their MaxActiveLoans - prompt the teacher to override for the whole set
+            if messagebox.askyesno("Loan Limit Reached", f"{Result}\n\nDo you want to override and issue the class set anyway?"):
+                OverrideResult = self.__controller.GetLM().IssueClassSet(ISBN, StudentIDs, Override=True)
+                if "successfully" in OverrideResult.lower():
+                    self.__HideClassSetForm()
+                    self.__ShowAll()
+                    messagebox.showinfo("Result", OverrideResult)
+                else:
+                    self.__ClassSetFormError.config(text=OverrideResult)
+        else:
+            self.__ClassSetFormError.config(text=Result)
+
 
 class AllLoansTab(tk.Frame):
     def __init__(self, parent, controller):
@@ -300,6 +392,9 @@ class AllLoansTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
+        tk.Label(SearchBar, text="e.g. student:45  copy:7  title:macbeth  due<20261101", font=("Arial", 9), fg="grey", bg="#f0f4f8").pack(side="left")
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -308,7 +403,7 @@ class AllLoansTab(tk.Frame):
         TableFrame.grid_columnconfigure(0, weight=1)
 
         Columns = ("Loan ID", "Title", "Student", "Loan Date", "Due Date", "Return Date")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("Loan ID", width=70)
@@ -323,6 +418,12 @@ class AllLoansTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Loans", "Copies", "Books", "Students"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -333,30 +434,39 @@ class AllLoansTab(tk.Frame):
         self.__DetailsText.pack(anchor="w")
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
         # GetAllLoans returns: (ULoanID, Title, LoanDate, DueDate, ReturnDate, UStuID, UStaID, UCID, Forename, Surname)
-        Results = self.__controller.GetLM().GetAllLoans()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.GetAllLoans(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        # SearchLoans returns same 10-element format
-        Results = self.__controller.GetLM().SearchLoans(Term)
-        self.__PopulateTable(Results)
-
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            for Row in Results:
-                # Both GetAllLoans and SearchLoans return 10-element tuples
-                StudentName = f"{Row[8]} {Row[9]}"
-                ReturnDate = Row[4] if Row[4] else "Active"
-                self.__Table.insert("", "end", values=(Row[0], Row[1], StudentName, Row[2], Row[3], ReturnDate))
-        else:
-            self.__DetailsText.config(text=str(Results))
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        # SearchLoans returns same 10-element format, shares its cached results with the active loans tab
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: Cache.Fetch(
+            LM, AM, "Loans", Term, ("Loans", "Copies", "Books", "Students"),
+            lambda: LM.SearchLoans(Term, PageSize, Cursor), Cursor, ("words", (0, 1, 8, 9, 5, 6, 7))
+        ))
+
+    def __FormatRows(self, Results):
+        Formatted = []
+        for Row in Results:
+            # Both GetAllLoans and SearchLoans return 10-element tuples
+            StudentName = f"{Row[8]} {Row[9]}"
+            ReturnDate = Row[4] if Row[4] else "Active"
+            Formatted.append((Row[0], Row[1], StudentName, Row[2], Row[3], ReturnDate))
+        return Formatted
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        self.__DetailsText.config(text=str(Results))
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -401,28 +511,39 @@ class OverdueLoansTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Loans", "Copies", "Books", "Students"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
         self.__DetailsPanel.grid(row=0, column=1, sticky="nsew")
         tk.Label(self.__DetailsPanel, text="Overdue Loans", font=("Arial", 12, "bold"), bg="white").pack(anchor="w")
         ttk.Separator(self.__DetailsPanel, orient="horizontal").pack(fill="x", pady=8)
-        self.__InfoText = tk.Label(self.__DetailsPanel, text="Loans past their due date are shown here.\n\nOverdue notifications are sent automatically at login via the StartUp routine.", font=("Arial", 10), bg="white", justify="left", wraplength=220)
+        self.__InfoText = tk.Label(self.__DetailsPanel, text="Loans past their due date are shown here.\n\nOverdue notifications are sent automatically once per school day by the StartUp routine.", font=("Arial", 10), bg="white", justify="left", wraplength=220)
         self.__InfoText.pack(anchor="w")
 
     def OnShow(self):
-        self.__Refresh()
+        if self.__Watch.HasChanged():
+            self.__Refresh()
 
     def __Refresh(self):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer refresh from this tab cancels it
+        self.__InfoText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetOverdueLoans(), self.__PopulateTable)
+
+    def __PopulateTable(self, Results):
+        Rows = []
         # GetOverdueLoans returns: (ULoanID, Title, DueDate, UStuID, Forename, Surname, Email) or a string
-        Results = self.__controller.GetLM().GetOverdueLoans()
         if isinstance(Results, list):
             for Row in Results:
                 StudentName = f"{Row[4]} {Row[5]}"
-                self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], StudentName, Row[3]))
-            self.__InfoText.config(text=f"{len(Results)} overdue loan(s) found.\n\nOverdue notifications are sent automatically at login via the StartUp routine.")
+                Rows.append((Row[0], Row[1], Row[2], StudentName, Row[3]))
+            self.__InfoText.config(text=f"{len(Results)} overdue loan(s) found.\n\nOverdue notifications are sent automatically once per school day by the StartUp routine.")
         else:
             # String result means either no overdue loans or an error
-            self.__InfoText.config(text=str(Results))
\ No newline at end of file
+            self.__Watch.Forget()
+            self.__InfoText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
\ No newline at end of file
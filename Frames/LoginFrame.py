@@ -44,7 +44,8 @@ class LoginFrame(tk.Frame):
         Password = self.__PasswordEntry.get()
         Result = self.__controller.GetAM().LogIn(ID, Password)
         if "successfully" in Result:
-            self.__controller.GetLM().StartUp()
+            # StartUp's emails are sent on a background thread, the dashboard shows the result when it finishes
+            self.__controller.GetLM().StartUpInBackground(self.__controller.GetJobs())
             self.__controller.ShowFrame(DashboardFrame)
         else:
             self.__ErrorLabel.config(text=Result)
@@ -0,0 +1,113 @@
+# This class is the row provider for a VirtualTable, filled one page at a time from a paged LibraryManager / AccountManager method
+# Pages are fetched on a query worker (see Main.RunQuery), so the window stays responsive while they load
+# The first page is fetched by Load(), and the next page when the table asks for rows past the ones loaded so far
+# (the table asks for a buffer of rows below the viewport, so pages load just before they are scrolled to)
+# Loading again (e.g. a new search) cancels a page that is still being fetched for the previous search
+# A count label, if given, shows progress, e.g. "Loading...", "Showing 200 of 10,000+" or "1,234 rows"
+# Loading the same list again (the same Key, e.g. a tab's full list after a write) fetches every row already loaded
+# and swaps them in once they arrive, so the table keeps its place and its selected row rather than starting again from the top
+
+from Managers.Paging import Page
+
+class PageLoader:
+
+    # Rows fetched per page
+    PageSize = 200
+
+    def __init__(self, controller, Table, FormatRows, ShowError, CountLabel=None):
+        # FormatRows turns a list of result rows into the list of values to show, and may leave rows out
+        # ShowError displays a string result, such as 'Access Denied' or a search error
+        self.__controller = controller
+        self.__Table = Table
+        self.__FormatRows = FormatRows
+        self.__ShowError = ShowError
+        self.__CountLabel = CountLabel
+        self.__Fetch = None
+        self.__Key = None
+        self.__Cursor = None
+        self.__Loading = False
+        self.__Rows = []
+        self.__Total = ""
+
+    def Load(self, Fetch, Key=None):
+        # Fetch takes (LM, AM, PageSize, Cursor) and returns a Page, a list of every row or an error string
+        # It is called on a query worker, with that worker's LibraryManager and AccountManager
+        # Key names the list being loaded. If it is the list already shown its rows are replaced in place,
+        # otherwise (or with no Key, e.g. a search) the table is emptied and the first page of results is fetched
+        Reload = Key is not None and Key == self.__Key and self.__Fetch is not None
+        self.__Fetch = Fetch
+        self.__Key = Key
+        if Reload:
+            # One page holding as many rows as are loaded now, so rows already scrolled to stay loaded
+            self.__FetchPage(None, max(self.PageSize, len(self.__Rows)), True)
+            return
+        self.__Cursor = None
+        self.__Rows = []
+        self.__Total = ""
+        self.__FetchPage(None, self.PageSize, False)
+        self.__Table.SetProvider(self)
+
+    def RowCount(self):
+        return len(self.__Rows)
+
+    def GetRows(self, Start, End):
+        # Starts fetching the next page if rows past those loaded are wanted, the table is refreshed when it arrives
+        if End > len(self.__Rows) and self.__Cursor is not None and not self.__Loading:
+            self.__FetchPage(self.__Cursor, self.PageSize, False)
+        return self.__Rows[Start:End]
+
+    def __FetchPage(self, Cursor, PageSize, Replace):
+        Fetch = self.__Fetch
+        self.__Loading = True
+        # The rows being replaced stay on screen with their count until the new ones arrive
+        if not Replace:
+            self.__UpdateCount()
+        # Keyed by this loader, so a new Load() supersedes a page still being fetched
+        self.__controller.RunQuery(self, lambda LM, AM: Fetch(LM, AM, PageSize, Cursor), lambda Results: self.__OnPage(Results, Cursor, Replace))
+
+    def __OnPage(self, Results, Cursor, Replace):
+        self.__Loading = False
+        if isinstance(Results, Page):
+            # The total is only counted for the first page
+            if Cursor is None:
+                self.__Total = Results.DescribeTotal()
+            self.__Cursor = Results.NextCursor
+            Rows = Results.Rows
+        elif isinstance(Results, list):
+            self.__Cursor = None
+            Rows = Results
+        else:
+            # An error or 'not found' message, no further pages are fetched
+            self.__Cursor = None
+            self.__ShowError(Results)
+            Rows = []
+        if Replace:
+            self.__ReplaceRows(self.__FormatRows(Rows))
+        else:
+            self.__Rows.extend(self.__FormatRows(Rows))
+            # Redraws with the new rows, which asks for the next page if the table is still not full
+            self.__Table.Refresh()
+        self.__UpdateCount()
+
+    def __ReplaceRows(self, Rows):
+        # Rows are matched by their first value, so the selection follows its row if others were added or removed above it
+        Selected = self.__Table.GetSelectedIndex()
+        SelectedKey = self.__Rows[Selected][0] if Selected is not None and Selected < len(self.__Rows) else None
+        self.__Rows = Rows
+        NewIndex = None
+        if SelectedKey is not None:
+            NewIndex = next((Index for Index, Row in enumerate(Rows) if Row[0] == SelectedKey), None)
+        # Only the rows on screen are redrawn, with their new values
+        self.__Table.KeepSelection(NewIndex)
+
+    def __UpdateCount(self):
+        if self.__CountLabel is None:
+            return
+        if self.__Loading and not self.__Rows:
+            self.__CountLabel.config(text="Loading...")
+        elif self.__Loading:
+            self.__CountLabel.config(text=f"Showing {len(self.__Rows):,} of {self.__Total or 'more'}, loading more...")
+        elif self.__Cursor is None or not self.__Total:
+            self.__CountLabel.config(text=f"{len(self.__Rows):,} rows")
+        else:
+            self.__CountLabel.config(text=f"Showing {len(self.__Rows):,} of {self.__Total}")
@@ -1,5 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
+from Frames.PageLoader import PageLoader
+from Frames.VirtualTable import VirtualTable
+from Frames.ChangeWatch import ChangeWatch
+from Frames.TableRows import TableRows
+from Frames.LiveSearch import LiveSearch
 
 class ReservationsFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -15,7 +21,7 @@ class ReservationsFrame(tk.Frame):
         TabBar.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 0))
 
         self.__Tabs = {}
-        for Label, Tab in [("All Reservations", AllReservationsTab), ("Today's Reservations", TodaysReservationsTab), ("My Reservations", MyReservationsTab)]:
+        for Label, Tab in [("All Reservations", AllReservationsTab), ("Today's Reservations", TodaysReservationsTab), ("My Reservations", MyReservationsTab), ("Availability", AvailabilityTab)]:
             Btn = tk.Button(
                 TabBar, text=Label, font=("Arial", 11),
                 bg="#f0f4f8", fg="#1e293b", bd=0,
@@ -32,11 +38,8 @@ class ReservationsFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for Label, TabClass in [("All Reservations", AllReservationsTab), ("Today's Reservations", TodaysReservationsTab), ("My Reservations", MyReservationsTab)]:
-            Frame = TabClass(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[TabClass] = Frame
 
         self.__ActiveTabClass = AllReservationsTab
         self.__ShowTab(AllReservationsTab, "All Reservations")
@@ -49,6 +52,10 @@ class ReservationsFrame(tk.Frame):
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
 
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         # Only refresh if we have a user logged in
         if self.__controller.GetAM().GetCurrentUser() is not None:
@@ -79,6 +86,7 @@ class AllReservationsTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        tk.Label(SearchBar, text="e.g. staff:3  title:macbeth  date>=20261101", font=("Arial", 9), fg="grey", bg="#f0f4f8").pack(side="left")
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -88,7 +96,7 @@ class AllReservationsTab(tk.Frame):
 
         # GetAllReservations returns: (URID, Title, ReservationDate, Quantity, UStaID, Forename, Surname, ClassCode)
         Columns = ("Res. ID", "Book Title", "Date", "Qty", "Staff", "Location")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("Res. ID", width=60)
@@ -103,6 +111,12 @@ class AllReservationsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Reservations", "Books", "Locations", "Staff"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -138,6 +152,13 @@ class AllReservationsTab(tk.Frame):
         tk.Label(self.__CreateForm, text="Quantity", font=("Arial", 10), bg="white").grid(row=1, column=7, sticky="e", padx=(8, 4))
         self.__CreateQuantity = ttk.Entry(self.__CreateForm, width=6, font=("Arial", 10))
         self.__CreateQuantity.grid(row=1, column=8, padx=(0, 10))
+        # Copies free on the chosen date, checked as the ISBN and date are typed (see LibraryManager.GetReservableQuantity)
+        self.__CreateAvailable = tk.Label(self.__CreateForm, text="", font=("Arial", 9), bg="white", fg="grey")
+        self.__CreateAvailable.grid(row=1, column=9, sticky="w")
+        self.__Available = None
+        self.__AvailableFor = None
+        self.__AvailabilityChecks = [LiveSearch(Entry, self.__CheckAvailable) for Entry in (self.__CreateISBN, self.__CreateDate)]
+        self.__CreateQuantity.bind("<KeyRelease>", lambda Event: self.__ShowAvailable(self.__Available))
         self.__CreateFormError = tk.Label(self.__CreateForm, text="", fg="red", font=("Arial", 10), bg="white")
         self.__CreateFormError.grid(row=2, column=0, columnspan=10, pady=(8, 0))
         ttk.Button(self.__CreateForm, text="Submit", command=self.__SubmitCreate).grid(row=3, column=0, pady=8)
@@ -167,27 +188,29 @@ class AllReservationsTab(tk.Frame):
         ttk.Button(self.__UpdateForm, text="Cancel", command=self.__HideUpdateForm).grid(row=3, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetLM().GetAllReservations()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.GetAllReservations(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetLM().SearchReservations(Term)
-        self.__PopulateTable(Results)
+        self.__Watch.Forget()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: LM.SearchReservations(Term, PageSize, Cursor))
 
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            # Format: (URID, Title, ReservationDate, Quantity, UStaID, Forename, Surname, ClassCode)
-            for Row in Results:
-                StaffName = f"{Row[5]} {Row[6]}"
-                self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], Row[3], StaffName, Row[7]))
-        else:
-            self.__DetailsText.config(text=str(Results))
+    def __FormatRows(self, Results):
+        # Format: (URID, Title, ReservationDate, Quantity, UStaID, Forename, Surname, ClassCode)
+        Formatted = []
+        for Row in Results:
+            StaffName = f"{Row[5]} {Row[6]}"
+            Formatted.append((Row[0], Row[1], Row[2], Row[3], StaffName, Row[7]))
+        return Formatted
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        self.__DetailsText.config(text=str(Results))
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -222,6 +245,41 @@ class AllReservationsTab(tk.Frame):
         self.__CreateLocID.delete(0, "end")
         self.__CreateDate.delete(0, "end")
         self.__CreateQuantity.delete(0, "end")
+        # Checks the now empty entries, which clears the available copies shown
+        for Check in self.__AvailabilityChecks:
+            Check.SearchNow()
+
+    def __CheckAvailable(self):
+        # Only a complete ISBN and date are checked
+        try:
+            ISBN = int(self.__CreateISBN.get())
+            ReservationDate = int(self.__CreateDate.get())
+        except ValueError:
+            ISBN, ReservationDate = None, None
+        if ISBN is None or len(str(ReservationDate)) != 8:
+            self.__AvailableFor = None
+            self.__ShowAvailable(None)
+            return
+        # A result for an ISBN or date no longer in the form is ignored
+        self.__AvailableFor = (ISBN, ReservationDate)
+        def OnDone(Available):
+            if self.__AvailableFor == (ISBN, ReservationDate):
+                self.__ShowAvailable(Available)
+        self.__controller.RunQuery(self.__CreateAvailable, lambda LM, AM: LM.GetReservableQuantity(ISBN, ReservationDate), OnDone)
+
+    def __ShowAvailable(self, Available):
+        self.__Available = Available
+        if Available is None:
+            self.__CreateAvailable.config(text="")
+        elif isinstance(Available, str):
+            self.__CreateAvailable.config(text=Available, fg="red")
+        else:
+            # Shown in red while the quantity entered is more than can be reserved
+            try:
+                Quantity = int(self.__CreateQuantity.get())
+            except ValueError:
+                Quantity = 0
+            self.__CreateAvailable.config(text=f"{Available} available on this date", fg="red" if Quantity > Available else "grey")
 
     def __SubmitCreate(self):
         try:
@@ -246,6 +304,8 @@ class AllReservationsTab(tk.Frame):
             self.__ShowAll()
         else:
             self.__CreateFormError.config(text=str(Result))
+            # Stock may have changed since the form last checked
+            self.__CheckAvailable()
 
     # --- Update reservation ---
     def __ShowUpdateForm(self):
@@ -338,30 +398,41 @@ class TodaysReservationsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Reservations", "Books", "Locations", "Staff"))
 
         # --- Info panel ---
         self.__InfoPanel = tk.Frame(self, bg="white", padx=15, pady=15)
         self.__InfoPanel.grid(row=0, column=1, sticky="nsew")
         tk.Label(self.__InfoPanel, text="Today's Reservations", font=("Arial", 12, "bold"), bg="white").pack(anchor="w")
         ttk.Separator(self.__InfoPanel, orient="horizontal").pack(fill="x", pady=8)
-        self.__InfoText = tk.Label(self.__InfoPanel, text="Reservations for today are shown here.\n\nCopy allocation and notification emails are processed automatically at login via the StartUp routine.", font=("Arial", 10), bg="white", justify="left", wraplength=220)
+        self.__InfoText = tk.Label(self.__InfoPanel, text="Reservations for today are shown here.\n\nCopy allocation and notification emails are processed automatically once per school day by the StartUp routine.", font=("Arial", 10), bg="white", justify="left", wraplength=220)
         self.__InfoText.pack(anchor="w")
 
     def OnShow(self):
-        self.__Refresh()
+        if self.__Watch.HasChanged():
+            self.__Refresh()
 
     def __Refresh(self):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer refresh from this tab cancels it
+        self.__InfoText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAllReservationsToday(), self.__PopulateTable)
+
+    def __PopulateTable(self, Results):
+        Rows = []
         # GetAllReservationsToday returns: (URID, Title, ReservationDate, Quantity, UStaID, Forename, Surname, ClassCode)
-        Results = self.__controller.GetLM().GetAllReservationsToday()
         if isinstance(Results, list):
             for Row in Results:
                 StaffName = f"{Row[5]} {Row[6]}"
-                self.__Table.insert("", "end", values=(Row[0], Row[1], Row[3], StaffName, Row[7]))
-            self.__InfoText.config(text=f"{len(Results)} reservation(s) for today.\n\nCopy allocation and notification emails are processed automatically at login via the StartUp routine.")
+                Rows.append((Row[0], Row[1], Row[3], StaffName, Row[7]))
+            self.__InfoText.config(text=f"{len(Results)} reservation(s) for today.\n\nCopy allocation and notification emails are processed automatically once per school day by the StartUp routine.")
         else:
+            self.__Watch.Forget()
             self.__InfoText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
 
 class MyReservationsTab(tk.Frame):
@@ -393,6 +464,10 @@ class MyReservationsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Reservations", "Books", "Locations", "Staff"))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -403,22 +478,30 @@ class MyReservationsTab(tk.Frame):
         self.__DetailsText.pack(anchor="w")
 
     def OnShow(self):
-        self.__Refresh()
+        if self.__Watch.HasChanged():
+            self.__Refresh()
 
     def __Refresh(self):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
         CurrentUser = self.__controller.GetAM().GetCurrentUser()
         if CurrentUser is None:
+            self.__TableRows.Clear()
             return
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer refresh from this tab cancels it
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAllReservationsByStaff(CurrentUser), self.__PopulateTable)
+
+    def __PopulateTable(self, Results):
+        Rows = []
         # GetAllReservationsByStaff returns: (URID, Title, ReservationDate, Quantity, UStaID, Forename, Surname, ClassCode)
-        Results = self.__controller.GetLM().GetAllReservationsByStaff(CurrentUser)
         if isinstance(Results, list):
             for Row in Results:
-                self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], Row[3], Row[7]))
+                Rows.append((Row[0], Row[1], Row[2], Row[3], Row[7]))
             self.__DetailsText.config(text=f"You have {len(Results)} reservation(s).")
         else:
+            self.__Watch.Forget()
             self.__DetailsText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -431,4 +514,228 @@ class MyReservationsTab(tk.Frame):
         Details = self.__controller.GetLM().GetReservationDetails(URID)
         if isinstance(Details, tuple):
             Text = f"Reservation ID: {Details[0]}\nBook: {Details[1]}\nDate: {Details[2]}\nQuantity: {Details[3]}\nLocation: {Details[7]}"
-            self.__DetailsText.config(text=Text)
\ No newline at end of file
+            self.__DetailsText.config(text=Text)
+
+
+class AvailabilityTab(tk.Frame):
+
+    # Size of each day's cell in the heatmap, and of the title column and date header around it
+    CellWidth = 30
+    CellHeight = 22
+    TitleWidth = 200
+    HeaderHeight = 34
+
+    def __init__(self, parent, controller):
+        super().__init__(parent, bg="#f0f4f8")
+        self.__controller = controller
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=3)
+        self.grid_columnconfigure(1, weight=2)
+
+        # --- Options bar ---
+        OptionsBar = tk.Frame(self, bg="#f0f4f8")
+        OptionsBar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
+        tk.Label(OptionsBar, text="From:", font=("Arial", 11), bg="#f0f4f8").pack(side="left")
+        self.__StartEntry = ttk.Entry(OptionsBar, width=10, font=("Arial", 11))
+        self.__StartEntry.insert(0, datetime.now().strftime("%Y%m%d"))
+        self.__StartEntry.pack(side="left", padx=(4, 8))
+        tk.Label(OptionsBar, text="Days:", font=("Arial", 11), bg="#f0f4f8").pack(side="left")
+        self.__DaysEntry = ttk.Entry(OptionsBar, width=5, font=("Arial", 11))
+        self.__DaysEntry.insert(0, "28")
+        self.__DaysEntry.pack(side="left", padx=(4, 8))
+        ttk.Button(OptionsBar, text="Show", command=self.__Refresh).pack(side="left", padx=(0, 16))
+        self.__StartEntry.bind("<Return>", lambda Event: self.__Refresh())
+        self.__DaysEntry.bind("<Return>", lambda Event: self.__Refresh())
+        tk.Label(OptionsBar, text="Copies needed:", font=("Arial", 11), bg="#f0f4f8").pack(side="left")
+        self.__NeededEntry = ttk.Entry(OptionsBar, width=5, font=("Arial", 11))
+        self.__NeededEntry.insert(0, "1")
+        self.__NeededEntry.pack(side="left", padx=(4, 8))
+        tk.Label(OptionsBar, text="Book:", font=("Arial", 11), bg="#f0f4f8").pack(side="left")
+        self.__FilterEntry = ttk.Entry(OptionsBar, width=20, font=("Arial", 11))
+        self.__FilterEntry.pack(side="left", padx=(4, 8))
+        # Changing the copies needed or the book filter only redraws the calendar already loaded
+        self.__Redraws = [LiveSearch(Entry, self.__Draw) for Entry in (self.__NeededEntry, self.__FilterEntry)]
+
+        # --- Heatmap ---
+        MapFrame = tk.Frame(self, bg="#f0f4f8")
+        MapFrame.grid(row=1, column=0, sticky="nsew", padx=(0, 10))
+        MapFrame.grid_rowconfigure(0, weight=1)
+        MapFrame.grid_columnconfigure(0, weight=1)
+        self.__Canvas = tk.Canvas(MapFrame, bg="white", highlightthickness=0)
+        self.__Canvas.grid(row=0, column=0, sticky="nsew")
+        self.__Canvas.bind("<Button-1>", self.__OnClick)
+        self.__Canvas.bind("<Configure>", lambda Event: self.__Render())
+        self.__YScroll = ttk.Scrollbar(MapFrame, orient="vertical", command=self.__Canvas.yview)
+        self.__YScroll.grid(row=0, column=1, sticky="ns")
+        XScroll = ttk.Scrollbar(MapFrame, orient="horizontal", command=self.__Canvas.xview)
+        XScroll.grid(row=1, column=0, sticky="ew")
+        # The canvas calls this whenever its view moves, so the rows scrolled into view are drawn
+        self.__Canvas.configure(yscrollcommand=self.__OnScroll, xscrollcommand=XScroll.set)
+        # GetAvailabilityCalendar returns: [(ISBN, Title, [Copies free on each day])], Dates are the days it covers
+        self.__Calendar = []
+        self.__Dates = []
+        # The rows to show, after the book filter, and the copies needed they are coloured against
+        self.__Shown = []
+        self.__Needed = 1
+        # Only the rows in view have canvas items, as in VirtualTable. Each slot is (Title item, [(Cell item, Count item)])
+        # for one row, and row R is always shown in slot R % len(Slots), so scrolling only redraws the rows that come into view
+        # SlotRows holds the row each slot shows (None if hidden) and SlotTops the Y its items are at
+        self.__Slots = []
+        self.__SlotRows = []
+        self.__SlotTops = []
+        # Lets OnShow keep the calendar on screen while nothing it was read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Books", "Copies", "Loans", "Reservations"))
+
+        # --- Details panel ---
+        self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
+        self.__DetailsPanel.grid(row=1, column=1, sticky="nsew")
+        tk.Label(self.__DetailsPanel, text="Availability", font=("Arial", 12, "bold"), bg="white").pack(anchor="w")
+        ttk.Separator(self.__DetailsPanel, orient="horizontal").pack(fill="x", pady=8)
+        tk.Label(self.__DetailsPanel, text="Copies free to reserve on each day.\n\nGreen: enough copies\nAmber: some copies, fewer than needed\nRed: no copies", font=("Arial", 10), bg="white", justify="left", wraplength=220).pack(anchor="w")
+        ttk.Separator(self.__DetailsPanel, orient="horizontal").pack(fill="x", pady=8)
+        self.__DetailsText = tk.Label(self.__DetailsPanel, text="Select a day to view details.", font=("Arial", 10), bg="white", justify="left", wraplength=220)
+        self.__DetailsText.pack(anchor="w")
+
+    def OnShow(self):
+        if self.__Watch.HasChanged():
+            self.__Refresh()
+
+    def __Refresh(self):
+        try:
+            StartDate = int(self.__StartEntry.get())
+            Days = int(self.__DaysEntry.get())
+            Start = datetime.strptime(str(StartDate), "%Y%m%d")
+        except ValueError:
+            self.__Watch.Forget()
+            self.__DetailsText.config(text="From must be a date (YYYYMMDD) and Days a number.")
+            return
+        Dates = [Start + timedelta(days=Day) for Day in range(max(Days, 0))]
+        self.__Watch.Mark()
+        # Runs on a query worker, a newer refresh from this tab cancels it
+        self.__DetailsText.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAvailabilityCalendar(StartDate, Days), lambda Results: self.__ShowCalendar(Results, Dates))
+
+    def __ShowCalendar(self, Results, Dates):
+        if isinstance(Results, list):
+            self.__Calendar = Results
+            self.__Dates = Dates
+            self.__DetailsText.config(text=f"{len(Results)} book(s) over {len(Dates)} day(s).\n\nSelect a day to view details.")
+        else:
+            self.__Watch.Forget()
+            self.__Calendar = []
+            self.__Dates = []
+            self.__DetailsText.config(text=str(Results))
+        self.__Layout()
+
+    def __Layout(self):
+        # Draws the date header for a newly loaded calendar, and drops the row slots as the number of days may differ
+        self.__Canvas.delete("all")
+        self.__Slots = []
+        self.__SlotRows = []
+        self.__SlotTops = []
+        # Nothing is drawn yet, so __Draw always fills the new slots even if the rows have not changed
+        self.__Shown = None
+        # Date header, with the month shown on the first column and the first of each month
+        for Day, Date in enumerate(self.__Dates):
+            X = self.TitleWidth + Day * self.CellWidth
+            Text = Date.strftime("%b\n%d") if Day == 0 or Date.day == 1 else Date.strftime("%a\n%d")
+            self.__Canvas.create_text(X + self.CellWidth / 2, self.HeaderHeight / 2, text=Text, font=("Arial", 8), justify="center")
+        self.__Draw()
+
+    def __Draw(self):
+        # Called when the calendar, the copies needed or the book filter changes
+        try:
+            Needed = max(int(self.__NeededEntry.get()), 1)
+        except ValueError:
+            Needed = 1
+        Filter = self.__FilterEntry.get().strip().lower()
+        Shown = [Row for Row in self.__Calendar if Filter in Row[1].lower() or Filter in str(Row[0])]
+        if Shown == self.__Shown:
+            # Same rows, so only the colours of the cells in view can have changed
+            if Needed != self.__Needed:
+                self.__Needed = Needed
+                self.__Recolour()
+            return
+        self.__Shown = Shown
+        self.__Needed = Needed
+        # Every slot now shows a different row, -1 marks a slot as needing to be redrawn or hidden
+        self.__SlotRows = [-1] * len(self.__Slots)
+        self.__Canvas.configure(scrollregion=(0, 0, self.TitleWidth + len(self.__Dates) * self.CellWidth, self.HeaderHeight + len(self.__Shown) * self.CellHeight))
+        self.__Render()
+
+    def __OnScroll(self, First, Last):
+        self.__YScroll.set(First, Last)
+        self.__Render()
+
+    def __Render(self):
+        # Shows the rows in view, reusing the slots of rows that are still in view
+        Height = self.__Canvas.winfo_height()
+        Top = self.__Canvas.canvasy(0) - self.HeaderHeight
+        First = max(0, int(Top // self.CellHeight))
+        Last = min(len(self.__Shown), int((Top + Height) // self.CellHeight) + 1)
+        # One more slot than whole rows fit, as a partly scrolled view shows part of an extra row
+        SlotCount = Height // self.CellHeight + 2
+        if len(self.__Slots) < SlotCount:
+            while len(self.__Slots) < SlotCount:
+                self.__Slots.append(self.__CreateSlot(len(self.__Slots)))
+                self.__SlotTops.append(self.HeaderHeight)
+            # More slots changes which slot each row is shown in
+            self.__SlotRows = [-1] * len(self.__Slots)
+        Wanted = {Row % len(self.__Slots): Row for Row in range(First, Last)}
+        for Slot, (TitleItem, Cells) in enumerate(self.__Slots):
+            Row = Wanted.get(Slot)
+            if Row == self.__SlotRows[Slot]:
+                continue
+            self.__SlotRows[Slot] = Row
+            if Row is None:
+                self.__Canvas.itemconfigure(f"Slot{Slot}", state="hidden")
+                continue
+            ISBN, Title, FreePerDay = self.__Shown[Row]
+            # Moves the whole slot to the row's position in one call, then fills in the row's values
+            RowTop = self.HeaderHeight + Row * self.CellHeight
+            self.__Canvas.move(f"Slot{Slot}", 0, RowTop - self.__SlotTops[Slot])
+            self.__SlotTops[Slot] = RowTop
+            self.__Canvas.itemconfigure(f"Slot{Slot}", state="normal")
+            self.__Canvas.itemconfigure(TitleItem, text=Title if len(Title) <= 28 else Title[:27] + "...")
+            for (CellItem, CountItem), Free in zip(Cells, FreePerDay):
+                self.__Canvas.itemconfigure(CellItem, fill=self.__Colour(Free, self.__Needed))
+                self.__Canvas.itemconfigure(CountItem, text=str(Free))
+
+    def __Recolour(self):
+        # Recolours the cells in view for a new number of copies needed, the rest are coloured as they scroll into view
+        for (TitleItem, Cells), Row in zip(self.__Slots, self.__SlotRows):
+            if Row is not None:
+                for (CellItem, CountItem), Free in zip(Cells, self.__Shown[Row][2]):
+                    self.__Canvas.itemconfigure(CellItem, fill=self.__Colour(Free, self.__Needed))
+
+    def __CreateSlot(self, Slot):
+        # Creates one row's items at the first row's position, hidden until a row is shown in it
+        Tag = f"Slot{Slot}"
+        Y = self.HeaderHeight
+        TitleItem = self.__Canvas.create_text(4, Y + self.CellHeight / 2, anchor="w", font=("Arial", 9), state="hidden", tags=Tag)
+        Cells = []
+        for Day in range(len(self.__Dates)):
+            X = self.TitleWidth + Day * self.CellWidth
+            Cells.append((
+                self.__Canvas.create_rectangle(X, Y, X + self.CellWidth, Y + self.CellHeight, outline="white", state="hidden", tags=Tag),
+                self.__Canvas.create_text(X + self.CellWidth / 2, Y + self.CellHeight / 2, font=("Arial", 8), state="hidden", tags=Tag)
+            ))
+        return (TitleItem, Cells)
+
+    @staticmethod
+    def __Colour(Free, Needed):
+        # Green: enough copies, Amber: some copies, fewer than needed, Red: no copies
+        return "#bbf7d0" if Free >= Needed else "#fde68a" if Free > 0 else "#fecaca"
+
+    def __OnClick(self, event):
+        # Converts the click from window to canvas coordinates, as the canvas may be scrolled
+        X = self.__Canvas.canvasx(event.x) - self.TitleWidth
+        Y = self.__Canvas.canvasy(event.y) - self.HeaderHeight
+        if X < 0 or Y < 0:
+            return
+        RowNumber = int(Y // self.CellHeight)
+        Day = int(X // self.CellWidth)
+        if RowNumber >= len(self.__Shown) or Day >= len(self.__Dates):
+            return
+        ISBN, Title, FreePerDay = self.__Shown[RowNumber]
+        self.__DetailsText.config(text=f"Book: {Title}\nISBN: {ISBN}\nDate: {self.__Dates[Day].strftime('%Y%m%d')}\nCopies free: {FreePerDay[Day]}")
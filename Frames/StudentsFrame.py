@@ -1,5 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
+from Frames.PageLoader import PageLoader
+from Frames.VirtualTable import VirtualTable
+from Frames.ChangeWatch import ChangeWatch
+from Frames.LiveSearch import LiveSearch
 
 class StudentsFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -32,11 +36,8 @@ class StudentsFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for Label, TabClass in [("All Students", AllStudentsTab), ("Student Loans", StudentLoansTab)]:
-            Frame = TabClass(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[TabClass] = Frame
 
         self.__ActiveTabClass = AllStudentsTab
         self.__ShowTab(AllStudentsTab, "All Students")
@@ -49,6 +50,10 @@ class StudentsFrame(tk.Frame):
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
 
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         if self.__controller.GetAM().GetCurrentUser() is not None:
             if hasattr(self.__TabFrames[TabClass], "OnShow"):
@@ -77,6 +82,8 @@ class AllStudentsTab(tk.Frame):
         self.__SearchEntry.pack(side="left", padx=8)
         ttk.Button(SearchBar, text="Search", command=self.__Search).pack(side="left")
         ttk.Button(SearchBar, text="Show All", command=self.__ShowAll).pack(side="left", padx=8)
+        # Searches as the user types
+        self.__LiveSearch = LiveSearch(self.__SearchEntry, self.__Search)
 
         # --- Results table ---
         TableFrame = tk.Frame(self, bg="#f0f4f8")
@@ -85,7 +92,7 @@ class AllStudentsTab(tk.Frame):
         TableFrame.grid_columnconfigure(0, weight=1)
 
         Columns = ("ID", "Forename", "Surname", "Max Loans", "Active", "Entry Year")
-        self.__Table = ttk.Treeview(TableFrame, columns=Columns, show="headings")
+        self.__Table = VirtualTable(TableFrame, columns=Columns, show="headings")
         for Col in Columns:
             self.__Table.heading(Col, text=Col)
         self.__Table.column("ID", width=50)
@@ -100,6 +107,12 @@ class AllStudentsTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        CountLabel = tk.Label(TableFrame, text="", font=("Arial", 9), fg="grey", bg="#f0f4f8")
+        CountLabel.grid(row=1, column=0, sticky="w")
+        # Only the rows on screen are drawn, further pages are loaded as the table is scrolled
+        self.__Loader = PageLoader(self.__controller, self.__Table, self.__FormatRows, self.__ShowError, CountLabel)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Students",))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -110,34 +123,36 @@ class AllStudentsTab(tk.Frame):
         self.__DetailsText.pack(anchor="w")
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
-        Results = self.__controller.GetAM().GetAllStudents()
-        self.__PopulateTable(Results)
+        self.__Watch.Mark()
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: AM.GetAllStudents(PageSize, Cursor), "All")
 
     def __Search(self):
         Term = self.__SearchEntry.get()
-        Results = self.__controller.GetAM().SearchStudents(Term)
-        self.__PopulateTable(Results)
-
-    def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
-        if isinstance(Results, list):
-            for Row in Results:
-                if len(Row) >= 7:
-                    ActiveStr = "Yes" if Row[4] else "No"
-                    self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], Row[3], ActiveStr, Row[5]))
-                elif len(Row) == 3:
-                    Details = self.__controller.GetAM().GetStudentDetails(Row[0])
-                    if isinstance(Details, tuple):
-                        ActiveStr = "Yes" if Details[4] else "No"
-                        self.__Table.insert("", "end", values=(Details[0], Details[1], Details[2], Details[3], ActiveStr, Details[5]))
-                    else:
-                        self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], "", "", ""))
-        else:
-            self.__DetailsText.config(text=str(Results))
+        if not Term.strip():
+            self.__ShowAll()
+            return
+        self.__Watch.Forget()
+        Cache = self.__controller.GetSearchCache()
+        # The whole search is matched against the student ID and names
+        self.__Loader.Load(lambda LM, AM, PageSize, Cursor: Cache.Fetch(
+            LM, AM, "Students", Term, ("Students",),
+            lambda: AM.SearchStudents(Term, PageSize, Cursor), Cursor, ("term", (0, 1, 2))
+        ))
+
+    def __FormatRows(self, Results):
+        Formatted = []
+        for Row in Results:
+            ActiveStr = "Yes" if Row[4] else "No"
+            Formatted.append((Row[0], Row[1], Row[2], Row[3], ActiveStr, Row[5]))
+        return Formatted
+
+    def __ShowError(self, Results):
+        self.__Watch.Forget()
+        self.__DetailsText.config(text=str(Results))
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -207,7 +222,11 @@ class StudentLoansTab(tk.Frame):
         except ValueError:
             self.__InfoLabel.config(text="Student ID must be numeric.")
             return
-        Results = self.__controller.GetLM().GetAllLoansByStudent(StudentID)
+        # Runs on a query worker, a newer lookup from this tab cancels it
+        self.__InfoLabel.config(text="Loading...")
+        self.__controller.RunQuery(self, lambda LM, AM: LM.GetAllLoansByStudent(StudentID), lambda Results: self.__ShowLoans(StudentID, Results))
+
+    def __ShowLoans(self, StudentID, Results):
         if isinstance(Results, list):
             if len(Results) == 0:
                 self.__InfoLabel.config(text=f"No loans found for student {StudentID}.")
@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from Frames.TableRows import TableRows
+from Frames.ChangeWatch import ChangeWatch
 
 class SysAdminFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -30,11 +32,8 @@ class SysAdminFrame(tk.Frame):
         self.__TabContainer.grid_rowconfigure(0, weight=1)
         self.__TabContainer.grid_columnconfigure(0, weight=1)
 
+        # Tabs are built the first time they are opened (see __ShowTab), then kept
         self.__TabFrames = {}
-        for Label, TabClass in [("Staff Management", StaffMgmtTab), ("Email Config", EmailConfigTab)]:
-            Frame = TabClass(self.__TabContainer, controller)
-            Frame.grid(row=0, column=0, sticky="nsew")
-            self.__TabFrames[TabClass] = Frame
 
         self.__ActiveTabClass = StaffMgmtTab
         self.__ShowTab(StaffMgmtTab, "Staff Management")
@@ -46,6 +45,10 @@ class SysAdminFrame(tk.Frame):
             else:
                 Btn.config(bg="#f0f4f8", fg="#1e293b")
         self.__ActiveTabClass = TabClass
+        if TabClass not in self.__TabFrames:
+            Frame = TabClass(self.__TabContainer, self.__controller)
+            Frame.grid(row=0, column=0, sticky="nsew")
+            self.__TabFrames[TabClass] = Frame
         self.__TabFrames[TabClass].tkraise()
         if self.__controller.GetAM().GetCurrentUser() is not None:
             if hasattr(self.__TabFrames[TabClass], "OnShow"):
@@ -99,6 +102,10 @@ class StaffMgmtTab(tk.Frame):
         Scroll = ttk.Scrollbar(TableFrame, orient="vertical", command=self.__Table.yview)
         Scroll.grid(row=0, column=1, sticky="ns")
         self.__Table.configure(yscrollcommand=Scroll.set)
+        # Only the rows that have changed are redrawn when the table is refreshed
+        self.__TableRows = TableRows(self.__Table)
+        # Lets OnShow keep the rows on screen while nothing they were read from has been written to
+        self.__Watch = ChangeWatch(self.__controller, ("Staff",))
 
         # --- Details panel ---
         self.__DetailsPanel = tk.Frame(self, bg="white", padx=15, pady=15)
@@ -143,36 +150,40 @@ class StaffMgmtTab(tk.Frame):
         ttk.Button(self.__AddForm, text="Cancel", command=self.__HideAddForm).grid(row=3, column=1, pady=8)
 
     def OnShow(self):
-        self.__ShowAll()
+        if self.__Watch.HasChanged():
+            self.__ShowAll()
 
     def __ShowAll(self):
+        self.__Watch.Mark()
         # GetAllStaff requires SysAdmin
         Results = self.__controller.GetAM().GetAllStaff()
         self.__PopulateTable(Results)
 
     def __Search(self):
+        self.__Watch.Forget()
         Results = self.__controller.GetAM().SearchStaff(self.__SearchEntry.get())
         self.__PopulateTable(Results)
 
     def __PopulateTable(self, Results):
-        for Row in self.__Table.get_children():
-            self.__Table.delete(Row)
+        Rows = []
         if isinstance(Results, list):
             for Row in Results:
                 if len(Row) >= 6:
                     ActiveStr = "Yes" if Row[4] else "No"
                     EmailStr = Row[5] if Row[5] else ""
-                    self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], Row[3], ActiveStr, EmailStr))
+                    Rows.append((Row[0], Row[1], Row[2], Row[3], ActiveStr, EmailStr))
                 elif len(Row) == 3:
                     Details = self.__controller.GetAM().GetStaffDetails(Row[0])
                     if isinstance(Details, tuple):
                         ActiveStr = "Yes" if Details[4] else "No"
                         EmailStr = Details[5] if Details[5] else ""
-                        self.__Table.insert("", "end", values=(Details[0], Details[1], Details[2], Details[3], ActiveStr, EmailStr))
+                        Rows.append((Details[0], Details[1], Details[2], Details[3], ActiveStr, EmailStr))
                     else:
-                        self.__Table.insert("", "end", values=(Row[0], Row[1], Row[2], "", "", ""))
+                        Rows.append((Row[0], Row[1], Row[2], "", "", ""))
         else:
+            self.__Watch.Forget()
             self.__DetailsText.config(text=str(Results))
+        self.__TableRows.Show(Rows)
 
     def __OnSelect(self, event):
         Selected = self.__Table.focus()
@@ -290,8 +301,39 @@ class EmailConfigTab(tk.Frame):
         self.__StaffEmailError = tk.Label(EmailFrame, text="", fg="red", font=("Arial", 10), bg="white")
         self.__StaffEmailError.grid(row=2, column=1, columnspan=3, sticky="w")
 
+        # --- Scheduled Jobs section ---
+        SchedulerFrame = tk.LabelFrame(ContentFrame, text="Scheduled Jobs", font=("Arial", 11, "bold"), bg="white", padx=15, pady=10)
+        SchedulerFrame.pack(fill="x", pady=(0, 15))
+        tk.Label(SchedulerFrame, text="Daily notification jobs run once per school day, at the first login or from RunDailyJobs.py.\nRunDailyJobs.py acts as the staff account set here.", font=("Arial", 10), bg="white", justify="left").grid(row=0, column=0, columnspan=4, sticky="w", pady=(0, 8))
+        tk.Label(SchedulerFrame, text="Staff ID", font=("Arial", 10), bg="white").grid(row=1, column=0, sticky="e", padx=(10, 4), pady=4)
+        self.__SchedulerIDEntry = ttk.Entry(SchedulerFrame, width=10, font=("Arial", 10))
+        self.__SchedulerIDEntry.grid(row=1, column=1, padx=(0, 10), pady=4)
+        ttk.Button(SchedulerFrame, text="Set Scheduler Account", command=self.__UpdateSchedulerID).grid(row=2, column=0, pady=8)
+        self.__SchedulerError = tk.Label(SchedulerFrame, text="", fg="red", font=("Arial", 10), bg="white")
+        self.__SchedulerError.grid(row=2, column=1, columnspan=3, sticky="w")
+
+        # --- Outbox section ---
+        OutboxFrame = tk.LabelFrame(ContentFrame, text="Outbox", font=("Arial", 11, "bold"), bg="white", padx=15, pady=10)
+        OutboxFrame.pack(fill="x", pady=(0, 15))
+        tk.Label(OutboxFrame, text="Notification emails are queued here and retried if the SMTP server is unavailable.\nEmails that failed too many times can be re-queued once the problem is fixed.", font=("Arial", 10), bg="white", justify="left").grid(row=0, column=0, columnspan=4, sticky="w", pady=(0, 8))
+        self.__OutboxCounts = tk.Label(OutboxFrame, text="", font=("Arial", 10), bg="white")
+        self.__OutboxCounts.grid(row=1, column=0, columnspan=4, sticky="w", pady=4)
+        ttk.Button(OutboxFrame, text="Refresh", command=self.OnShow).grid(row=2, column=0, pady=8)
+        ttk.Button(OutboxFrame, text="Retry Failed Emails", command=self.__RetryDeadEmails).grid(row=2, column=1, pady=8)
+
     def OnShow(self):
-        pass
+        # Shows how many emails are waiting, sent and given up on
+        Counts = self.__controller.GetAM().GetOutboxCounts()
+        self.__OutboxCounts.config(text=f"Pending: {Counts.get('Pending', 0) + Counts.get('Sending', 0)}    Sent: {Counts.get('Sent', 0)}    Failed: {Counts.get('Dead', 0)}")
+
+    def __RetryDeadEmails(self):
+        Result = self.__controller.GetAM().RetryDeadEmails()
+        if "successfully" in str(Result):
+            self.__controller.GetOutbox().Wake()
+            messagebox.showinfo("Success", str(Result))
+        else:
+            messagebox.showerror("Error", str(Result))
+        self.OnShow()
 
     def __SaveSMTP(self):
         Host = self.__SMTPEntries["Host"].get().strip()
@@ -326,4 +368,21 @@ class EmailConfigTab(tk.Frame):
             self.__StaffEmailEntry.delete(0, "end")
             messagebox.showinfo("Success", str(Result))
         else:
-            self.__StaffEmailError.config(text=str(Result))
\ No newline at end of file
+            self.__StaffEmailError.config(text=str(Result))
+
+    def __UpdateSchedulerID(self):
+        IDStr = self.__SchedulerIDEntry.get().strip()
+        if not IDStr:
+            self.__SchedulerError.config(text="Staff ID is required.")
+            return
+        try: ID = int(IDStr)
+        except ValueError:
+            self.__SchedulerError.config(text="Staff ID must be numeric.")
+            return
+        Result = self.__controller.GetAM().UpdateSchedulerStaffID(ID)
+        if "successfully" in str(Result):
+            self.__SchedulerError.config(text="")
+            self.__SchedulerIDEntry.delete(0, "end")
+            messagebox.showinfo("Success", str(Result))
+        else:
+            self.__SchedulerError.config(text=str(Result))
\ No newline at end of file
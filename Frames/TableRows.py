@@ -0,0 +1,35 @@
+# This class fills a Treeview with a list of rows, changing only the rows that differ from those already shown
+# Rows are matched by their key column (the first by default), which must be unique within the list, and is used as the item ID
+# Rows no longer listed are deleted, changed rows are updated in place and new rows are inserted,
+# so refreshing a table keeps its scroll position and selection, and costs little when little has changed
+# The table's rows must only be changed through Show()
+
+class TableRows:
+
+    def __init__(self, Table, KeyIndex=0):
+        self.__Table = Table
+        self.__KeyIndex = KeyIndex
+        # Item ID -> values shown, in the order shown
+        self.__Shown = {}
+
+    def Show(self, Rows):
+        # Rows are lists or tuples of the values to show, in the order to show them
+        Wanted = {}
+        for Row in Rows:
+            Wanted[str(Row[self.__KeyIndex])] = tuple(Row)
+        for Key in self.__Shown:
+            if Key not in Wanted:
+                self.__Table.delete(Key)
+        for Index, (Key, Values) in enumerate(Wanted.items()):
+            if Key not in self.__Shown:
+                self.__Table.insert("", Index, iid=Key, values=Values)
+            elif self.__Shown[Key] != Values:
+                self.__Table.item(Key, values=Values)
+        # Rows are only moved if the order has changed, e.g. a due date was extended
+        if list(self.__Table.get_children()) != list(Wanted):
+            for Index, Key in enumerate(Wanted):
+                self.__Table.move(Key, "", Index)
+        self.__Shown = Wanted
+
+    def Clear(self):
+        self.Show([])
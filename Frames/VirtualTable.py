@@ -0,0 +1,221 @@
+# This class is a Treeview that only creates items for the rows that fit on screen
+# The rows themselves come from a row provider, any object with RowCount() and GetRows(Start, End) (see PageLoader)
+# Scrolling reuses the same items with the values of the rows now in view, so scrolling, selecting and resizing
+# cost the same however many rows the table holds, and Tcl only ever stores one screenful of rows
+# It is created and used like a normal Treeview (heading, column, grid, bind, configure(yscrollcommand=...))
+# focus() returns an ID for the selected row ("Row<index>") even once it has scrolled out of view,
+# and item(ID, "values") returns that row's values, so code written for a Treeview works unchanged
+
+from tkinter import ttk
+
+class VirtualTable(ttk.Treeview):
+
+    # Rows asked for beyond the bottom of the viewport, so the provider can load them before they are scrolled to
+    Buffer = 50
+    # Rows moved per mouse wheel step
+    WheelRows = 3
+
+    def __init__(self, parent, **Options):
+        Options.setdefault("selectmode", "browse")
+        super().__init__(parent, **Options)
+        self.__Provider = None
+        self.__First = 0
+        self.__Visible = 1
+        self.__Pool = []
+        self.__SelectedIndex = None
+        self.__ScrollCommand = None
+        self.__SelectCallbacks = []
+        # Estimated until the first row is drawn, then measured
+        self.__RowHeight = self.__StyleRowHeight()
+        self.__HeaderHeight = None
+        super().bind("<<TreeviewSelect>>", self.__OnTreeSelect)
+        super().bind("<Configure>", lambda Event: self.__Resize(Event.height))
+        # Keyboard and mouse wheel scrolling move through every row, not just the items on screen
+        super().bind("<Up>", lambda Event: self.__MoveSelection(Event, -1))
+        super().bind("<Down>", lambda Event: self.__MoveSelection(Event, 1))
+        super().bind("<Prior>", lambda Event: self.__MoveSelection(Event, -self.__Visible))
+        super().bind("<Next>", lambda Event: self.__MoveSelection(Event, self.__Visible))
+        super().bind("<Home>", lambda Event: self.__SelectIndex(Event, 0))
+        super().bind("<End>", lambda Event: self.__SelectIndex(Event, self.__RowCount() - 1))
+        super().bind("<MouseWheel>", lambda Event: self.__ScrollBy(-self.WheelRows if Event.delta > 0 else self.WheelRows))
+        super().bind("<Button-4>", lambda Event: self.__ScrollBy(-self.WheelRows))
+        super().bind("<Button-5>", lambda Event: self.__ScrollBy(self.WheelRows))
+
+    def SetProvider(self, Provider):
+        # Shows a new set of rows from the top, with nothing selected
+        self.__Provider = Provider
+        self.__First = 0
+        self.__SelectedIndex = None
+        self.Refresh()
+
+    def GetSelectedIndex(self):
+        # The index of the selected row among every row, or None
+        return self.__SelectedIndex
+
+    def KeepSelection(self, Index):
+        # Moves the selection to where its row now is after the provider's rows have been replaced (None if it is gone)
+        # The row is the same, so select callbacks are not called
+        self.__SelectedIndex = Index
+        self.Refresh()
+
+    def Refresh(self):
+        # Redraws the rows in view, e.g. after the provider's rows have changed
+        # Asking for rows past the viewport lets the provider load the next page before it is needed
+        if self.__Provider is not None:
+            self.__Provider.GetRows(self.__First, self.__First + self.__Visible + self.Buffer)
+        Count = self.__RowCount()
+        self.__First = max(0, min(self.__First, Count - self.__Visible))
+        Rows = self.__Provider.GetRows(self.__First, self.__First + self.__Visible) if self.__Provider is not None else []
+        # One item per visible row, created once and reused
+        while len(self.__Pool) < self.__Visible:
+            self.__Pool.append(super().insert("", "end", iid=f"Slot{len(self.__Pool)}"))
+        while len(self.__Pool) > self.__Visible:
+            super().delete(self.__Pool.pop())
+        for Position, Slot in enumerate(self.__Pool):
+            if Position < len(Rows):
+                super().item(Slot, values=Rows[Position])
+                super().move(Slot, "", Position)
+            else:
+                super().detach(Slot)
+        # The selection follows its row, and is hidden while that row is out of view
+        if self.__SelectedIndex is not None and self.__First <= self.__SelectedIndex < self.__First + len(Rows):
+            Slot = self.__Pool[self.__SelectedIndex - self.__First]
+            super().selection_set(Slot)
+            super().focus(Slot)
+        elif super().selection():
+            super().selection_remove(super().selection())
+        # Every item fits on screen, so the Treeview's own scrolling always stays at the top
+        super().yview_moveto(0)
+        if self.__ScrollCommand is not None:
+            if Count == 0:
+                self.__ScrollCommand(0.0, 1.0)
+            else:
+                self.__ScrollCommand(self.__First / Count, min(1.0, (self.__First + len(Rows)) / Count))
+        if self.__HeaderHeight is None and Rows:
+            self.after_idle(self.__MeasureRows)
+
+    # --- Treeview methods that work on every row rather than the items on screen ---
+
+    def yview(self, *Args):
+        # Called by the scrollbar with ("moveto", Fraction) or ("scroll", Number, "units" / "pages")
+        Count = self.__RowCount()
+        if not Args:
+            if Count == 0:
+                return (0.0, 1.0)
+            return (self.__First / Count, min(1.0, (self.__First + self.__Visible) / Count))
+        if Args[0] == "moveto":
+            self.__First = int(float(Args[1]) * Count)
+        elif Args[0] == "scroll":
+            Step = self.__Visible if str(Args[2]).startswith("page") else 1
+            self.__First += int(Args[1]) * Step
+        self.Refresh()
+
+    def configure(self, cnf=None, **Options):
+        # The scrollbar is driven from the position among all rows, not the Treeview's own items
+        if "yscrollcommand" in Options:
+            self.__ScrollCommand = Options.pop("yscrollcommand")
+            if not Options and cnf is None:
+                return None
+        return super().configure(cnf, **Options)
+
+    config = configure
+
+    def bind(self, sequence=None, func=None, add=None):
+        # Select callbacks are only called when the selected row changes, not when scrolling moves the selection
+        if sequence == "<<TreeviewSelect>>":
+            if not add:
+                self.__SelectCallbacks = []
+            self.__SelectCallbacks.append(func)
+            return None
+        return super().bind(sequence, func, add)
+
+    def focus(self, item=None):
+        if item is not None:
+            return super().focus(item)
+        if self.__SelectedIndex is None or self.__SelectedIndex >= self.__RowCount():
+            return ""
+        return f"Row{self.__SelectedIndex}"
+
+    def item(self, item, option=None, **Options):
+        # Row IDs from focus() are looked up in the provider, anything else is a normal Treeview item
+        if isinstance(item, str) and item.startswith("Row") and item[3:].isdigit():
+            Index = int(item[3:])
+            Rows = self.__Provider.GetRows(Index, Index + 1) if self.__Provider is not None else []
+            Values = tuple(Rows[0]) if Rows else ()
+            if option == "values":
+                return Values
+            return {"text": "", "values": Values}
+        return super().item(item, option, **Options)
+
+    # --- Internal ---
+
+    def __RowCount(self):
+        return self.__Provider.RowCount() if self.__Provider is not None else 0
+
+    def __OnTreeSelect(self, Event):
+        Selected = super().selection()
+        if not Selected or Selected[0] not in self.__Pool:
+            return
+        Index = self.__First + self.__Pool.index(Selected[0])
+        if Index == self.__SelectedIndex:
+            return
+        self.__SelectedIndex = Index
+        for Callback in self.__SelectCallbacks:
+            Callback(Event)
+
+    def __MoveSelection(self, Event, Delta):
+        Count = self.__RowCount()
+        if Count == 0:
+            return "break"
+        Index = 0 if self.__SelectedIndex is None else self.__SelectedIndex + Delta
+        # Moving past the last row asks the provider for more, so the arrow keys reach rows not loaded yet
+        if Index >= Count and self.__Provider is not None:
+            self.__Provider.GetRows(Count, Index + 1)
+        return self.__SelectIndex(Event, Index)
+
+    def __SelectIndex(self, Event, Index):
+        Count = self.__RowCount()
+        if Count == 0:
+            return "break"
+        Index = max(0, min(Index, Count - 1))
+        # Scrolls just far enough to show the new selection
+        if Index < self.__First:
+            self.__First = Index
+        elif Index >= self.__First + self.__Visible:
+            self.__First = Index - self.__Visible + 1
+        Changed = Index != self.__SelectedIndex
+        self.__SelectedIndex = Index
+        self.Refresh()
+        if Changed:
+            for Callback in self.__SelectCallbacks:
+                Callback(Event)
+        return "break"
+
+    def __ScrollBy(self, Rows):
+        self.__First += Rows
+        self.Refresh()
+        return "break"
+
+    def __Resize(self, Height):
+        # Works out how many whole rows fit below the headings
+        HeaderHeight = self.__HeaderHeight if self.__HeaderHeight is not None else self.__RowHeight + 4
+        Visible = max(1, (Height - HeaderHeight) // self.__RowHeight)
+        if Visible != self.__Visible:
+            self.__Visible = Visible
+            self.Refresh()
+
+    def __MeasureRows(self):
+        # Replaces the estimated heading and row heights with those of the first drawn row
+        if self.__HeaderHeight is not None or not self.__Pool:
+            return
+        Box = super().bbox(self.__Pool[0])
+        if not Box:
+            return
+        self.__HeaderHeight, self.__RowHeight = Box[1], max(1, Box[3])
+        self.__Resize(self.winfo_height())
+
+    def __StyleRowHeight(self):
+        try:
+            return int(ttk.Style(self).lookup("Treeview", "rowheight"))
+        except (ValueError, TypeError):
+            return 20
@@ -1,26 +1,49 @@
 import tkinter as tk
 from Managers.AccountManager import AccountManager
 from Managers.LibraryManager import LibraryManager
+from Managers.JobRunner import JobRunner
+from Managers.OutboxSender import OutboxSender
+from Managers.QueryExecutor import QueryExecutor
+from Managers.SearchCache import SearchCache
+from Managers.StartupTimer import StartupTimer
 from Frames.LoginFrame import LoginFrame
 from Frames.DashboardFrame import DashboardFrame
 
 class Main(tk.Tk):
+
+    # Milliseconds between checks for finished queries
+    QueryPollMs = 50
+
     def __init__(self):
         super().__init__()
         self.title("Library Management System")
         self.geometry("1200x700")
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
-        self.__AM = AccountManager()
-        self.__LM = LibraryManager(self.__AM)
+        # Times each part of start-up, the report is written to the log once the window is first idle
+        self.__Timer = StartupTimer(lambda Message: self.__AM.Log(Message))
+        self.__AM = self.__Timer.Time("AccountManager", AccountManager)
+        self.__LM = self.__Timer.Time("LibraryManager", lambda: LibraryManager(self.__AM))
+        self.__Jobs = JobRunner()
+        # Sends queued notification emails in the background for as long as the window is open
+        self.__Outbox = OutboxSender(self.__AM.Log)
+        self.__Outbox.Start()
+        # Runs the frames' queries off the Tk thread, finished queries are handed back by __PollQueries
+        self.__Queries = QueryExecutor(self.__AM)
+        self.__PollQueries()
+        # Recent search results, shared by every tab's search as you type
+        self.__SearchCache = SearchCache()
 
         self.__Frames = {}
         for F in (LoginFrame, DashboardFrame):
-            Frame = F(self, self)
+            Frame = self.__Timer.Time(F.__name__, lambda F=F: F(self, self))
             Frame.grid(row=0, column=0, sticky="nsew")
             self.__Frames[F] = Frame
 
         self.ShowFrame(LoginFrame)
+        # Closes the databases and drains the log when the window is closed
+        self.protocol("WM_DELETE_WINDOW", self.__OnClose)
+        self.after_idle(self.__Timer.Report)
 
     def ShowFrame(self, FrameClass):
         Frame = self.__Frames[FrameClass]
@@ -28,12 +51,42 @@ class Main(tk.Tk):
         if hasattr(Frame, "OnShow"):
             Frame.OnShow()
 
+    def __PollQueries(self):
+        # Calls each finished query's callback here on the Tk thread, as widgets cannot be updated from other threads
+        for Future in self.__Queries.GetFinished():
+            Future.OnDone(Future.Result)
+        self.after(self.QueryPollMs, self.__PollQueries)
+
+    def __OnClose(self):
+        # Stops the outbox and query workers first, so their last log messages are written before the log is closed
+        self.__Queries.Stop()
+        self.__Outbox.Stop()
+        self.__LM.Exit()
+        self.destroy()
+
     def GetAM(self):
         return self.__AM
 
     def GetLM(self):
         return self.__LM
 
+    def GetJobs(self):
+        return self.__Jobs
+
+    def GetOutbox(self):
+        return self.__Outbox
+
+    def GetStartupTimer(self):
+        return self.__Timer
+
+    def GetSearchCache(self):
+        return self.__SearchCache
+
+    def RunQuery(self, Key, Call, OnDone):
+        # Runs Call(LM, AM) on a query worker and then OnDone(Result) on the Tk thread
+        # A later query with the same Key (normally the tab calling this) cancels this one
+        return self.__Queries.Submit(Key, Call, OnDone)
+
 if __name__ == "__main__":
     app = Main()
     app.mainloop()
\ No newline at end of file
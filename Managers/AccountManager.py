@@ -8,49 +8,88 @@ import sqlite3
 import uuid
 # Used to hash passwords
 import hashlib
+# Used to read quoted fields when batch importing students
+import csv
 # Used for automatic date generation when setting accounts to inactive
-from datetime import datetime
-# Used for sending email notifications
-import smtplib
-from email.mime.text import MIMEText
+from datetime import datetime, timedelta
+# Used for sending email notifications over one SMTP session per batch
+from Managers.Mailer import Mailer
+# Used to find the next free ID without scanning the table on every insert
+from Managers.IDAllocator import IDAllocator
+# Used to time how long cached permissions are trusted for
+import time
+# Writes Log.txt from a background thread
+from Managers.AuditLogger import AuditLogger
+# Used to bring existing databases up to the current schema version
+from Managers.SchemaManager import SchemaManager
+# Used to return long lists and search results a page at a time
+from Managers.Paging import Paging, Page
 
 class AccountManager:
 
-    def __init__ (self):
+    # Seconds a cached permission check is trusted before the Staff table's write counter is checked again
+    PermissionRecheckSeconds = 1
+
+    def __init__ (self, Logger=None, IDs=None):
+        # Logger and IDs are only passed in by ForkSession, so background sessions share the main session's
         try:
             # Establishes class variables for relevant connections and cursors
             self.__SysConn = sqlite3.connect("Databases/SystemConfig.db")
             self.__SysCurs = self.__SysConn.cursor()
             self.__LibConn = sqlite3.connect("Databases/LibraryData.db")
             self.__LibCurs = self.__LibConn.cursor()
+            # Applies any outstanding schema changes, such as the job ledger
+            SchemaManager.MigrateSystemConfig(self.__SysConn)
             self.__CurrentUser = None
             self.__CurrentAccessLevel = "None"
-            self.__LogFile = open("Log.txt", "a")
+            # Session cache of the current user's access level and active flag, see CheckPermission
+            self.__PermissionCache = None
+            self.__OwnsLogger = Logger is None
+            self.__Logger = Logger if Logger is not None else AuditLogger("Log.txt")
+            # Shared by every insert through AccountManager and LibraryManager
+            self.__IDs = IDs if IDs is not None else IDAllocator()
         # Error handling and logging
         except Exception as e:  
             print(f"Initialization Error: {e}")
     
     def __del__(self):
         try:
-            # Closes all database files, saves then closes the log file
+            # Closes all database files, writes any queued log messages then closes the log file
             self.__SysConn.commit()
             self.__SysConn.close()
             self.__LibConn.commit()
             self.__LibConn.close()
-            self.__LogFile.flush()
-            self.__LogFile.close()
+            # A background session leaves the shared log open for the main session
+            if self.__OwnsLogger:
+                self.__Logger.Close()
             self.__CurrentAccessLevel = "None"
             self.__CurrentUser =  None
-        # Suppresses errors if __init__ failed before attributes were assigned
-        except AttributeError:
+        # Suppresses errors if __init__ failed before attributes were assigned, or Exit() has already closed the connections
+        except (AttributeError, sqlite3.ProgrammingError):
             pass
     
     # Public wrapper for __del__, used when exiting the program.
     def Exit(self):
         self.__del__()
 
+    def Interrupt(self):
+        # Stops any query running on this session's connections, called from another thread to cancel a superseded request
+        self.__SysConn.interrupt()
+        self.__LibConn.interrupt()
+
+    def ForkSession(self):
+        # Creates a second AccountManager acting as the current user, for use on a background thread
+        # SQLite connections cannot be shared between threads, so this must be called on the thread that will use it
+        # The new session has its own connections but shares the log and ID allocator. Its permission cache starts
+        # empty, so the user's level and active flag are re-read from Staff on its first permission check
+        Session = AccountManager(self.__Logger, self.__IDs)
+        Session.__CurrentUser = self.__CurrentUser
+        Session.__CurrentAccessLevel = self.__CurrentAccessLevel
+        return Session
+
 # --- Adding / Removing accounts ---
     def AddStaff(self, Password, Forename, Surname, AccessLevel, Email):
+        ID = None
         try:
             # Permission check
             if self.CheckPermission("SysAdmin") != True:
@@ -72,6 +111,7 @@ class AccountManager:
             return "Staff added successfully"
         # Error handling and logging
         except Exception as e:
+            self.ReleaseID("Staff", ID)
             self.Log(f"User {self.__CurrentUser} attempted to add staff and encountered an error: {e}")
             return f"System error: {e}"
     
@@ -96,6 +136,8 @@ class AccountManager:
             )
             # Commits, Logs, Returns confirmation
             self.__SysConn.commit()
+            self.__InvalidatePermissionCache(ID)
+            self.ReleaseID("Staff", ID)
             self.Log(f"User {self.__CurrentUser} removed staff member {ID}")
             return "Staff removed successfully"
         # Error handling and logging
@@ -104,6 +146,7 @@ class AccountManager:
             return f"System error: {e}"
 
     def AddStudent(self, Forename, Surname, EntryYear, Email):
+        ID = None
         try:
             # Permission check
             if self.CheckPermission("Admin") != True:
@@ -128,6 +171,7 @@ class AccountManager:
             return "Student added successfully"
         # Error handling and logging
         except Exception as e:
+            self.ReleaseID("Students", ID)
             self.Log(f"User {self.__CurrentUser} attempted to add a student and encountered an error: {e}")
             return f"System error: {e}"
 
@@ -154,6 +198,7 @@ class AccountManager:
             )
             # Commits, Logs, Returns confirmation
             self.__LibConn.commit()
+            self.ReleaseID("Students", ID)
             self.Log(f"User {self.__CurrentUser} removed student {ID}")
             return "Student removed successfully"
         # Error handling and logging
@@ -161,46 +206,129 @@ class AccountManager:
             self.Log(f"User {self.__CurrentUser} attempted to purge old accounts and encountered an error: {e}")
             return f"System error: {e}"
 
-    def BatchImportStudents(self, FilePath):
+    def BatchImportStudents(self, FilePath, Columns=None, ChunkSize=500, ProgressCallback=None):
+        # Columns maps each field to a header name or a 0-based column position
+        # If not given, the header row is matched by name, falling back to the original Forename, Surname, EntryYear, Email order
+        # ProgressCallback, if given, is called after each chunk with (RowsRead, Imported, Rejected)
         # Permission check
         if self.CheckPermission("Admin") != True:
             self.Log(f"{self.__CurrentUser} attempted to batch import students: Insufficient permissions")
             return "Access Denied: Insufficient Permissions."
         try:
-            # Opens a .txt or .csv file and begins counting the number of students imported
+            # Retrieves default max loan amount once for the whole file
+            self.__SysCurs.execute(
+                "SELECT SettingValue from Settings where SettingName = 'DefaultMaxLoans'",
+            )
+            MaxLoansRow = self.__SysCurs.fetchone()
+            MaxLoans = int(MaxLoansRow[0]) if MaxLoansRow else 3
             Count = 0
-            with open(FilePath, "r") as File:
-                # Skips a header line
-                next(File)
-                for Line in File:
-                    # Splits the data by commas, then inputs each student line by line
-                    Data = Line.strip().split(",")
-                    if len(Data) == 4:
-                        try:
-                            Forename = Data[0]
-                            Surname = Data[1]
-                            EntryYear = int(Data[2])
-                            Email = Data[3].strip()
-                            Result = self.AddStudent(Forename, Surname, EntryYear, Email)
-                            # Only increments if AddStudent succeeded
-                            if Result == "Student added successfully":
-                                Count += 1
-                        # Error handling: ValueError (i.e entry year is inputted as "Two Thousand and Twenty Five" instead of 2025)
-                        except ValueError:
-                            self.Log(f"Batch Import: Skipping invalid year data in line: {Line}")
-                    # Error handling: erroneous line length
-                    else:
-                        self.Log(f"Batch Import: Skipping malformed line: {Line}")
-            # Logs number imported and returns confirmation
-            self.Log(f"User {self.__CurrentUser} batch imported {Count} students")
-            return f"Successfully imported {Count} students from {FilePath}."
+            RowsRead = 0
+            Rejects = []
+            Chunk = []
+            # utf-8-sig removes the byte order mark Excel adds to the start of exported CSV files
+            # newline="" lets the csv module handle line breaks inside quoted fields
+            with open(FilePath, "r", encoding="utf-8-sig", newline="") as File:
+                Reader = csv.reader(File)
+                # Reads the header line and works out which column holds each field
+                Header = next(Reader, None)
+                if Header is None:
+                    return "Error: The specified file is empty."
+                Positions = self.__FindImportColumns(Header, Columns)
+                if isinstance(Positions, str):
+                    return Positions
+                for Row in Reader:
+                    RowsRead += 1
+                    # Skips blank lines without reporting them
+                    if not any(Field.strip() for Field in Row):
+                        continue
+                    Student = self.__ValidateImportRow(Row, Positions)
+                    if isinstance(Student, str):
+                        # Rejected lines are reported and the rest of the file carries on
+                        Rejects.append(f"Line {Reader.line_num}: {Student}")
+                        self.Log(f"Batch Import: Skipping line {Reader.line_num} ({Student}): {Row}")
+                        continue
+                    Chunk.append(Student)
+                    # Inserts a full chunk, keeping memory use flat for large files
+                    if len(Chunk) >= ChunkSize:
+                        Count += self.__InsertImportChunk(Chunk, MaxLoans)
+                        Chunk = []
+                        if ProgressCallback:
+                            ProgressCallback(RowsRead, Count, len(Rejects))
+                # Inserts the final partial chunk
+                if Chunk:
+                    Count += self.__InsertImportChunk(Chunk, MaxLoans)
+            # Commits once, so the import is all or nothing if an unexpected error occurs
+            self.__LibConn.commit()
+            if ProgressCallback:
+                ProgressCallback(RowsRead, Count, len(Rejects))
+            # Logs number imported and returns confirmation, including the first few rejected lines
+            self.Log(f"User {self.__CurrentUser} batch imported {Count} students from {FilePath}, {len(Rejects)} lines rejected")
+            Message = f"Successfully imported {Count} students from {FilePath}."
+            if Rejects:
+                Message += f"\n{len(Rejects)} line(s) rejected:\n" + "\n".join(Rejects[:10])
+                if len(Rejects) > 10:
+                    Message += f"\n...and {len(Rejects) - 10} more (see Log.txt)"
+            return Message
         # Specific error handling if the file is not found
         except FileNotFoundError:
             return "Error: The specified file was not found."
         # Error handling and logging
         except Exception as e:
+            self.__LibConn.rollback()
+            # The rolled back chunks' reserved IDs are unknown here, so the table is re-scanned on its next insert
+            self.ForgetIDs("Students")
+            self.Log(f"User {self.__CurrentUser} attempted to batch import students and encountered an error: {e}")
             return f"An error occurred during import: {e}"
 
+    def __FindImportColumns(self, Header, Columns):
+        # Returns {Field: Position} for the four student fields, or an error message
+        Fields = ["Forename", "Surname", "EntryYear", "Email"]
+        # Header names are compared without case or spaces, so "Entry Year" matches EntryYear
+        Names = [Name.strip().lower().replace(" ", "") for Name in Header]
+        if Columns is None:
+            if all(Field.lower() in Names for Field in Fields):
+                Columns = Fields
+            else:
+                Columns = [0, 1, 2, 3]
+            Columns = dict(zip(Fields, Columns))
+        Positions = {}
+        for Field in Fields:
+            Column = Columns.get(Field)
+            if isinstance(Column, int):
+                Positions[Field] = Column
+            elif isinstance(Column, str) and Column.strip().lower().replace(" ", "") in Names:
+                Positions[Field] = Names.index(Column.strip().lower().replace(" ", ""))
+            # Email is optional, every other field must be present
+            elif Field != "Email":
+                return f"Error: Column for {Field} not found in the file header."
+        return Positions
+
+    def __ValidateImportRow(self, Row, Positions):
+        # Returns (Forename, Surname, EntryYear, Email) or the reason the row was rejected
+        Values = {}
+        for Field, Position in Positions.items():
+            Values[Field] = Row[Position].strip() if Position < len(Row) else ""
+        if not Values["Forename"] or not Values["Surname"]:
+            return "missing forename or surname"
+        # Error handling: i.e entry year is inputted as "Two Thousand and Twenty Five" instead of 2025
+        try:
+            EntryYear = int(Values["EntryYear"])
+        except ValueError:
+            return f"invalid entry year '{Values['EntryYear']}'"
+        Email = Values.get("Email", "")
+        if Email and "@" not in Email:
+            return f"invalid email '{Email}'"
+        return (Values["Forename"], Values["Surname"], EntryYear, Email if Email else None)
+
+    def __InsertImportChunk(self, Chunk, MaxLoans):
+        # Reserves one block of IDs and inserts the chunk in a single statement, committed by the caller
+        IDs = self.ReserveIDs(self.__LibCurs, "Students", "UStuID", len(Chunk))
+        self.__LibCurs.executemany(
+            "INSERT INTO Students (UStuID, Forename, Surname, MaxActiveLoans, EntryYear, Email)  VALUES (?, ?, ?, ?, ?, ?)",
+            [(ID, Forename, Surname, MaxLoans, EntryYear, Email) for ID, (Forename, Surname, EntryYear, Email) in zip(IDs, Chunk)]
+        )
+        return len(Chunk)
+
     def PurgeOldAccounts(self):
         # Permission check
         if self.CheckPermission("Admin") != True:
@@ -242,6 +370,8 @@ class AccountManager:
             # Commits, Logs, Returns confirmation
             self.__LibConn.commit()
             self.__SysConn.commit()
+            self.ForgetIDs("Students")
+            self.ForgetIDs("Staff")
             self.Log(f"User {self.__CurrentUser} purged {StudentsDeleted} students and {StaffDeleted} staff inactive since before {CutOffDate}")
             return f"Purged {StudentsDeleted} students and {StaffDeleted} staff inactive since before {CutOffDate}"
         # Error handling and logging
@@ -264,6 +394,7 @@ class AccountManager:
             StudentsDeleted = self.__LibCurs.rowcount
             # Commits, Logs, Returns confirmation
             self.__LibConn.commit()
+            self.ForgetIDs("Students")
             self.Log(f"User {self.__CurrentUser} purged {StudentsDeleted} inactive students from entry year {EntryYear}")
             return f"Purged {StudentsDeleted} inactive students from entry year {EntryYear}"
         # Error handling and logging
@@ -326,6 +457,8 @@ class AccountManager:
             )
             # Commits, Logs, Returns confirmation
             Conn.commit()
+            if IsStaff:
+                self.__InvalidatePermissionCache(ID)
             self.Log(f"User {self.__CurrentUser} set {AccType} account {ID} to {StatusStr}")
             return "Activity status changed"
         # Error handling and logging
@@ -367,6 +500,7 @@ class AccountManager:
             )
             # Commits, Logs, Returns confirmation
             self.__SysConn.commit()
+            self.__InvalidatePermissionCache(ID)
             self.Log(f"User {self.__CurrentUser} promoted user {ID} to {NewLevel}")
             return f"Promoted successfully to {NewLevel}"
         # Error handling and logging
@@ -408,6 +542,7 @@ class AccountManager:
             )
             # Commits, Logs, Returns confirmation
             self.__SysConn.commit()
+            self.__InvalidatePermissionCache(ID)
             self.Log(f"User {self.__CurrentUser} demoted user {ID} to {NewLevel}")
             return f"Demoted successfully to {NewLevel}"
         # Error handling and logging
@@ -486,6 +621,29 @@ class AccountManager:
             self.Log(f"User {self.__CurrentUser} attempted to update SMTP settings and encountered an error: {e}")
             return f"System error: {e}"
 
+    def UpdateSchedulerStaffID(self, ID):
+        try:
+            # Permission check
+            if self.CheckPermission("SysAdmin") != True:
+                self.Log(f"{self.__CurrentUser} attempted to update the scheduler account: Insufficient permissions")
+                return "Access Denied: Insufficient Permissions."
+            # Typo check
+            if not self.CheckIDExists(self.__SysCurs, "Staff", "UStaID", ID):
+                return "Error: ID does not exist"
+            # Updates setting
+            self.__SysCurs.execute(
+                "UPDATE Settings SET SettingValue = ? WHERE SettingName = 'SchedulerStaffID'",
+                (str(int(ID)),)
+            )
+            # Commits, Logs, Returns confirmation
+            self.__SysConn.commit()
+            self.Log(f"User {self.__CurrentUser} set the scheduler account to staff member {ID}")
+            return "Scheduler account updated successfully"
+        # Error handling and logging
+        except Exception as e:
+            self.Log(f"User {self.__CurrentUser} attempted to update the scheduler account and encountered an error: {e}")
+            return f"System error: {e}"
+
 # --- Default settings editing ---
     def UpdateStudentMaxLoans(self, ID, MaxLoans):
         try:
@@ -559,12 +717,8 @@ class AccountManager:
         
 # --- Internal Logger ---
     def Log(self, message):
-        # Generates current date and time (Not formatted to ISO 8601 to aid readability)
-        CurrentDateTime = datetime.strftime(datetime.now(), "%Y-%m-%d %H:%M:%S")
-        # Writes to Log.txt file
-        self.__LogFile.write(f"{CurrentDateTime} - {message}\n")
-        # Immediately pushes to Log.txt so logs can be read in real time
-        self.__LogFile.flush()
+        # Queues the message for the background writer, which timestamps it now and writes it to Log.txt within a second
+        self.__Logger.Write(message)
 
 # --- Log in/out ---
     def LogIn(self, InputID, InputPassword):
@@ -592,6 +746,7 @@ class AccountManager:
             # Assigns CurrentUser and CurrentAccessLevel their respective values
             self.__CurrentUser = int(row[0])
             self.__CurrentAccessLevel = str(row[5])
+            self.__PermissionCache = None
             # Logs the login and returns confirmation
             self.Log(f"User {self.__CurrentUser} logged in")
             return f"Logged in successfully as {row[3]} {row[4]}"
@@ -600,12 +755,44 @@ class AccountManager:
             self.Log(f"A user attempted to log in and encountered an error: {e}")
             return f"System error: {e}"
 
+    def StartSchedulerSession(self, ID=None):
+        # Used by RunDailyJobs.py, which runs from cron without anyone typing a password
+        # Acts as the staff member in the SchedulerStaffID setting (or the ID given), which a SysAdmin chooses
+        try:
+            if ID is None:
+                self.__SysCurs.execute("SELECT SettingValue FROM Settings WHERE SettingName = 'SchedulerStaffID'")
+                Row = self.__SysCurs.fetchone()
+                if not Row or not Row[0]:
+                    return "Error: No scheduler account has been set."
+                ID = Row[0]
+            self.__SysCurs.execute(
+                "SELECT UStaID, AccessLevel, AccountActive FROM Staff WHERE UStaID = ?",
+                (ID,)
+            )
+            Row = self.__SysCurs.fetchone()
+            # The account must exist and be active, like a normal login
+            if Row is None:
+                return "Error: Scheduler account does not exist."
+            if not Row[2]:
+                self.Log(f"Scheduler session refused for staff {Row[0]}: Account is inactive")
+                return "Error: Scheduler account is inactive."
+            self.__CurrentUser = int(Row[0])
+            self.__CurrentAccessLevel = str(Row[1])
+            self.__PermissionCache = None
+            self.Log(f"Scheduler session started as user {self.__CurrentUser}")
+            return "Scheduler session started successfully"
+        # Error handling and logging
+        except Exception as e:
+            self.Log(f"Scheduler session encountered an error: {e}")
+            return f"System error: {e}"
+
     def LogOut(self):
         # Logs logging out
         self.Log(f"User {self.__CurrentUser} logged out \n")
         # Sets current user and access level to None
         self.__CurrentUser = None
         self.__CurrentAccessLevel = "None"
+        self.__PermissionCache = None
         # Returns confirmation
         return "Logged out successfully"
     
@@ -625,16 +812,18 @@ class AccountManager:
             self.Log(f"User {self.__CurrentUser} attempted to retrieve all staff details and encountered an error: {e}")
             return f"System error: {e}"
     
-    def GetAllStudents(self):
+    def GetAllStudents(self, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.CheckPermission("Teacher") != True:
                 self.Log(f"{self.__CurrentUser} attempted to view all student details: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
             # Selects all student details
-            self.__LibCurs.execute("SELECT UStuID, Forename, Surname, MaxActiveLoans, AccountActive, EntryYear, Email FROM Students")
-            # Logs retrieval and returns all student details as a list of tuples
-            return self.__LibCurs.fetchall()
+            # Returns all student details as a list of tuples, or one Page of students when PageSize is given
+            return Paging.Fetch(
+                self.__LibCurs, "SELECT UStuID, Forename, Surname, MaxActiveLoans, AccountActive, EntryYear, Email FROM Students",
+                "1", [], ["UStuID"], [0], PageSize, Cursor
+            )
         # Error handling and logging
         except Exception as e:
             self.Log(f"User {self.__CurrentUser} attempted to retrieve all student details and encountered an error: {e}")
@@ -744,72 +933,257 @@ class AccountManager:
             self.Log(f"Error retrieving SMTP settings: {e}")
             return {}
 
+    def GetMailer(self):
+        # Builds a Mailer from the SMTP settings, or returns an error string if they are incomplete
+        return Mailer.FromSettings(self.GetSMTPSettings())
+
     def SendEmail(self, ToAddress, Subject, Body):
+        # Sends a single email, returns True or an error string
+        return self.SendEmails([(ToAddress, Subject, Body)])[0][1]
+
+    def SendEmails(self, Messages):
+        # Sends a list of (ToAddress, Subject, Body) over one SMTP session
+        # Returns a list of (ToAddress, Result), where Result is True or an error string
         try:
-            # Retrieves SMTP settings
-            SMTPSettings = self.GetSMTPSettings()
-            # Checks that all required settings are present and filled in
-            Required = ["SMTPHost", "SMTPPort", "SMTPUser", "SMTPPassword", "SMTPSender"]
-            if not all(SMTPSettings.get(k) for k in Required):
+            EmailMailer = self.GetMailer()
+            if isinstance(EmailMailer, str):
                 self.Log("Email send failed: SMTP settings incomplete")
-                return "Error: SMTP settings incomplete"
-            # Builds the email
-            Message = MIMEText(Body)
-            Message["Subject"] = Subject
-            Message["From"] = SMTPSettings["SMTPSender"]
-            Message["To"] = ToAddress
-            # Connects to SMTP server and sends
-            with smtplib.SMTP(SMTPSettings["SMTPHost"], int(SMTPSettings["SMTPPort"])) as Server:
-                Server.starttls()
-                Server.login(SMTPSettings["SMTPUser"], SMTPSettings["SMTPPassword"])
-                Server.sendmail(SMTPSettings["SMTPSender"], ToAddress, Message.as_string())
-            self.Log(f"Email sent to {ToAddress}: {Subject}")
-            return True
+                return [(ToAddress, EmailMailer) for ToAddress, Subject, Body in Messages]
+            Results = EmailMailer.SendBatch(Messages)
+            # Logs the outcome for each recipient
+            for (ToAddress, Subject, Body), (_, Result) in zip(Messages, Results):
+                if Result == True:
+                    self.Log(f"Email sent to {ToAddress}: {Subject}")
+                else:
+                    self.Log(f"Email send failed to {ToAddress}: {Result}")
+            return Results
+        # Error handling and logging, e.g. the server could not be reached at all
+        except Exception as e:
+            self.Log(f"Email send failed for {len(Messages)} messages: {e}")
+            return [(ToAddress, f"System error: {e}") for ToAddress, Subject, Body in Messages]
+
+# --- Outbox ---
+    # Notifications are queued in the Outbox table rather than sent straight away
+    # OutboxSender workers send them in the background, retrying with a growing delay if the SMTP server is unavailable
+
+    def QueueEmail(self, ToAddress, Subject, Body, DedupKey=None, Commit=True):
+        # Queues a single email, returns the number queued (0 if DedupKey was already queued) or an error string
+        return self.QueueEmails([(ToAddress, Subject, Body)], [DedupKey], Commit)
+
+    def QueueEmails(self, Messages, DedupKeys=None, Commit=True):
+        # Queues a list of (ToAddress, Subject, Body) in one transaction
+        # DedupKeys gives a key for each message, a message whose key is already in the outbox is not queued again
+        # With Commit=False the insert is left in the caller's transaction, which commits or rolls it back with its own changes
+        # Returns the number of messages queued, or an error string
+        try:
+            if DedupKeys is None:
+                DedupKeys = [None] * len(Messages)
+            Now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            Before = self.__SysConn.total_changes
+            self.__SysCurs.executemany(
+                "INSERT OR IGNORE INTO Outbox (DedupKey, ToAddress, Subject, Body, NextAttemptAt, CreatedAt) VALUES (?, ?, ?, ?, ?, ?)",
+                [(Key, ToAddress, Subject, Body, Now, Now) for (ToAddress, Subject, Body), Key in zip(Messages, DedupKeys)]
+            )
+            # Commits, Logs, Returns the number queued
+            Queued = self.__SysConn.total_changes - Before
+            if Commit:
+                self.__SysConn.commit()
+            self.Log(f"Queued {Queued} of {len(Messages)} emails in the outbox")
+            return Queued
         # Error handling and logging
         except Exception as e:
-            self.Log(f"Email send failed to {ToAddress}: {e}")
+            if Commit:
+                self.__SysConn.rollback()
+            self.Log(f"Error queueing {len(Messages)} emails: {e}")
             return f"System error: {e}"
 
+    def GetOutboxCounts(self):
+        try:
+            # Returns the number of emails in each status, e.g. {"Pending": 3, "Sent": 120, "Dead": 1}
+            self.__SysCurs.execute("SELECT Status, COUNT(*) FROM Outbox GROUP BY Status")
+            return {row[0]: row[1] for row in self.__SysCurs.fetchall()}
+        # Error handling and logging
+        except Exception as e:
+            self.Log(f"Error retrieving outbox counts: {e}")
+            return {}
+
+    def RetryDeadEmails(self):
+        try:
+            # Permission check
+            if self.CheckPermission("SysAdmin") != True:
+                self.Log(f"{self.__CurrentUser} attempted to retry dead emails: Insufficient permissions")
+                return "Access Denied: Insufficient Permissions."
+            # Puts every email that was given up on back in the queue with a fresh set of attempts
+            self.__SysCurs.execute(
+                "UPDATE Outbox SET Status = 'Pending', Attempts = 0, NextAttemptAt = ? WHERE Status = 'Dead'",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),)
+            )
+            Count = self.__SysCurs.rowcount
+            # Commits, Logs, Returns confirmation
+            self.__SysConn.commit()
+            self.Log(f"User {self.__CurrentUser} re-queued {Count} dead emails")
+            return f"{Count} emails re-queued successfully"
+        # Error handling and logging
+        except Exception as e:
+            self.Log(f"User {self.__CurrentUser} attempted to retry dead emails and encountered an error: {e}")
+            return f"System error: {e}"
+
+# --- Job ledger ---
+    # Daily jobs record each school day they run for, so they happen once per day however many times StartUp is called
+    # The ledger lives in SystemConfig.db so it is shared by every copy of the program and RunDailyJobs.py
+
+    # Minutes after which a job still marked 'Running' is assumed to have crashed and can be claimed again
+    StaleJobMinutes = 60
+
+    def ClaimJob(self, JobName, RunDate):
+        # Returns True if this session should run the job for RunDate, False if it has already run or is running elsewhere
+        try:
+            Now = datetime.now()
+            StartedAt = Now.strftime("%Y-%m-%d %H:%M:%S")
+            # The primary key means only one program can insert the row for this job and day
+            self.__SysCurs.execute(
+                "INSERT OR IGNORE INTO JobLedger (JobName, RunDate, Status, StartedAt) VALUES (?, ?, 'Running', ?)",
+                (JobName, RunDate, StartedAt)
+            )
+            Claimed = self.__SysCurs.rowcount == 1
+            if not Claimed:
+                # Failed runs, and runs that crashed part way through, are retried
+                StaleBefore = (Now - timedelta(minutes=self.StaleJobMinutes)).strftime("%Y-%m-%d %H:%M:%S")
+                self.__SysCurs.execute(
+                    """UPDATE JobLedger SET Status = 'Running', StartedAt = ?, FinishedAt = NULL, Result = NULL
+                    WHERE JobName = ? AND RunDate = ? AND (Status = 'Failed' OR (Status = 'Running' AND StartedAt < ?))""",
+                    (StartedAt, JobName, RunDate, StaleBefore)
+                )
+                Claimed = self.__SysCurs.rowcount == 1
+            self.__SysConn.commit()
+            return Claimed
+        # Error handling and logging
+        except Exception as e:
+            self.__SysConn.rollback()
+            self.Log(f"Error claiming job {JobName} for {RunDate}: {e}")
+            return False
+
+    def FinishJob(self, JobName, RunDate, Status, Result):
+        # Records the outcome of a claimed job, Status is 'Done', 'Failed' or 'Skipped'
+        try:
+            self.__SysCurs.execute(
+                """INSERT INTO JobLedger (JobName, RunDate, Status, FinishedAt, Result) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(JobName, RunDate) DO UPDATE SET Status = excluded.Status, FinishedAt = excluded.FinishedAt, Result = excluded.Result""",
+                (JobName, RunDate, Status, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), str(Result))
+            )
+            self.__SysConn.commit()
+            self.Log(f"Job {JobName} for {RunDate}: {Status} - {Result}")
+        # Error handling and logging
+        except Exception as e:
+            self.Log(f"Error recording job {JobName} for {RunDate}: {e}")
+
+    def GetLastJobRunDate(self, JobName):
+        # Returns the most recent RunDate the job was recorded for (in any status), or None if it has never run
+        self.__SysCurs.execute("SELECT MAX(RunDate) FROM JobLedger WHERE JobName = ?", (JobName,))
+        Row = self.__SysCurs.fetchone()
+        return Row[0] if Row else None
+
+    def GetUnfinishedJobDates(self, JobName):
+        # Returns the RunDates whose run failed or never finished, oldest first. ClaimJob decides whether each can be retried yet
+        self.__SysCurs.execute(
+            "SELECT RunDate FROM JobLedger WHERE JobName = ? AND Status IN ('Failed', 'Running') ORDER BY RunDate",
+            (JobName,)
+        )
+        return [Row[0] for Row in self.__SysCurs.fetchall()]
+
 # --- Checking methods ---
     def CheckPermission(self, NecessaryPerms):
         # Maps each access level to a numeric value so higher levels inherit lower level permissions
         RoleHierarchy = {"None" : 0, "Teacher" : 1, "Admin" : 2, "SysAdmin" : 3}
-        # Defaults to 0 if level not found, reducing bypass risk; unknown required perms default to 100 so they always fail
-        CurrentValue = RoleHierarchy.get(self.__CurrentAccessLevel, 0)
-        NecessaryValue = RoleHierarchy.get(NecessaryPerms, 100)
         # No user logged in check
         if self.__CurrentUser is None:
             return "No User logged in"
-        # Active account check
-        if self.IsAccountActive(self.__SysCurs, "Staff", "UStaID", self.__CurrentUser) != True:
+        # Active account check, answered from the session cache unless the Staff table may have changed
+        AccessLevel, Active = self.__GetSessionPermissions()
+        if Active != True:
             return False
+        # Defaults to 0 if level not found, reducing bypass risk; unknown required perms default to 100 so they always fail
+        CurrentValue = RoleHierarchy.get(AccessLevel, 0)
+        NecessaryValue = RoleHierarchy.get(NecessaryPerms, 100)
         # Compares numeric values to determine if current user has sufficient permissions
         if CurrentValue >= NecessaryValue:
             return True
         else:
             return False
 
+    def __GetSessionPermissions(self):
+        # Returns (AccessLevel, Active) for the current user
+        # The Staff write counter (SystemConfig migration v4) only changes when a Staff row does, so commits from the outbox
+        # workers, forked sessions and ledger do not force a re-read. Changes made through this connection also
+        # invalidate the cache directly (see __InvalidatePermissionCache)
+        Now = time.monotonic()
+        Cache = self.__PermissionCache
+        if Cache is not None and Cache["UStaID"] == self.__CurrentUser:
+            # Recently checked, no database access needed
+            if Now - Cache["CheckedAt"] < self.PermissionRecheckSeconds:
+                return Cache["AccessLevel"], Cache["Active"]
+            # No Staff row has changed since the cache was filled
+            if self.__GetStaffVersion() == Cache["StaffVersion"]:
+                Cache["CheckedAt"] = Now
+                return Cache["AccessLevel"], Cache["Active"]
+        # Cache missing or stale, re-reads the Staff row
+        StaffVersion = self.__GetStaffVersion()
+        self.__SysCurs.execute(
+            "SELECT AccessLevel, AccountActive FROM Staff WHERE UStaID = ?",
+            (self.__CurrentUser,)
+        )
+        Row = self.__SysCurs.fetchone()
+        # A removed account is treated the same as an inactive one
+        AccessLevel = str(Row[0]) if Row else "None"
+        Active = Row is not None and Row[1] == 1
+        # Keeps the level shown in the dashboard in step with any promotion or demotion
+        self.__CurrentAccessLevel = AccessLevel
+        self.__PermissionCache = {"UStaID": self.__CurrentUser, "AccessLevel": AccessLevel, "Active": Active, "StaffVersion": StaffVersion, "CheckedAt": Now}
+        return AccessLevel, Active
+
+    def __GetStaffVersion(self):
+        # Reads the Staff table's write counter, bumped by triggers on every insert, update and delete
+        self.__SysCurs.execute("SELECT Version FROM TableVersions WHERE TableName = 'Staff'")
+        Row = self.__SysCurs.fetchone()
+        return Row[0] if Row else None
+
+    def __InvalidatePermissionCache(self, ID):
+        # Called after this session changes a Staff row, only the current user's own row matters
+        try:
+            if self.__CurrentUser is not None and int(ID) == self.__CurrentUser:
+                self.__PermissionCache = None
+        except ValueError:
+            pass
+
     @staticmethod
     def CheckIDExists(Cursor, Table, IDColumn, ID):
         # Checks if an inputted ID exists, Used to find and detect typos in user input
         Cursor.execute(f"SELECT 1 FROM {Table} WHERE {IDColumn} = ?", (ID,)) 
         return Cursor.fetchone() is not None
     
-    @staticmethod
-    def GetNextID(Cursor, Table, IDColumn):
+    def GetNextID(self, Cursor, Table, IDColumn):
         # Finds the next available ID in a table. I prefer this over AutoIncrement as it fills in gaps, reducing overall database size
-        Cursor.execute(f"SELECT {IDColumn} FROM {Table} ORDER BY {IDColumn} ASC")
-        rows = Cursor.fetchall()
-        # Isolates the list of tuples from .fetchall into a list of IDs
-        existing_ids = [row[0] for row in rows]
-        expected_id = 1
-        # Counts up until the expected ID is either the end of the list, or finds a gap in the list
-        for id in existing_ids:
-            if id != expected_id:
-                break
-            expected_id += 1
-        return expected_id
-    
+        # The allocator scans each table once, then keeps track of the gaps itself
+        return self.__IDs.Allocate(Cursor, Table, IDColumn)
+
+    def ReserveIDs(self, Cursor, Table, IDColumn, Count):
+        # Finds a block of available IDs in one go, used by bulk inserts
+        return self.__IDs.Reserve(Cursor, Table, IDColumn, Count)
+
+    def ReleaseID(self, Table, ID):
+        # Hands a deleted row's ID back so the gap is filled by the next insert
+        # None is ignored, so failed inserts can call this before an ID was allocated
+        if ID is not None:
+            self.__IDs.Release(Table, [ID])
+
+    def ReleaseIDs(self, Table, IDs):
+        # Hands back a block of reserved IDs after a bulk insert fails or is rolled back
+        self.__IDs.Release(Table, IDs)
+
+    def ForgetIDs(self, Table):
+        # Used after deleting many rows at once, the table is re-scanned on its next insert
+        self.__IDs.Forget(Table)
+
     @staticmethod
     def IsAccountActive(Cursor, Table, IDcolumn, ID):
         # Checks if an account is active, returns the boolean value
@@ -827,7 +1201,7 @@ class AccountManager:
         return self.IsAccountActive(self.__SysCurs, "Staff", "UStaID", ID)
 
 # --- Search Methods ---
-    def SearchStaff(self, SearchTerm):
+    def SearchStaff(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.CheckPermission("Teacher") != True:
@@ -836,41 +1210,50 @@ class AccountManager:
             # Wraps search term in wildcards for partial matching
             Term = f"%{SearchTerm}%"
             # Searches by forename, surname, or ID
-            Query = """
-                SELECT UStaID, Forename, Surname
-                FROM Staff
-                WHERE Forename LIKE ? OR Surname LIKE ? OR CAST(UStaID AS TEXT) LIKE ?
-            """
-            self.__SysCurs.execute(Query, (Term, Term, Term))
-            Results = self.__SysCurs.fetchall()
+            Results = Paging.Fetch(
+                self.__SysCurs, "SELECT UStaID, Forename, Surname FROM Staff",
+                "Forename LIKE ? OR Surname LIKE ? OR CAST(UStaID AS TEXT) LIKE ?", [Term, Term, Term], ["UStaID"], [0], PageSize, Cursor
+            )
             # Returns results or a not found message
-            return Results if Results else f"Could not find a staff member matching '{SearchTerm}'."
+            return Results if (Results.Rows if isinstance(Results, Page) else Results) else f"Could not find a staff member matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
         
     def CreateNotification(self, UStaID, NotifBody):
+        # Inserts a new undelivered notification for the given staff member
+        Result = self.CreateNotifications([UStaID], NotifBody)
+        return True if isinstance(Result, int) else Result
+
+    def CreateNotifications(self, UStaIDList, NotifBody):
+        # Fans the same notification out to many staff members in one transaction
+        # Returns the number of notifications created, or an error string
+        UNIDs = []
         try:
-            # Inserts a new undelivered notification for the given staff member
-            UNID = self.GetNextID(self.__SysCurs, "Notifications", "UNID")
-            self.__SysCurs.execute(
+            if not UStaIDList:
+                return 0
+            # Reserves a block of IDs and inserts every row in one statement
+            UNIDs = self.ReserveIDs(self.__SysCurs, "Notifications", "UNID", len(UStaIDList))
+            self.__SysCurs.executemany(
                 "INSERT INTO Notifications (UNID, UStaID, NotifBody, Delivered) VALUES (?, ?, ?, ?)",
-                (UNID, UStaID, NotifBody, False)
+                [(UNID, UStaID, NotifBody, False) for UNID, UStaID in zip(UNIDs, UStaIDList)]
             )
-            # Commits, Logs, Returns confirmation
+            # Commits, Logs, Returns the number created
             self.__SysConn.commit()
-            self.Log(f"Notification {UNID} created for staff member {UStaID}")
-            return True
+            self.Log(f"Notifications {UNIDs[0]}-{UNIDs[-1]} created for {len(UStaIDList)} staff members")
+            return len(UStaIDList)
         # Error handling and logging
         except Exception as e:
-            self.Log(f"Error creating notification for staff member {UStaID}: {e}")
+            self.__SysConn.rollback()
+            self.ReleaseIDs("Notifications", UNIDs)
+            self.Log(f"Error creating notifications for {len(UStaIDList)} staff members: {e}")
             return f"System error: {e}"
 
     def DeliverNotifications(self):
         try:
-            # Fetches all undelivered notifications for the currently logged in user
+            # Fetches all undelivered notifications for the currently logged in user, using the (UStaID, Delivered) index
             self.__SysCurs.execute(
-                "SELECT UNID, NotifBody FROM Notifications WHERE UStaID = ? AND Delivered = ?",
+                "SELECT UNID, NotifBody FROM Notifications WHERE UStaID = ? AND Delivered = ? ORDER BY UNID",
                 (self.__CurrentUser, False)
             )
             Pending = self.__SysCurs.fetchall()
@@ -886,28 +1269,38 @@ class AccountManager:
                 self.Log(f"Notification delivery skipped for user {self.__CurrentUser}: no email address on record")
                 return "No email address on record, notifications not delivered."
             ToAddress = EmailRow[0]
-            # Sends each notification and marks it as delivered
-            Delivered = 0
-            for UNID, NotifBody in Pending:
-                Result = self.SendEmail(ToAddress, "Library System Notification", NotifBody)
-                if Result == True:
-                    self.__SysCurs.execute(
-                        "UPDATE Notifications SET Delivered = ? WHERE UNID = ?",
-                        (True, UNID)
-                    )
-                    Delivered += 1
-                else:
-                    self.Log(f"Failed to deliver notification {UNID} to {ToAddress}")
+            # Merges every pending notification into one email
+            if len(Pending) == 1:
+                Body = Pending[0][1]
+            else:
+                Body = f"You have {len(Pending)} new library notifications:\n\n"
+                Body += "\n\n".join(f"{Number}. {NotifBody}" for Number, (UNID, NotifBody) in enumerate(Pending, start=1))
+            # Queues the email in the outbox, which retries any failed sends
+            # No dedup key, as UNIDs are reused once freed and the rows are marked delivered in the same commit
+            Queued = self.QueueEmail(ToAddress, "Library System Notification", Body, Commit=False)
+            if isinstance(Queued, str):
+                self.__SysConn.rollback()
+                return Queued
+            # Marks every merged notification as delivered, in chunks kept under SQLite's bound parameter limit
+            UNIDs = [UNID for UNID, NotifBody in Pending]
+            for i in range(0, len(UNIDs), 500):
+                Chunk = UNIDs[i:i + 500]
+                Placeholders = ", ".join("?" for _ in Chunk)
+                self.__SysCurs.execute(
+                    f"UPDATE Notifications SET Delivered = ? WHERE UNID IN ({Placeholders})",
+                    [True] + Chunk
+                )
             # Commits, Logs, Returns confirmation
             self.__SysConn.commit()
-            self.Log(f"Delivered {Delivered} of {len(Pending)} notifications to user {self.__CurrentUser}")
-            return f"Delivered {Delivered} of {len(Pending)} notifications."
+            self.Log(f"Delivered {len(Pending)} notifications to user {self.__CurrentUser} in one email")
+            return f"Delivered {len(Pending)} notifications."
         # Error handling and logging
         except Exception as e:
+            self.__SysConn.rollback()
             self.Log(f"Error delivering notifications for user {self.__CurrentUser}: {e}")
             return f"System error: {e}"
 
-    def SearchStudents(self, SearchTerm):
+    def SearchStudents(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.CheckPermission("Teacher") != True:
@@ -916,15 +1309,13 @@ class AccountManager:
             # Wraps search term in wildcards for partial matching
             Term = f"%{SearchTerm}%"
             # Searches by forename, surname, or ID
-            Query = """
-                SELECT UStuID, Forename, Surname
-                FROM Students
-                WHERE Forename LIKE ? OR Surname LIKE ? OR CAST(UStuID AS TEXT) LIKE ?
-            """
-            self.__LibCurs.execute(Query, (Term, Term, Term))
-            Results = self.__LibCurs.fetchall()
+            # Returns the same columns as GetAllStudents, so the frames need no second lookup per student
+            Results = Paging.Fetch(
+                self.__LibCurs, "SELECT UStuID, Forename, Surname, MaxActiveLoans, AccountActive, EntryYear, Email FROM Students",
+                "Forename LIKE ? OR Surname LIKE ? OR CAST(UStuID AS TEXT) LIKE ?", [Term, Term, Term], ["UStuID"], [0], PageSize, Cursor
+            )
             # Returns results or a not found message
-            return Results if Results else f"Could not find a student matching '{SearchTerm}'."
+            return Results if (Results.Rows if isinstance(Results, Page) else Results) else f"Could not find a student matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
\ No newline at end of file
@@ -0,0 +1,139 @@
+# This class writes the audit log (Log.txt) from a background thread
+# Log messages are put on a queue and return straight away, so logging no longer waits on the disk
+# The writer thread writes messages in batches and flushes when FlushInterval seconds have passed
+# or FlushBytes are waiting, whichever comes first
+# The log is rotated when it reaches MaxBytes or when the date changes, and rotated files are gzip compressed
+# Close() (called from AccountManager.Exit) writes everything still queued before returning
+
+# Used for the queue between callers and the writer thread
+import queue
+import threading
+# Used to make sure queued messages are written if the program exits without calling Close()
+import atexit
+# Used to compress rotated log files
+import gzip
+import shutil
+import os
+import time
+# Used for timestamps and date based rotation
+from datetime import datetime
+
+class AuditLogger:
+
+    def __init__(self, FilePath="Log.txt", MaxBytes=5 * 1024 * 1024, FlushInterval=1.0, FlushBytes=64 * 1024):
+        self.__FilePath = FilePath
+        self.__MaxBytes = MaxBytes
+        self.__FlushInterval = FlushInterval
+        self.__FlushBytes = FlushBytes
+        self.__Queue = queue.Queue()
+        self.__Closed = False
+        self.__CloseLock = threading.Lock()
+        # The date the current log file was started, used for date rotation
+        if os.path.exists(FilePath):
+            self.__FileDate = datetime.fromtimestamp(os.path.getmtime(FilePath)).date()
+        else:
+            self.__FileDate = datetime.now().date()
+        self.__File = open(FilePath, "a")
+        # Daemon thread so a crash cannot leave the program hanging, atexit still drains the queue
+        self.__Thread = threading.Thread(target=self.__Run, name="AuditLogger", daemon=True)
+        self.__Thread.start()
+        atexit.register(self.Close)
+
+    def Write(self, Message):
+        # Generates current date and time when the message is logged, not when it is written (Not formatted to ISO 8601 to aid readability)
+        CurrentDateTime = datetime.strftime(datetime.now(), "%Y-%m-%d %H:%M:%S")
+        Line = f"{CurrentDateTime} - {Message}\n"
+        # The check and the put share Close()'s lock, so no line can be queued behind the writer thread's stop signal
+        with self.__CloseLock:
+            if not self.__Closed:
+                self.__Queue.put(Line)
+                return
+        # Anything logged after Close() is written directly so it is not lost
+        with open(self.__FilePath, "a") as File:
+            File.write(Line)
+
+    def Flush(self):
+        # Blocks until every message queued so far has been written and flushed
+        Done = threading.Event()
+        with self.__CloseLock:
+            if self.__Closed:
+                return
+            self.__Queue.put(Done)
+        Done.wait()
+
+    def Close(self):
+        # Drains the queue, stops the writer thread and closes the file. Safe to call more than once
+        with self.__CloseLock:
+            if self.__Closed:
+                return
+            self.__Closed = True
+            # Queued under the lock, so it is always the last item the writer thread sees
+            self.__Queue.put(None)
+        self.__Thread.join()
+        self.__File.close()
+
+    def __Run(self):
+        Pending = []
+        PendingBytes = 0
+        LastFlush = time.monotonic()
+        Running = True
+        while Running:
+            # Waits for the first message, waking up after FlushInterval so idle messages still get flushed
+            try:
+                Items = [self.__Queue.get(timeout=self.__FlushInterval)]
+            except queue.Empty:
+                Items = []
+            # Takes everything else already queued, so a burst of messages becomes one write
+            while True:
+                try:
+                    Items.append(self.__Queue.get_nowait())
+                except queue.Empty:
+                    break
+            Waiting = []
+            for Item in Items:
+                if Item is None:
+                    Running = False
+                elif isinstance(Item, threading.Event):
+                    Waiting.append(Item)
+                else:
+                    Pending.append(Item)
+                    PendingBytes += len(Item)
+            try:
+                if Pending:
+                    self.__RotateIfNeeded(PendingBytes)
+                    self.__File.write("".join(Pending))
+                    Pending = []
+                # Flushes on time, size, a Flush() request or shutdown
+                if PendingBytes >= self.__FlushBytes or time.monotonic() - LastFlush >= self.__FlushInterval or Waiting or not Running:
+                    self.__File.flush()
+                    PendingBytes = 0
+                    LastFlush = time.monotonic()
+            # A logging failure must never stop the program, the messages are printed instead
+            except Exception as e:
+                print(f"Logging Error: {e}")
+                for Line in Pending:
+                    print(Line, end="")
+                Pending = []
+            for Done in Waiting:
+                Done.set()
+
+    def __RotateIfNeeded(self, IncomingBytes):
+        # Rotates when the day has changed since the file was started, or the file would grow past MaxBytes
+        Today = datetime.now().date()
+        Size = self.__File.tell()
+        if Size == 0:
+            self.__FileDate = Today
+            return
+        if self.__FileDate == Today and Size + IncomingBytes < self.__MaxBytes:
+            return
+        self.__File.close()
+        # Rotated files are named after the date the log was started, e.g. Log.txt.20261018.1.gz
+        Number = 1
+        while os.path.exists(f"{self.__FilePath}.{self.__FileDate:%Y%m%d}.{Number}.gz"):
+            Number += 1
+        RotatedPath = f"{self.__FilePath}.{self.__FileDate:%Y%m%d}.{Number}.gz"
+        with open(self.__FilePath, "rb") as Source, gzip.open(RotatedPath, "wb") as Target:
+            shutil.copyfileobj(Source, Target)
+        # Starts a new, empty log file
+        self.__File = open(self.__FilePath, "w")
+        self.__FileDate = Today
@@ -0,0 +1,129 @@
+# This class hands out the next free ID for a table, filling gaps left by deleted rows first
+# It replaces scanning the whole ID column on every insert. Each table is scanned once to build a
+# sorted list of free ranges (gaps), after which finding the gap for an ID is a binary search, O(log n)
+# Released IDs are merged into the neighbouring gaps, so the list does not fill up with single IDs
+# Table names are unique across LibraryData.db and SystemConfig.db, so they are used as the key
+# One allocator is shared by every manager (including background sessions), so access is locked
+
+# Used to binary search the gaps, which are kept in ascending order so the lowest free ID is always at the front
+import bisect
+# Used to share the allocator safely between threads
+import threading
+
+class IDAllocator:
+
+    def __init__(self):
+        # Table -> ([Starts], [Ends]) of the gaps below the highest ID, ascending, never overlapping or touching
+        self.__Gaps = {}
+        # Table -> first ID above the highest ID in use
+        self.__NextFresh = {}
+        self.__Lock = threading.Lock()
+
+    def Allocate(self, Cursor, Table, IDColumn):
+        # Returns the lowest free ID, the same ID the original full scan would have found
+        return self.Reserve(Cursor, Table, IDColumn, 1)[0]
+
+    def Reserve(self, Cursor, Table, IDColumn, Count):
+        # Returns a block of Count free IDs in ascending order, for bulk inserts
+        # Gaps are used first, then a contiguous run above the current highest ID
+        with self.__Lock:
+            if Table not in self.__Gaps:
+                self.__Seed(Cursor, Table, IDColumn)
+            IDs = []
+            Seen = set()
+            while len(IDs) < Count:
+                Candidates = self.__Take(Table, Count - len(IDs))
+                # Another program may have inserted rows since the table was seeded
+                # Any taken IDs are discarded and replaced on the next pass
+                Taken = self.__FindTaken(Cursor, Table, IDColumn, Candidates)
+                for ID in Candidates:
+                    # Each ID is only handed out once per block
+                    if ID not in Taken and ID not in Seen:
+                        Seen.add(ID)
+                        IDs.append(ID)
+            return sorted(IDs)
+
+    def Release(self, Table, IDs):
+        # Returns IDs to the gaps so they are reused, as GetNextID did
+        # Used for deleted rows, and for reserved IDs whose insert failed or was rolled back
+        with self.__Lock:
+            if Table not in self.__Gaps:
+                return
+            Starts, Ends = self.__Gaps[Table]
+            for ID in map(int, IDs):
+                # IDs at or above NextFresh are already free
+                if ID < 1 or ID >= self.__NextFresh[Table]:
+                    continue
+                # The gap starting at or before ID, if any. An ID inside it has already been given back
+                i = bisect.bisect_right(Starts, ID) - 1
+                if i >= 0 and Ends[i] >= ID:
+                    continue
+                # Joins the gap ending just below and/or the gap starting just above
+                JoinsLeft = i >= 0 and Ends[i] == ID - 1
+                JoinsRight = i + 1 < len(Starts) and Starts[i + 1] == ID + 1
+                if JoinsLeft and JoinsRight:
+                    Ends[i] = Ends[i + 1]
+                    del Starts[i + 1], Ends[i + 1]
+                elif JoinsLeft:
+                    Ends[i] = ID
+                elif JoinsRight:
+                    Starts[i + 1] = ID
+                else:
+                    Starts.insert(i + 1, ID)
+                    Ends.insert(i + 1, ID)
+
+    def Forget(self, Table):
+        # Used after bulk deletes, where the freed IDs are unknown. The table is re-scanned on next use
+        with self.__Lock:
+            self.__Gaps.pop(Table, None)
+            self.__NextFresh.pop(Table, None)
+
+    def __Seed(self, Cursor, Table, IDColumn):
+        # Single ordered scan of the ID column, recording every gap as a free range
+        Cursor.execute(f"SELECT {IDColumn} FROM {Table} ORDER BY {IDColumn} ASC")
+        Starts, Ends = [], []
+        Expected = 1
+        for Row in Cursor.fetchall():
+            ID = Row[0]
+            if ID > Expected:
+                Starts.append(Expected)
+                Ends.append(ID - 1)
+            Expected = max(Expected, ID + 1)
+        # Gaps are found in ascending order, so the lists are already sorted
+        self.__Gaps[Table] = (Starts, Ends)
+        self.__NextFresh[Table] = Expected
+
+    def __Take(self, Table, Count):
+        # Removes up to Count IDs, from the lowest gaps first
+        Starts, Ends = self.__Gaps[Table]
+        IDs = []
+        Used = 0
+        while len(IDs) < Count and Used < len(Starts):
+            Start, End = Starts[Used], Ends[Used]
+            Last = min(End, Start + (Count - len(IDs)) - 1)
+            IDs.extend(range(Start, Last + 1))
+            # Keeps whatever remains of the gap, otherwise the whole gap is used
+            if Last < End:
+                Starts[Used] = Last + 1
+            else:
+                Used += 1
+        # Removes the used gaps from the front in one go
+        del Starts[:Used], Ends[:Used]
+        # Anything still needed comes from a contiguous run above the highest ID
+        Remaining = Count - len(IDs)
+        if Remaining > 0:
+            Start = self.__NextFresh[Table]
+            IDs.extend(range(Start, Start + Remaining))
+            self.__NextFresh[Table] = Start + Remaining
+        return IDs
+
+    @staticmethod
+    def __FindTaken(Cursor, Table, IDColumn, IDs):
+        # Primary key lookups in chunks, kept under SQLite's bound parameter limit
+        Taken = set()
+        for i in range(0, len(IDs), 500):
+            Chunk = IDs[i:i + 500]
+            Placeholders = ", ".join("?" for _ in Chunk)
+            Cursor.execute(f"SELECT {IDColumn} FROM {Table} WHERE {IDColumn} IN ({Placeholders})", Chunk)
+            Taken.update(Row[0] for Row in Cursor.fetchall())
+        return Taken
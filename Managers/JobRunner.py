@@ -0,0 +1,52 @@
+# This class runs long jobs (such as StartUp's notification emails) on a background thread
+# so the window stays responsive. Only one run of each named job can be in progress at a time
+# Finished results are collected by the frames, which poll GetFinished() using Tk's after()
+
+# Used to run jobs off the Tk thread and hand results back
+import threading
+import queue
+
+class JobRunner:
+
+    def __init__(self):
+        # Job name -> lock held for as long as that job is running
+        self.__Locks = {}
+        self.__LocksLock = threading.Lock()
+        self.__Finished = queue.Queue()
+
+    def Start(self, Name, Job):
+        # Starts Job() on a new thread. Returns False without starting it if the same job is already running
+        Lock = self.__GetLock(Name)
+        if not Lock.acquire(blocking=False):
+            return False
+        # Daemon thread so closing the window is never held up by a slow SMTP server
+        threading.Thread(target=self.__Run, args=(Name, Job, Lock), name=f"Job-{Name}", daemon=True).start()
+        return True
+
+    def IsRunning(self, Name):
+        return self.__GetLock(Name).locked()
+
+    def GetFinished(self):
+        # Returns a list of (Name, Result) for every job that has finished since the last call
+        Results = []
+        while True:
+            try:
+                Results.append(self.__Finished.get_nowait())
+            except queue.Empty:
+                return Results
+
+    def __GetLock(self, Name):
+        with self.__LocksLock:
+            if Name not in self.__Locks:
+                self.__Locks[Name] = threading.Lock()
+            return self.__Locks[Name]
+
+    def __Run(self, Name, Job, Lock):
+        try:
+            Result = Job()
+        # Jobs return error strings themselves, this only catches anything unexpected
+        except Exception as e:
+            Result = f"System error: {e}"
+        # The result is queued before the lock is released, so a finished job is never missed by a poll
+        self.__Finished.put((Name, Result))
+        Lock.release()
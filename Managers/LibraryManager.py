@@ -5,6 +5,16 @@
 import sqlite3
 # Used for automatic date generation
 from datetime import datetime, timedelta
+# Used to split search terms into words for full text search
+import re
+# Used to turn typed searches (e.g. loan:123, due<20261101) into indexed predicates
+from Managers.SearchQuery import SearchQuery
+# Used to return long lists and search results a page at a time
+from Managers.Paging import Paging, Page
+# Used to bring existing databases up to the current schema version
+from Managers.SchemaManager import SchemaManager
+# Used to check loans against a cached timeline of each book's free copies rather than rebuilding it per check
+from Managers.StockTimeline import StockTimeline, StockTimelines
 class LibraryManager:
 
 
@@ -13,15 +23,25 @@ class LibraryManager:
         self.__Curs = self.__Conn.cursor()
         # Attaches SystemConfig.db so Staff details can be joined in reservation queries
         self.__Conn.execute("ATTACH DATABASE 'Databases/SystemConfig.db' AS sysconfig")
+        # Applies any outstanding schema changes, such as the secondary indexes
+        SchemaManager.MigrateLibraryData(self.__Conn)
+        # The full text indexes are only present if this SQLite build includes FTS5, otherwise searches use LIKE
+        self.__Curs.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN ('BooksFTS', 'AuthorsFTS')")
+        self.__HasFTS = self.__Curs.fetchone()[0] == 2
         self.__AM = AM
+        # The table write counters last read by GetTableVersions, and the state of the databases when they were read
+        self.__TableVersions = {}
+        self.__VersionStamp = None
+        # Free copies per day for recently checked books, kept up to date by the loan and reservation methods
+        self.__StockTimelines = StockTimelines()
 
 
     def __del__(self):
         try:
             self.__Conn.commit()
             self.__Conn.close()
-        # Suppresses errors if __init__ failed before attributes were assigned
-        except AttributeError:
+        # Suppresses errors if __init__ failed before attributes were assigned, or Exit() has already closed the connections
+        except (AttributeError, sqlite3.ProgrammingError):
             pass
 
     # Public wrapper for __del__, used when exiting the program.
@@ -29,8 +49,14 @@ class LibraryManager:
         self.__AM.Exit()
         self.__del__()
 
+    def Interrupt(self):
+        # Stops any query running on this session's connections, called from another thread to cancel a superseded request
+        self.__Conn.interrupt()
+        self.__AM.Interrupt()
+
 # --- Adding / Removing Authors ---
     def AddAuthor(self, Forename, Middlename, Surname):
+        ID = None
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
@@ -66,6 +92,7 @@ class LibraryManager:
             return ID
         # Error handling and logging
         except Exception as e:
+            self.__AM.ReleaseID("Authors", ID)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to add an author and encountered an error: {e}")
             return f"System error: {e}"
 
@@ -93,6 +120,7 @@ class LibraryManager:
             """,(UAID,))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__AM.ReleaseID("Authors", UAID)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} removed author {UAID}")
             return "Author removed successfully"
         # Error handling and logging
@@ -236,6 +264,7 @@ class LibraryManager:
 
 # --- Adding / Removing Locations ---
     def AddLocation(self, ClassCode):
+        ULocID = None
         try:
             # Permission check
             if self.__AM.CheckPermission("Admin") != True:
@@ -254,6 +283,7 @@ class LibraryManager:
             return "Location added successfully"
         # Error handling and logging
         except Exception as e:
+            self.__AM.ReleaseID("Locations", ULocID)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to add a location and encountered an error: {e}")
             return f"System error: {e}"
         
@@ -279,6 +309,7 @@ class LibraryManager:
             """,(ULocID,))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__AM.ReleaseID("Locations", ULocID)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} removed location {ULocID}")
             return "Location removed successfully"
         # Error handling and logging
@@ -288,6 +319,7 @@ class LibraryManager:
 
 # --- Adding / Removing / Moving Copies ---
     def AddCopy(self, ISBN, ULocID):
+        UCID = None
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
@@ -306,28 +338,40 @@ class LibraryManager:
             return "Copy added successfully"
         # Error handling and logging
         except Exception as e:
+            self.__AM.ReleaseID("Copies", UCID)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to add a copy and encountered an error: {e}")
             return f"System error: {e}"
 
     def BulkAddCopies(self, ISBN, ULocID, Quantity):
+        UCIDs = []
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to bulk add copies: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Inserts each copy individually to ensure unique IDs are assigned
-            for n in range(Quantity):
-                UCID = self.__AM.GetNextID(self.__Curs, "Copies", "UCID")
-                self.__Curs.execute("""
-                    INSERT INTO Copies (UCID, ISBN, HomeLocationID, CurrentLocationID)
-                    VALUES (?, ?, ?, ?)
-                """,(UCID, ISBN, ULocID, ULocID))
-                self.__AM.Log(f"{self.__AM.GetCurrentUser()} added copy {UCID} of book {ISBN}")
-            # Commits once after all inserts
+            # Typo checks, done once up front rather than failing part way through the inserts
+            if int(Quantity) < 1:
+                return "Error: Quantity must be at least 1."
+            if not self.__AM.CheckIDExists(self.__Curs, "Books", "ISBN", ISBN):
+                return "Error: Book does not exist."
+            if not self.__AM.CheckIDExists(self.__Curs, "Locations", "ULocID", ULocID):
+                return "Error: Location does not exist."
+            # Reserves a block of IDs in one go, gaps are still filled first
+            UCIDs = self.__AM.ReserveIDs(self.__Curs, "Copies", "UCID", int(Quantity))
+            # Inserts every copy in a single transaction
+            self.__Curs.executemany("""
+                INSERT INTO Copies (UCID, ISBN, HomeLocationID, CurrentLocationID)
+                VALUES (?, ?, ?, ?)
+            """,[(UCID, ISBN, ULocID, ULocID) for UCID in UCIDs])
+            # Commits, Logs one summary entry, Returns confirmation
             self.__Conn.commit()
-            return f"{Quantity} copies added successfully"
+            self.__AM.Log(f"{self.__AM.GetCurrentUser()} added {len(UCIDs)} copies of book {ISBN} to location {ULocID} (copy IDs {UCIDs[0]}-{UCIDs[-1]})")
+            return f"{len(UCIDs)} copies added successfully (copy IDs {UCIDs[0]}-{UCIDs[-1]})"
         # Error handling and logging
         except Exception as e:
+            # Undoes any copies inserted before the error so the batch is all or nothing
+            self.__Conn.rollback()
+            self.__AM.ReleaseIDs("Copies", UCIDs)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to bulk add copies and encountered an error: {e}")
             return f"System error: {e}"
 
@@ -416,6 +460,7 @@ class LibraryManager:
             """,(UCID,))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__AM.ReleaseID("Copies", UCID)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} removed copy {UCID}")
             return "Copy removed successfully"
         # Error handling and logging
@@ -425,6 +470,7 @@ class LibraryManager:
 
 # --- Issuing, returning, and deleting loans ---
     def IssueLoan(self, UCID, UStuID, Override=False):
+        ULoanID = None
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
@@ -454,20 +500,22 @@ class LibraryManager:
             OnLoanLocation = int(self.__Curs.fetchone()[0])
             # Check if copy is available: not on active loan and at its home location
             # CurrentLocationID = HomeLocationID ensures we don't loan a copy that
-            # has already been physically allocated to a reservation by FindReservationStock
+            # has already been physically allocated to a reservation by AllocateReservationStock
             self.__Curs.execute("""
-                SELECT COUNT(*)
+                SELECT ISBN
                 FROM Copies
                 WHERE UCID = ?
-                AND UCID NOT IN (SELECT UCID FROM Loans WHERE ReturnDate IS NULL)
+                AND NOT EXISTS (SELECT 1 FROM Loans WHERE Loans.UCID = Copies.UCID AND Loans.ReturnDate IS NULL)
                 AND CurrentLocationID = HomeLocationID
             """,(UCID,))
             CopyCheck = self.__Curs.fetchone()
-            if not CopyCheck or CopyCheck[0] == 0:
+            if not CopyCheck:
                 return "Copy is not available for loan."
+            ISBN = CopyCheck[0]
             # Stock conflict check against all active loans and upcoming reservations
             if not self.__LoanStockConflictCheck(UCID, LoanDate, DueDate):
                 return "Loan cannot be issued due to stock conflicts with existing reservations or loans."
+            StockStamp = self.__StockStamp()
             # Finds next free ID and issues loan
             ULoanID = self.__AM.GetNextID(self.__Curs, "Loans", "ULoanID")
             self.__Curs.execute("""
@@ -482,13 +530,137 @@ class LibraryManager:
             """,(OnLoanLocation, UCID))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Loan(StockTimeline.DayNumber(DueDate)))
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} issued loan {ULoanID} of copy {UCID} to student {UStuID}")
             return "Loan issued successfully"
         # Error handling and logging
         except Exception as e:
+            self.__AM.ReleaseID("Loans", ULoanID)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to issue a loan and encountered an error: {e}")
             return f"System error: {e}"
 
+    def BulkIssueLoans(self, Pairs, Override=False):
+        ULoanIDs = []
+        try:
+            # Permission check
+            if self.__AM.CheckPermission("Teacher") != True:
+                return "Access Denied: Insufficient Permissions."
+            # Pairs are (UCID, UStuID). Every pair is checked before any loan is issued, so the batch is all or nothing
+            Pairs = [(int(UCID), int(UStuID)) for UCID, UStuID in Pairs]
+            if not Pairs:
+                return "Error: No loans to issue."
+            Problems = []
+            UCIDs = [UCID for UCID, _ in Pairs]
+            if len(set(UCIDs)) != len(UCIDs):
+                Problems.append("The same copy is listed more than once")
+            # Reads every student's account, loan limit and active loan count in one query
+            NewLoans = {}
+            for _, UStuID in Pairs:
+                NewLoans[UStuID] = NewLoans.get(UStuID, 0) + 1
+            self.__Curs.execute(f"""
+                SELECT UStuID, AccountActive, MaxActiveLoans,
+                    (SELECT COUNT(*) FROM Loans WHERE Loans.UStuID = Students.UStuID AND Loans.ReturnDate IS NULL)
+                FROM Students
+                WHERE UStuID IN ({", ".join("?" * len(NewLoans))})
+            """, tuple(NewLoans))
+            Students = {Row[0]: Row[1:] for Row in self.__Curs.fetchall()}
+            OverLimit = []
+            for UStuID, Count in NewLoans.items():
+                if UStuID not in Students:
+                    Problems.append(f"Student ID {UStuID} does not exist")
+                elif Students[UStuID][0] != 1:
+                    Problems.append(f"Student account {UStuID} is inactive")
+                elif Students[UStuID][2] + Count > Students[UStuID][1] and not Override:
+                    OverLimit.append(str(UStuID))
+            if OverLimit:
+                Problems.append(f"Loan limit reached for student(s) {', '.join(OverLimit)}")
+            # Check if copies are available: not on active loan and at their home location, as in IssueLoan
+            self.__Curs.execute(f"""
+                SELECT UCID, ISBN
+                FROM Copies
+                WHERE UCID IN ({", ".join("?" * len(UCIDs))})
+                AND NOT EXISTS (SELECT 1 FROM Loans WHERE Loans.UCID = Copies.UCID AND Loans.ReturnDate IS NULL)
+                AND CurrentLocationID = HomeLocationID
+            """, tuple(UCIDs))
+            CopyISBNs = dict(self.__Curs.fetchall())
+            Unavailable = [str(UCID) for UCID in dict.fromkeys(UCIDs) if UCID not in CopyISBNs]
+            if Unavailable:
+                Problems.append(f"Copies {', '.join(Unavailable)} are not available for loan")
+            # Get dates, every loan in the batch is due on the same day
+            LoanDate = int(datetime.now().strftime("%Y%m%d"))
+            DueDate = int((datetime.now() + timedelta(days = self.__AM.GetLoanPeriod())).strftime("%Y%m%d"))
+            # Stock conflict check once per book: N loans of a book need N free copies now,
+            # and N to spare after reservations on every day of the loan window
+            CopiesPerISBN = {}
+            for UCID in UCIDs:
+                if UCID in CopyISBNs:
+                    CopiesPerISBN[CopyISBNs[UCID]] = CopiesPerISBN.get(CopyISBNs[UCID], 0) + 1
+            for ISBN, Count in CopiesPerISBN.items():
+                Timeline = self.__GetStockTimeline(ISBN, DueDate)
+                if Timeline.Free < Count or Timeline.LowestBetween(StockTimeline.DayNumber(LoanDate), StockTimeline.DayNumber(DueDate)) < Count:
+                    Problems.append(f"{Count} loan(s) of book {ISBN} would conflict with existing reservations or loans")
+            if Problems:
+                self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to issue {len(Pairs)} loans: {'; '.join(Problems)}")
+                return "Error: No loans issued. " + "; ".join(Problems) + "."
+            # Reads OnLoanLocation from settings so changes during a session are reflected immediately
+            self.__Curs.execute("SELECT SettingValue FROM sysconfig.Settings WHERE SettingName = 'OnLoanLocation'")
+            OnLoanLocation = int(self.__Curs.fetchone()[0])
+            StockStamp = self.__StockStamp()
+            # Reserves a block of IDs and issues every loan in a single transaction
+            ULoanIDs = self.__AM.ReserveIDs(self.__Curs, "Loans", "ULoanID", len(Pairs))
+            self.__Curs.executemany("""
+                INSERT INTO Loans (ULoanID, UStuID, UStaID, UCID, LoanDate, DueDate, ReturnDate)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(ULoanID, UStuID, self.__AM.GetCurrentUser(), UCID, LoanDate, DueDate, None) for ULoanID, (UCID, UStuID) in zip(ULoanIDs, Pairs)])
+            # Sets CurrentLocationID of every copy to the OnLoan location
+            self.__Curs.executemany("""
+                UPDATE Copies
+                SET CurrentLocationID = ?
+                WHERE UCID = ?
+            """, [(OnLoanLocation, UCID) for UCID in UCIDs])
+            # Commits, Logs one summary entry, Returns confirmation
+            self.__Conn.commit()
+            DueDay = StockTimeline.DayNumber(DueDate)
+            self.__UpdateStocks(StockStamp, {ISBN: lambda Timeline, Count=Count: Timeline.Loan(DueDay, Count) for ISBN, Count in CopiesPerISBN.items()})
+            self.__AM.Log(f"{self.__AM.GetCurrentUser()} issued {len(Pairs)} loans (loan IDs {ULoanIDs[0]}-{ULoanIDs[-1]}) of copies {', '.join(str(UCID) for UCID in UCIDs)}")
+            return f"{len(Pairs)} loans issued successfully, due {DueDate}"
+        # Error handling and logging
+        except Exception as e:
+            # Undoes any loans inserted before the error so the batch is all or nothing
+            self.__Conn.rollback()
+            self.__AM.ReleaseIDs("Loans", ULoanIDs)
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to issue loans in bulk and encountered an error: {e}")
+            return f"System error: {e}"
+
+    def IssueClassSet(self, ISBN, UStuIDList, Override=False):
+        try:
+            # Permission check
+            if self.__AM.CheckPermission("Teacher") != True:
+                return "Access Denied: Insufficient Permissions."
+            UStuIDList = list(UStuIDList)
+            if not UStuIDList:
+                return "Error: No students to issue to."
+            # Picks one available copy of the book per student, taking whole rooms at a time,
+            # the room with the most available copies first, so the set is collected from as few rooms as possible
+            self.__Curs.execute("""
+                SELECT UCID
+                FROM Copies
+                WHERE ISBN = ?
+                AND NOT EXISTS (SELECT 1 FROM Loans WHERE Loans.UCID = Copies.UCID AND Loans.ReturnDate IS NULL)
+                AND CurrentLocationID = HomeLocationID
+                ORDER BY COUNT(*) OVER (PARTITION BY CurrentLocationID) DESC, CurrentLocationID, UCID
+                LIMIT ?
+            """, (ISBN, len(UStuIDList)))
+            UCIDs = [Row[0] for Row in self.__Curs.fetchall()]
+            if len(UCIDs) < len(UStuIDList):
+                return f"Error: Only {len(UCIDs)} copies of this book are available for loan."
+            # Issues the loans as one batch, which checks the students and stock
+            return self.BulkIssueLoans(list(zip(UCIDs, UStuIDList)), Override)
+        # Error handling and logging
+        except Exception as e:
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to issue a class set of book {ISBN} and encountered an error: {e}")
+            return f"System error: {e}"
+
     def ReturnLoan(self, ULoanID):
         try:
             # Permission check
@@ -496,16 +668,18 @@ class LibraryManager:
                 return "Access Denied: Insufficient Permissions."
             # Check if loan exists and is active
             self.__Curs.execute("""
-                SELECT UCID, ReturnDate
+                SELECT Loans.UCID, ReturnDate, DueDate, ISBN
                 FROM Loans
+                LEFT JOIN Copies ON Loans.UCID = Copies.UCID
                 WHERE ULoanID = ?
             """,(ULoanID,))
             Loan = self.__Curs.fetchone()
             if not Loan:
                 return "Loan not found."
-            UCID, ReturnDate = Loan
+            UCID, ReturnDate, DueDate, ISBN = Loan
             if ReturnDate is not None:
                 return "Loan has already been returned."
+            StockStamp = self.__StockStamp()
             # Update loan return date
             ReturnDateValue = int(datetime.now().strftime("%Y%m%d"))
             self.__Curs.execute("""
@@ -531,6 +705,7 @@ class LibraryManager:
             LoanInfo = self.__Curs.fetchone()
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Return(StockTimeline.DayNumber(DueDate)))
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} processed return of loan {ULoanID} for copy {UCID}")
             if LoanInfo:
                 return f"Loan returned successfully: '{LoanInfo[0]}' from {LoanInfo[1]} {LoanInfo[2]}."
@@ -548,15 +723,16 @@ class LibraryManager:
                 return "Access Denied: Insufficient Permissions."
             # Check if loan exists and is active
             self.__Curs.execute("""
-                SELECT UCID, DueDate, ReturnDate, Loans.UStuID
+                SELECT Loans.UCID, DueDate, ReturnDate, Loans.UStuID, Copies.ISBN
                 FROM Loans
                 JOIN Students ON Loans.UStuID = Students.UStuID
+                LEFT JOIN Copies ON Loans.UCID = Copies.UCID
                 WHERE ULoanID = ?
             """, (ULoanID,))
             Loan = self.__Curs.fetchone()
             if not Loan:
                 return "Loan not found."
-            UCID, CurrentDueDate, ReturnDate, UStuID = Loan
+            UCID, CurrentDueDate, ReturnDate, UStuID, ISBN = Loan
             if ReturnDate is not None:
                 return "Loan has already been returned."
             if NewDueDate <= CurrentDueDate:
@@ -565,6 +741,7 @@ class LibraryManager:
             LoanDate = int(datetime.now().strftime("%Y%m%d"))
             if not self.__LoanStockConflictCheck(UCID, LoanDate, NewDueDate):
                 return "Loan cannot be extended due to stock conflicts with existing reservations."
+            StockStamp = self.__StockStamp()
             # Update due date
             self.__Curs.execute("""
                 UPDATE Loans
@@ -573,6 +750,7 @@ class LibraryManager:
             """, (NewDueDate, ULoanID))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Extend(StockTimeline.DayNumber(CurrentDueDate), StockTimeline.DayNumber(NewDueDate)))
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} extended loan {ULoanID} to {NewDueDate}")
             return f"Loan extended to {NewDueDate}."
         # Error handling and logging
@@ -613,6 +791,7 @@ class LibraryManager:
             LoansDeleted = self.__Curs.rowcount
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__AM.ForgetIDs("Loans")
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} cleared {LoansDeleted} old loans with return date before {CutOffDate}")
             return f"Cleared {LoansDeleted} old loans."
         # Error handling and logging
@@ -654,6 +833,7 @@ class LibraryManager:
             ReservationsDeleted = self.__Curs.rowcount
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__AM.ForgetIDs("Reservations")
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} cleared {ReservationsDeleted} old reservations with date before {CutOffDate}")
             return f"Cleared {ReservationsDeleted} old reservations."
         # Error handling and logging
@@ -662,24 +842,37 @@ class LibraryManager:
             return f"System error: {e}"
  
     def IssueReservation(self, ULocID, ReservationDate, ISBN, UStaID, Quantity):
+        URID = None
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
+            if int(Quantity) < 1:
+                return "Error: Quantity must be at least 1"
+            # Rejects the reservation if the book does not have enough copies free on the day
+            Available = self.__CopiesFreeOn(ISBN, ReservationDate)
+            if isinstance(Available, str):
+                return Available
+            if int(Quantity) > Available:
+                self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to reserve {Quantity} copies of book {ISBN} for {ReservationDate}: only {max(Available, 0)} available")
+                return f"Error: Only {max(Available, 0)} copies of this book are available on {ReservationDate}"
             # CreationDate is today, used for first-reserved first-served ordering
             CreationDate = int(datetime.now().strftime("%Y%m%d"))
             # Finds next free ID and inserts reservation
             URID = self.__AM.GetNextID(self.__Curs, "Reservations", "URID")
+            StockStamp = self.__StockStamp()
             self.__Curs.execute("""
                 INSERT INTO Reservations (URID, ULocID, CreationDate, ReservationDate, ISBN, UStaID, Quantity)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """,(URID, ULocID, CreationDate, ReservationDate, ISBN, UStaID, Quantity))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Reserve(StockTimeline.DayNumber(ReservationDate), int(Quantity)))
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} issued reservation {URID} for book {ISBN}")
             return "Reservation issued successfully"
         # Error handling and logging
         except Exception as e:
+            self.__AM.ReleaseID("Reservations", URID)
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to issue a reservation and encountered an error: {e}")
             return f"System error: {e}"
             
@@ -713,21 +906,35 @@ class LibraryManager:
         try:
             # Retrieve the reservation to check ownership
             self.__Curs.execute("""
-                SELECT UStaID
+                SELECT UStaID, ISBN, ReservationDate, Quantity
                 FROM Reservations
                 WHERE URID = ?
             """, (URID,))
             Result = self.__Curs.fetchone()
             if not Result:
                 return "Error: Reservation does not exist"
-            Owner = Result[0]
+            Owner, ISBN, OldDate, OldQuantity = Result
             # Permission check: Teachers can only update their own reservations; Admins can update any
             IsOwner = self.__AM.GetCurrentUser() == Owner
             IsAdmin = self.__AM.CheckPermission("Admin") == True
             if not IsOwner and not IsAdmin:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to update reservation {URID}: Insufficient permissions")
                 return "Access Denied: You can only update your own reservations."
+            if int(Quantity) < 1:
+                return "Error: Quantity must be at least 1"
+            # Moving the reservation or asking for more copies needs the copies to be free on the (new) day
+            # On the same day, the copies this reservation already holds are free for it too
+            if int(ReservationDate) != OldDate or int(Quantity) > OldQuantity:
+                Available = self.__CopiesFreeOn(ISBN, ReservationDate)
+                if isinstance(Available, str):
+                    return Available
+                if int(ReservationDate) == OldDate:
+                    Available += OldQuantity
+                if int(Quantity) > Available:
+                    self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to update reservation {URID} to {Quantity} copies for {ReservationDate}: only {max(Available, 0)} available")
+                    return f"Error: Only {max(Available, 0)} copies of this book are available on {ReservationDate}"
             # Updates reservation details
+            StockStamp = self.__StockStamp()
             self.__Curs.execute("""
                 UPDATE Reservations
                 SET ULocID = ?, ReservationDate = ?, Quantity = ?
@@ -735,6 +942,10 @@ class LibraryManager:
             """, (ULocID, ReservationDate, Quantity, URID))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            def MoveReservation(Timeline):
+                Timeline.Reserve(StockTimeline.DayNumber(OldDate), -OldQuantity)
+                Timeline.Reserve(StockTimeline.DayNumber(ReservationDate), int(Quantity))
+            self.__UpdateStock(ISBN, StockStamp, MoveReservation)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} updated reservation {URID}")
             return "Reservation updated successfully"
         # Error handling and logging
@@ -746,14 +957,14 @@ class LibraryManager:
         try:
             # Retrieve the reservation to check ownership
             self.__Curs.execute("""
-                SELECT UStaID
+                SELECT UStaID, ISBN, ReservationDate, Quantity
                 FROM Reservations
                 WHERE URID = ?
             """, (URID,))
             Result = self.__Curs.fetchone()
             if not Result:
                 return "Error: Reservation does not exist"
-            Owner = Result[0]
+            Owner, ISBN, OldDate, OldQuantity = Result
             # Permission check: Teachers can only delete their own reservations; Admins can delete any
             IsOwner = self.__AM.GetCurrentUser() == Owner
             IsAdmin = self.__AM.CheckPermission("Admin") == True
@@ -761,12 +972,15 @@ class LibraryManager:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to delete reservation {URID}: Insufficient permissions")
                 return "Access Denied: You can only delete your own reservations."
             # Deletes the reservation
+            StockStamp = self.__StockStamp()
             self.__Curs.execute("""
                 DELETE FROM Reservations
                 WHERE URID = ?
             """, (URID,))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Reserve(StockTimeline.DayNumber(OldDate), -OldQuantity))
+            self.__AM.ReleaseID("Reservations", URID)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} deleted reservation {URID}")
             return "Reservation deleted successfully"
         # Error handling and logging
@@ -782,14 +996,16 @@ class LibraryManager:
                 return "Access Denied: Insufficient Permissions."
             # Retrieves loan to check if it is still active
             self.__Curs.execute("""
-                SELECT UCID, ReturnDate
+                SELECT Loans.UCID, ReturnDate, DueDate, ISBN
                 FROM Loans
+                LEFT JOIN Copies ON Loans.UCID = Copies.UCID
                 WHERE ULoanID = ?
             """, (ULoanID,))
             Result = self.__Curs.fetchone()
             if not Result:
                 return "Error: Loan does not exist"
-            UCID, ReturnDate = Result
+            UCID, ReturnDate, DueDate, ISBN = Result
+            StockStamp = self.__StockStamp()
             # If the loan is still active, reset the copy location before deleting
             if ReturnDate is None:
                 self.__Curs.execute("""
@@ -804,6 +1020,12 @@ class LibraryManager:
             """, (ULoanID,))
             # Commits, Logs, Returns confirmation
             self.__Conn.commit()
+            # Deleting an active loan frees its copy, as a return does
+            if ReturnDate is None:
+                self.__UpdateStock(ISBN, StockStamp, lambda Timeline: Timeline.Return(StockTimeline.DayNumber(DueDate)))
+            else:
+                self.__UpdateStock(ISBN, StockStamp)
+            self.__AM.ReleaseID("Loans", ULoanID)
             self.__AM.Log(f"{self.__AM.GetCurrentUser()} deleted loan {ULoanID}")
             return "Loan deleted successfully"
         # Error handling and logging
@@ -813,75 +1035,97 @@ class LibraryManager:
 
 
 # --- Search Methods ---
-    def SearchBooks(self, SearchTerm):
+    def SearchBooks(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to search books: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Wraps search term in wildcards for partial matching
-            Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
-                SELECT Books.ISBN, Books.Title, Authors.Forename, Authors.Middlenames, Authors.Surname, Books.Genre, Books.Subject
-                FROM Books
-                JOIN BooksAuthors ON Books.ISBN = BooksAuthors.ISBN
-                JOIN Authors ON BooksAuthors.UAID = Authors.UAID
-                WHERE Books.Title LIKE ? OR Authors.Surname LIKE ? OR Books.ISBN LIKE ? OR Books.Genre LIKE ? OR Books.Subject LIKE ?
-            """, (Term, Term, Term, Term, Term))
-            Results = self.__Curs.fetchall()
+            Query = self.__BuildFTSQuery(SearchTerm)
+            Results = None
+            # FTS only matches the start of a word, so a term of digits (e.g. part of an ISBN) goes straight to the LIKE search
+            IsDigits = str(SearchTerm).strip().isdigit()
+            if self.__HasFTS and Query and not IsDigits and self.__ContinuesFTS(Cursor):
+                # Full text search, best matches first. bm25 weights: ISBN, Title, Genre, Subject, Authors
+                try:
+                    Results = self.__FetchBooks(
+                        "SELECT rowid AS ISBN, bm25(BooksFTS, 1.0, 10.0, 2.0, 2.0, 5.0) AS Rank FROM BooksFTS WHERE BooksFTS MATCH ?",
+                        [Query], ["Rank", "ISBN"], PageSize, Cursor
+                    )
+                # A query FTS5 cannot parse falls back to the LIKE search below
+                except sqlite3.OperationalError:
+                    Results = None
+            # FTS finds nothing for text in the middle of a word, which the LIKE search below still matches
+            if Results is None or (Cursor is None and not self.__HasRows(Results)):
+                # Wraps search term in wildcards for partial matching
+                Term = f"%{str(SearchTerm).strip() if IsDigits else SearchTerm}%"
+                Results = self.__FetchBooks("""
+                    SELECT DISTINCT Books.ISBN
+                    FROM Books
+                    JOIN BooksAuthors ON Books.ISBN = BooksAuthors.ISBN
+                    JOIN Authors ON BooksAuthors.UAID = Authors.UAID
+                    WHERE Books.Title LIKE ? OR Authors.Surname LIKE ? OR CAST(Books.ISBN AS TEXT) LIKE ? OR Books.Genre LIKE ? OR Books.Subject LIKE ?
+                """, [Term, Term, Term, Term, Term], ["ISBN"], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find any books matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find any books matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
         
-    def SearchReservations(self, SearchTerm):
+    def SearchReservations(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to search reservations: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Wraps search term in wildcards for partial matching
-            Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
+            # Supports typed filters, e.g. reservation:12, staff:3, isbn:9780..., title:macbeth, date>=20261101
+            Results = self.__TypedSearch(SearchTerm, """
                 SELECT Reservations.URID, Books.Title, Reservations.ReservationDate, Reservations.Quantity, Reservations.UStaID, Staff.Forename, Staff.Surname, Locations.ClassCode
                 FROM Reservations
                 JOIN Books ON Reservations.ISBN = Books.ISBN
                 JOIN sysconfig.Staff AS Staff ON Reservations.UStaID = Staff.UStaID
                 JOIN Locations ON Reservations.ULocID = Locations.ULocID
-                WHERE Books.Title LIKE ? OR CAST(Books.ISBN AS TEXT) LIKE ? OR CAST(Reservations.URID AS TEXT) LIKE ? OR Staff.Forename LIKE ? OR Staff.Surname LIKE ? OR CAST(Reservations.UStaID AS TEXT) LIKE ?
-            """, (Term, Term, Term, Term, Term, Term))
-            Results = self.__Curs.fetchall()
+            """, "Reservations.URID", {
+                "reservation": ("Reservations.URID", "id"),
+                "staff": ("Reservations.UStaID", "id"),
+                "isbn": ("Reservations.ISBN", "id"),
+                "title": ("Books.Title", "text"),
+                "date": ("Reservations.ReservationDate", "date"),
+                "location": ("Locations.ClassCode", "text"),
+            }, ["Books.Title", "CAST(Books.ISBN AS TEXT)", "CAST(Reservations.URID AS TEXT)", "Staff.Forename", "Staff.Surname", "CAST(Reservations.UStaID AS TEXT)"], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find any reservations matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find any reservations matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
         
-    def SearchCopies(self, SearchTerm):
+    def SearchCopies(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to search copies: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Wraps search term in wildcards for partial matching
-            Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
+            # Supports typed filters, e.g. copy:12, isbn:9780..., title:macbeth, at:ENG01, home:LIB01
+            Results = self.__TypedSearch(SearchTerm, """
                 SELECT Copies.UCID, Books.Title, Books.ISBN, CurrentLoc.ClassCode, HomeLoc.ClassCode
                 FROM Copies
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Locations AS CurrentLoc ON Copies.CurrentLocationID = CurrentLoc.ULocID
                 JOIN Locations AS HomeLoc ON Copies.HomeLocationID = HomeLoc.ULocID
-                WHERE CAST(Copies.UCID AS TEXT) LIKE ? OR Books.Title LIKE ? OR Books.ISBN LIKE ? OR CurrentLoc.ClassCode LIKE ? OR HomeLoc.ClassCode LIKE ?
-            """, (Term, Term, Term, Term, Term))
-            Results = self.__Curs.fetchall()
+            """, "Copies.UCID", {
+                "copy": ("Copies.UCID", "id"),
+                "isbn": ("Copies.ISBN", "id"),
+                "title": ("Books.Title", "text"),
+                "at": ("CurrentLoc.ClassCode", "text"),
+                "home": ("HomeLoc.ClassCode", "text"),
+            }, ["CAST(Copies.UCID AS TEXT)", "Books.Title", "Books.ISBN", "CurrentLoc.ClassCode", "HomeLoc.ClassCode"], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find any book copies matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find any book copies matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
-            return f"Search Error: {e}" 
+            return f"Search Error: {e}"
 
-    def SearchLocations(self, SearchTerm):
+    def SearchLocations(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
@@ -889,69 +1133,95 @@ class LibraryManager:
                 return "Access Denied: Insufficient Permissions."
             # Wraps search term in wildcards for partial matching
             Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
+            Results = Paging.Fetch(self.__Curs, """
                 SELECT ULocID, ClassCode
                 FROM Locations
-                WHERE ClassCode LIKE ?
-            """, (Term,))
-            Results = self.__Curs.fetchall()
+            """, "ClassCode LIKE ?", [Term], ["ULocID"], [0], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find a location matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find a location matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
         
-    def SearchAuthors(self, SearchTerm):
+    def SearchAuthors(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to search authors: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Wraps search term in wildcards for partial matching
-            Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
-                SELECT UAID, Forename, Middlenames, Surname
-                FROM Authors
-                WHERE Forename LIKE ? OR Middlenames LIKE ? OR Surname LIKE ?
-            """, (Term, Term, Term))
-            Results = self.__Curs.fetchall()
+            Query = self.__BuildFTSQuery(SearchTerm)
+            Results = None
+            if self.__HasFTS and Query and self.__ContinuesFTS(Cursor):
+                # Full text search, best matches first. bm25 weights: Forename, Middlenames, Surname
+                # The rank is selected in a subquery so it can be part of the page key
+                try:
+                    Results = Paging.Fetch(self.__Curs, """
+                        SELECT * FROM (
+                            SELECT Authors.UAID, Authors.Forename, Authors.Middlenames, Authors.Surname, bm25(AuthorsFTS, 2.0, 1.0, 5.0) AS Rank
+                            FROM AuthorsFTS
+                            JOIN Authors ON Authors.UAID = AuthorsFTS.rowid
+                            WHERE AuthorsFTS MATCH ?
+                        )
+                    """, "1", [Query], ["Rank", "UAID"], [4, 0], PageSize, Cursor)
+                    # Removes the rank, so rows match the LIKE search below
+                    if isinstance(Results, Page):
+                        Results.Rows = [Row[:4] for Row in Results.Rows]
+                    else:
+                        Results = [Row[:4] for Row in Results]
+                # A query FTS5 cannot parse falls back to the LIKE search below
+                except sqlite3.OperationalError:
+                    Results = None
+            # FTS finds nothing for text in the middle of a name, which the LIKE search below still matches
+            if Results is None or (Cursor is None and not self.__HasRows(Results)):
+                # Wraps search term in wildcards for partial matching
+                Term = f"%{SearchTerm}%"
+                Results = Paging.Fetch(self.__Curs, """
+                    SELECT UAID, Forename, Middlenames, Surname
+                    FROM Authors
+                """, "Forename LIKE ? OR Middlenames LIKE ? OR Surname LIKE ?", [Term, Term, Term], ["UAID"], [0], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find an author matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find an author matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
         
-    def SearchLoans(self, SearchTerm):
+    def SearchLoans(self, SearchTerm, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to search loans: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
-            # Wraps search term in wildcards for partial matching
-            Term = f"%{SearchTerm}%"
-            self.__Curs.execute("""
+            # Supports typed filters, e.g. loan:123, student:45, copy:7, isbn:9780..., title:macbeth, due<20261101
+            Results = self.__TypedSearch(SearchTerm, """
                 SELECT Loans.ULoanID, Books.Title, Loans.LoanDate, Loans.DueDate, Loans.ReturnDate, Loans.UStuID, Loans.UStaID, Copies.UCID, Students.Forename, Students.Surname
                 FROM Loans
                 JOIN Copies ON Loans.UCID = Copies.UCID
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Students ON Loans.UStuID = Students.UStuID
-                WHERE CAST(Loans.ULoanID AS TEXT) LIKE ? OR Books.Title LIKE ? OR Students.Forename LIKE ? OR Students.Surname LIKE ? OR CAST(Loans.UStuID AS TEXT) LIKE ? OR CAST(Loans.UStaID AS TEXT) LIKE ? OR CAST(Copies.UCID AS TEXT) LIKE ?
-            """, (Term, Term, Term, Term, Term, Term, Term))
-            Results = self.__Curs.fetchall()
+            """, "Loans.ULoanID", {
+                "loan": ("Loans.ULoanID", "id"),
+                "student": ("Loans.UStuID", "id"),
+                "staff": ("Loans.UStaID", "id"),
+                "copy": ("Loans.UCID", "id"),
+                "isbn": ("Copies.ISBN", "id"),
+                "title": ("Books.Title", "text"),
+                "due": ("Loans.DueDate", "date"),
+                "loaned": ("Loans.LoanDate", "date"),
+            }, ["CAST(Loans.ULoanID AS TEXT)", "Books.Title", "Students.Forename", "Students.Surname", "CAST(Loans.UStuID AS TEXT)", "CAST(Loans.UStaID AS TEXT)", "CAST(Copies.UCID AS TEXT)"], PageSize, Cursor)
             # Returns results or a not found message
-            return Results if Results else f"Could not find a loan matching '{SearchTerm}'."
+            return Results if self.__HasRows(Results) else f"Could not find a loan matching '{SearchTerm}'."
         # Error handling and logging
         except Exception as e:
             return f"Search Error: {e}"
 
 # --- Notification Methods ---
-    def GetOverdueLoans(self):
+    def GetOverdueLoans(self, RunDate=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
-            # Generates today's date for comparison
-            Today = int(datetime.now().strftime("%Y%m%d"))
+            # Generates today's date for comparison, RunDate is given by the daily job
+            Today = int(datetime.now().strftime("%Y%m%d")) if RunDate is None else int(RunDate)
             # Retrieves all active loans past their due date, including student contact details
             self.__Curs.execute("""
                 SELECT Loans.ULoanID, Books.Title, Loans.DueDate, Loans.UStuID, Students.Forename, Students.Surname, Students.Email
@@ -969,22 +1239,26 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve overdue loans and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetLoansDueTomorrow(self):
+    def GetLoansDueTomorrow(self, RunDate=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
-            # timedelta handles all date edge cases including year boundaries and leap years
-            Tomorrow = int((datetime.now() + timedelta(days=1)).strftime("%Y%m%d"))
-            # Retrieves all active loans due tomorrow, including student contact details
+            # Generates today's date, RunDate is given when the daily job is catching up a missed day
+            Today = int(datetime.now().strftime("%Y%m%d"))
+            RunDate = Today if RunDate is None else int(RunDate)
+            # Loans due after RunDate up to and including the next school day, so Friday's reminders cover the weekend
+            NextSchoolDay = self.__NextSchoolDay(RunDate)
+            # Retrieves all active loans due in that window, including student contact details
+            # Loans whose due date has already passed are left to the overdue notices
             self.__Curs.execute("""
                 SELECT Loans.ULoanID, Books.Title, Loans.DueDate, Loans.UStuID, Students.Forename, Students.Surname, Students.Email
                 FROM Loans
                 JOIN Copies ON Loans.UCID = Copies.UCID
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Students ON Loans.UStuID = Students.UStuID
-                WHERE Loans.ReturnDate IS NULL AND Loans.DueDate = ?
-            """, (Tomorrow,))
+                WHERE Loans.ReturnDate IS NULL AND Loans.DueDate > ? AND Loans.DueDate <= ? AND Loans.DueDate >= ?
+            """, (RunDate, NextSchoolDay, Today))
             Results = self.__Curs.fetchall()
             # Returns results or a not found message
             return Results if Results else "No loans due tomorrow."
@@ -993,130 +1267,323 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve loans due tomorrow and encountered an error: {e}")
             return f"System error: {e}"
 
-    def SendOverdueNotifications(self):
+    def SendOverdueNotifications(self, RunDate=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
             # Retrieves all overdue loans
-            OverdueLoans = self.GetOverdueLoans()
+            OverdueLoans = self.GetOverdueLoans(RunDate)
             if isinstance(OverdueLoans, str):
                 # Either no results or an error
                 return OverdueLoans
-            Sent = 0
-            # Sends an email to each student with an overdue book
-            for Loan in OverdueLoans:
-                ULoanID, Title, DueDate, UStuID, Forename, Surname, Email = Loan
-                if not Email:
-                    self.__AM.Log(f"Overdue notification skipped for student {UStuID}: no email address on record")
-                    continue
-                # Builds and sends email
-                Subject = "Overdue Library Book"
-                Body = f"Dear {Forename} {Surname},\n\nThe following book is overdue:\n"
-                Body += f"  Title: {Title}\n  Loan ID: {ULoanID}\n  Due date: {DueDate}\n\n"
-                Body += "Please return it to the library as soon as possible."
-                Result = self.__AM.SendEmail(Email, Subject, Body)
-                if Result == True:
-                    Sent += 1
-                else:
-                    self.__AM.Log(f"Failed to send overdue notification to student {UStuID}")
+            # Builds one digest email per student, listing every overdue book they have
+            Messages, DedupKeys = self.__BuildLoanDigests(
+                OverdueLoans, "overdue", RunDate,
+                "Overdue Library Book", "The following book is overdue:", "Please return it to the library as soon as possible."
+            )
+            # Queues the emails for OutboxSender, the dedup keys stop the same loans being emailed twice on one day
+            Queued = self.__AM.QueueEmails(Messages, DedupKeys)
+            if isinstance(Queued, str):
+                return Queued
             # Logs and returns confirmation
-            self.__AM.Log(f"{self.__AM.GetCurrentUser()} sent {Sent} overdue notifications")
-            return f"Sent {Sent} overdue notifications."
+            self.__AM.Log(f"{self.__AM.GetCurrentUser()} queued {Queued} overdue notifications covering {len(OverdueLoans)} loans")
+            return f"Queued {Queued} overdue notifications covering {len(OverdueLoans)} loans."
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error sending overdue notifications: {e}")
             return f"System error: {e}"
 
-    def SendDueTomorrowNotifications(self):
+    def SendDueTomorrowNotifications(self, RunDate=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
-            # Retrieves all loans due tomorrow
-            DueTomorrow = self.GetLoansDueTomorrow()
+            # Retrieves all loans due tomorrow (or due after RunDate, when catching up a missed day)
+            DueTomorrow = self.GetLoansDueTomorrow(RunDate)
             if isinstance(DueTomorrow, str):
                 # Either no results or an error
                 return DueTomorrow
-            Sent = 0
-            # Sends a reminder email to each student with a book due tomorrow
-            for Loan in DueTomorrow:
-                ULoanID, Title, DueDate, UStuID, Forename, Surname, Email = Loan
-                if not Email:
-                    self.__AM.Log(f"Due tomorrow notification skipped for student {UStuID}: no email address on record")
-                    continue
-                # Builds and sends email
-                Subject = "Library Book Due Tomorrow"
-                Body = f"Dear {Forename} {Surname},\n\nThe following book is due back tomorrow:\n"
-                Body += f"  Title: {Title}\n  Loan ID: {ULoanID}\n  Due date: {DueDate}\n\n"
-                Body += "Please remember to return it to the library."
-                Result = self.__AM.SendEmail(Email, Subject, Body)
-                if Result == True:
-                    Sent += 1
-                else:
-                    self.__AM.Log(f"Failed to send due tomorrow notification to student {UStuID}")
+            # Builds one reminder email per student, listing every book they have due
+            Messages, DedupKeys = self.__BuildLoanDigests(
+                DueTomorrow, "due tomorrow", RunDate,
+                "Library Book Due Soon", "The following book is due back soon:", "Please remember to return it to the library."
+            )
+            # Queues the emails for OutboxSender, the dedup keys stop the same loans being emailed twice on one day
+            Queued = self.__AM.QueueEmails(Messages, DedupKeys)
+            if isinstance(Queued, str):
+                return Queued
             # Logs and returns confirmation
-            self.__AM.Log(f"{self.__AM.GetCurrentUser()} sent {Sent} due tomorrow notifications")
-            return f"Sent {Sent} due tomorrow notifications."
+            self.__AM.Log(f"{self.__AM.GetCurrentUser()} queued {Queued} due tomorrow notifications covering {len(DueTomorrow)} loans")
+            return f"Queued {Queued} due tomorrow notifications covering {len(DueTomorrow)} loans."
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error sending due tomorrow notifications: {e}")
             return f"System error: {e}"
 
 # --- StartUp ---
+    # Daily jobs, run at most once per school day however many times StartUp is called
+    # Each entry is (JobName, Method, CatchUp)
+    # - CatchUp jobs are run for every school day that was missed, oldest first
+    # - Other jobs only make sense for today, so missed days are recorded as skipped
+    DailyJobs = [
+        ("DueTomorrowReminders", "SendDueTomorrowNotifications", True),
+        ("OverdueNotices", "SendOverdueNotifications", False),
+        ("ReservationPickLists", "SendReservationPickLists", False),
+    ]
+    # How many days back a missed job is looked for, so a long holiday does not replay weeks of jobs
+    CatchUpDays = 14
+
     def StartUp(self):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 return "Access Denied: Insufficient Permissions."
-            # Emails students whose loans are due back tomorrow
-            DueTomorrowResult = self.SendDueTomorrowNotifications()
-            self.__AM.Log(f"StartUp: SendDueTomorrowNotifications - {DueTomorrowResult}")
-            # Emails students whose loans are already overdue
-            OverdueResult = self.SendOverdueNotifications()
-            self.__AM.Log(f"StartUp: SendOverdueNotifications - {OverdueResult}")
-            # Finds all reservations for today and emails the respective teacher for each
             Today = int(datetime.now().strftime("%Y%m%d"))
+            # Jobs only run on school days, a missed Friday is caught up on Monday
+            if not self.__IsSchoolDay(Today):
+                return "StartUp complete. No daily jobs run on non-school days."
+            Summary = []
+            for JobName, MethodName, CatchUp in self.DailyJobs:
+                Method = getattr(self, MethodName)
+                # Every school day since the job last ran, up to and including today, plus earlier days whose run failed
+                RunDates = self.__GetMissedSchoolDays(self.__AM.GetLastJobRunDate(JobName), Today, self.__AM.GetUnfinishedJobDates(JobName))
+                for RunDate in RunDates:
+                    if RunDate != Today and not CatchUp:
+                        # Only claims the day so it is recorded, another session may already be running it
+                        if self.__AM.ClaimJob(JobName, RunDate):
+                            self.__AM.FinishJob(JobName, RunDate, "Skipped", "Missed day, only today's run is sent")
+                        continue
+                    Summary.append(f"{JobName} {RunDate}: {self.__RunDailyJob(JobName, Method, RunDate)}")
+            self.__AM.Log(f"StartUp: {len(Summary)} daily job(s) checked")
+            return "StartUp complete. " + " ".join(Summary)
+        # Error handling and logging
+        except Exception as e:
+            self.__AM.Log(f"StartUp encountered an error: {e}")
+            return f"System error: {e}"
+
+    def SendReservationPickLists(self, RunDate=None):
+        try:
+            # Permission check
+            if self.__AM.CheckPermission("Teacher") != True:
+                return "Access Denied: Insufficient Permissions."
+            # Finds all reservations for the day and emails the respective teacher for each
+            RunDate = int(datetime.now().strftime("%Y%m%d")) if RunDate is None else int(RunDate)
             self.__Curs.execute("""
                 SELECT Reservations.URID, Books.Title, Reservations.Quantity, Reservations.UStaID, Staff.Email, Staff.Forename, Staff.Surname
                 FROM Reservations
                 JOIN Books ON Reservations.ISBN = Books.ISBN
                 JOIN sysconfig.Staff AS Staff ON Reservations.UStaID = Staff.UStaID
                 WHERE Reservations.ReservationDate = ?
-            """, (Today,))
+            """, (RunDate,))
             TodaysReservations = self.__Curs.fetchall()
-            ReservationsSent = 0
-            for Reservation in TodaysReservations:
-                URID, Title, Quantity, UStaID, Email, Forename, Surname = Reservation
+            # Finds which copies to collect and from where for all of today's reservations, also updates their CurrentLocationID
+            Allocations = self.__AllocateReservationStock(RunDate)
+            if isinstance(Allocations, str):
+                return Allocations
+            Messages = []
+            DedupKeys = []
+            # Builds one email per teacher, listing the pick list for each of their reservations today
+            for UStaID, Reservations in self.__GroupByRecipient(TodaysReservations, 3):
+                Email, Forename, Surname = Reservations[0][4:7]
                 if not Email:
-                    self.__AM.Log(f"StartUp: Reservation {URID} notification skipped for staff {UStaID}: no email address on record")
+                    self.__AM.Log(f"Reservation notification skipped for staff {UStaID}: no email address on record")
                     continue
-                # Finds which copies to collect and from where, also updates their CurrentLocationID
-                PickList = self.__FindReservationStock(URID)
-                if isinstance(PickList, str) or PickList is None:
-                    self.__AM.Log(f"StartUp: Could not find stock for reservation {URID}: {PickList}")
+                Sections = []
+                for URID, Title, Quantity, *_ in Reservations:
+                    PickList = Allocations.get(URID)
+                    if isinstance(PickList, str) or PickList is None:
+                        self.__AM.Log(f"Could not find stock for reservation {URID}: {PickList}")
+                        continue
+                    # Builds this reservation's section from its picklist
+                    Section = f"  Title: {Title}, Quantity: {Quantity}\n  Copies to collect:\n"
+                    for Entry in PickList:
+                        RoomName = Entry[-1]
+                        CopyIDs = Entry[:-1]
+                        Section += f"    Room {RoomName}: copies {', '.join(str(c) for c in CopyIDs)}\n"
+                    Sections.append(Section)
+                if not Sections:
                     continue
-                # Builds email body from picklist
-                Body = f"Dear {Forename} {Surname},\n\nYour reservation for today is ready to collect:\n"
-                Body += f"  Title: {Title}, Quantity: {Quantity}\n\nCopies to collect:\n"
-                for Entry in PickList:
-                    RoomName = Entry[-1]
-                    CopyIDs = Entry[:-1]
-                    Body += f"  Room {RoomName}: copies {', '.join(str(c) for c in CopyIDs)}\n"
-                Result = self.__AM.SendEmail(Email, "Library Reservation Ready", Body)
-                if Result == True:
-                    ReservationsSent += 1
+                if len(Sections) == 1:
+                    Body = f"Dear {Forename} {Surname},\n\nYour reservation for today is ready to collect:\n"
                 else:
-                    self.__AM.Log(f"StartUp: Failed to send reservation notification for {URID} to staff {UStaID}")
-            self.__AM.Log(f"StartUp: Sent {ReservationsSent} of {len(TodaysReservations)} reservation notifications")
-            return f"StartUp complete. Due tomorrow: {DueTomorrowResult}. Overdue: {OverdueResult}. Reservation notifications: {ReservationsSent}/{len(TodaysReservations)}."
+                    Body = f"Dear {Forename} {Surname},\n\nYour {len(Sections)} reservations for today are ready to collect:\n"
+                Body += "\n".join(Sections)
+                Messages.append((Email, "Library Reservation Ready", Body))
+                DedupKeys.append(f"PickList:{RunDate}:{UStaID}")
+            # Queues the emails for OutboxSender, one pick list email per teacher per day
+            Queued = self.__AM.QueueEmails(Messages, DedupKeys)
+            if isinstance(Queued, str):
+                return Queued
+            # Logs and returns confirmation
+            self.__AM.Log(f"{self.__AM.GetCurrentUser()} queued {Queued} reservation notifications covering {len(TodaysReservations)} reservations")
+            return f"Queued {Queued} reservation notifications covering {len(TodaysReservations)} reservations."
         # Error handling and logging
         except Exception as e:
-            self.__AM.Log(f"StartUp encountered an error: {e}")
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error sending reservation notifications: {e}")
             return f"System error: {e}"
 
+    def StartUpInBackground(self, Runner):
+        # Runs StartUp on a JobRunner thread so logging in does not wait for the SMTP server
+        # Returns False if a StartUp run is already in progress
+        AM = self.__AM
+        def Job():
+            # The worker needs its own connections, so its session is created on the worker thread
+            Worker = LibraryManager(AM.ForkSession())
+            try:
+                return Worker.StartUp()
+            finally:
+                Worker.Exit()
+        return Runner.Start("StartUp", Job)
+
 
 # --- Internal helper methods ---
+    def __TypedSearch(self, SearchTerm, Select, IDColumn, Fields, SubstringColumns, PageSize=None, Cursor=None):
+        # Runs Select (a query without a WHERE clause) filtered by the parsed search, see SearchQuery
+        # The ID column is the first column of Select and is used as the page key
+        Query = SearchQuery(SearchTerm)
+        # A bare number is most likely an ID, which is a primary key lookup instead of a substring scan
+        # Later pages (with a Cursor) only happen for the substring search, so the lookup is only tried for the first
+        ExactID = Query.GetExactID()
+        if ExactID is not None and Cursor is None:
+            self.__Curs.execute(f"{Select} WHERE {IDColumn} = ?", (ExactID,))
+            Results = self.__Curs.fetchall()
+            if Results:
+                return Results if PageSize is None else Page(Results, None, len(Results), True)
+        # Otherwise falls back to the filters, and substring matching for any plain words
+        # Compile raises ValueError for an unknown field or a bad value, which the caller returns as a Search Error
+        Where, Params = Query.Compile(Fields, SubstringColumns)
+        return Paging.Fetch(self.__Curs, Select, Where, Params, [IDColumn], [0], PageSize, Cursor)
+
+    def __FetchBooks(self, MatchSQL, MatchParams, KeyColumns, PageSize=None, Cursor=None):
+        # Book lists have one row per author, so they are paged by book rather than by row
+        # MatchSQL selects the matching books as columns named in KeyColumns, which must end with ISBN
+        # Returns rows of (ISBN, Title, Forename, Middlenames, Surname, Genre, Subject) in key order
+        Order = ", ".join(KeyColumns)
+        Total, IsExact = None, True
+        if PageSize is not None and Cursor is None:
+            Total, IsExact = Paging.Count(self.__Curs, f"WITH Matches AS ({MatchSQL}) SELECT 1 FROM Matches", MatchParams)
+        # Finds this page's books
+        Where, Params = Paging.AfterKey("1", MatchParams, KeyColumns, Cursor)
+        Limit = -1 if PageSize is None else PageSize + 1
+        self.__Curs.execute(f"WITH Matches AS ({MatchSQL}) SELECT {Order} FROM Matches WHERE {Where} ORDER BY {Order} LIMIT ?", Params + [Limit])
+        Keys = self.__Curs.fetchall()
+        if PageSize is not None:
+            PageKeys = Paging.MakePage(Keys, PageSize, list, Total, IsExact)
+            Keys = PageKeys.Rows
+        # Fetches the author rows for those books, in chunks kept under SQLite's bound parameter limit
+        Position = {Key[-1]: i for i, Key in enumerate(Keys)}
+        ISBNs = list(Position)
+        Rows = []
+        for i in range(0, len(ISBNs), 500):
+            Chunk = ISBNs[i:i + 500]
+            Placeholders = ", ".join("?" for _ in Chunk)
+            self.__Curs.execute(f"""
+                SELECT Books.ISBN, Books.Title, Authors.Forename, Authors.Middlenames, Authors.Surname, Books.Genre, Books.Subject
+                FROM Books
+                JOIN BooksAuthors ON Books.ISBN = BooksAuthors.ISBN
+                JOIN Authors ON BooksAuthors.UAID = Authors.UAID
+                WHERE Books.ISBN IN ({Placeholders})
+                ORDER BY Authors.UAID
+            """, Chunk)
+            Rows.extend(self.__Curs.fetchall())
+        # Puts the rows back in the order the books were matched, keeping each book's authors together
+        Rows.sort(key=lambda Row: Position[Row[0]])
+        if PageSize is None:
+            return Rows
+        PageKeys.Rows = Rows
+        return PageKeys
+
+    def __HasRows(self, Results):
+        # True if a list, or the first Page of results, has any rows
+        return bool(Results.Rows if isinstance(Results, Page) else Results)
+
+    def __ContinuesFTS(self, Cursor):
+        # FTS pages are keyed by (Rank, ID) and LIKE pages by ID alone, so a later page's cursor shows which search found the first
+        return Cursor is None or len(Paging.DecodeCursor(Cursor)) == 2
+
+    def __BuildFTSQuery(self, SearchTerm):
+        # Turns what the user typed into an FTS5 query where every word must match the start of a word
+        # e.g. "terry prat" becomes "terry"* "prat"*, each word is quoted so punctuation cannot change the query's meaning
+        Words = re.findall(r"\w+", str(SearchTerm))
+        return " ".join(f'"{Word}"*' for Word in Words)
+
+    def __GroupByRecipient(self, Rows, KeyIndex):
+        # Groups rows by the recipient ID at KeyIndex, returning [(ID, [Rows])] in the order each recipient first appears
+        Groups = {}
+        for Row in Rows:
+            Groups.setdefault(Row[KeyIndex], []).append(Row)
+        return list(Groups.items())
+
+    def __BuildLoanDigests(self, Loans, Kind, RunDate, Subject, Intro, Outro):
+        # Builds one email per student from rows of (ULoanID, Title, DueDate, UStuID, Forename, Surname, Email)
+        # Returns (Messages, DedupKeys), where each key names the kind of notice, the day and the loans it covers
+        RunDate = int(datetime.now().strftime("%Y%m%d")) if RunDate is None else int(RunDate)
+        Messages = []
+        DedupKeys = []
+        for UStuID, StudentLoans in self.__GroupByRecipient(Loans, 3):
+            Forename, Surname, Email = StudentLoans[0][4:7]
+            if not Email:
+                self.__AM.Log(f"{Kind.capitalize()} notification skipped for student {UStuID}: no email address on record")
+                continue
+            # Pluralises the subject and introduction when there is more than one book
+            StudentSubject, StudentIntro = Subject, Intro
+            if len(StudentLoans) > 1:
+                StudentSubject = Subject.replace("Book", "Books")
+                StudentIntro = Intro.replace("The following book is", f"The following {len(StudentLoans)} books are")
+            Body = f"Dear {Forename} {Surname},\n\n{StudentIntro}\n"
+            for ULoanID, Title, DueDate, *_ in StudentLoans:
+                Body += f"  Title: {Title}\n  Loan ID: {ULoanID}\n  Due date: {DueDate}\n\n"
+            Body += Outro
+            Messages.append((Email, StudentSubject, Body))
+            DedupKeys.append(f"{Kind.title().replace(' ', '')}:{RunDate}:{UStuID}:{'-'.join(str(Loan[0]) for Loan in StudentLoans)}")
+        return Messages, DedupKeys
+
+    def __RunDailyJob(self, JobName, Method, RunDate):
+        # Claims the job in the ledger, runs it and records the outcome
+        if not self.__AM.ClaimJob(JobName, RunDate):
+            return "Already run."
+        try:
+            Result = Method(RunDate)
+        except Exception as e:
+            Result = f"System error: {e}"
+        # Failed runs are retried the next time StartUp is called
+        Failed = str(Result).startswith(("System error", "Access Denied", "Error"))
+        self.__AM.FinishJob(JobName, RunDate, "Failed" if Failed else "Done", Result)
+        return Result
+
+    def __IsSchoolDay(self, Date):
+        # Monday to Friday
+        return datetime.strptime(str(Date), "%Y%m%d").weekday() < 5
+
+    def __NextSchoolDay(self, Date):
+        Day = datetime.strptime(str(Date), "%Y%m%d") + timedelta(days=1)
+        while Day.weekday() >= 5:
+            Day += timedelta(days=1)
+        return int(Day.strftime("%Y%m%d"))
+
+    def __GetMissedSchoolDays(self, LastRunDate, Today, RetryDates=()):
+        # School days after LastRunDate up to and including Today, oldest first
+        # A job that has never run starts from today, and catch-up is limited to CatchUpDays
+        # RetryDates are earlier days to run again (e.g. failed runs), also limited to CatchUpDays
+        TodayDate = datetime.strptime(str(Today), "%Y%m%d")
+        Earliest = TodayDate - timedelta(days=self.CatchUpDays)
+        if LastRunDate is None:
+            Day = TodayDate
+        else:
+            Day = max(datetime.strptime(str(LastRunDate), "%Y%m%d") + timedelta(days=1), Earliest)
+        # Today is always included, in case today's run failed and needs retrying
+        Days = []
+        while Day < TodayDate:
+            if Day.weekday() < 5:
+                Days.append(int(Day.strftime("%Y%m%d")))
+            Day += timedelta(days=1)
+        Days.append(Today)
+        # A failed day is retried even when a later day has since run
+        EarliestDate = int(Earliest.strftime("%Y%m%d"))
+        Days.extend(int(Date) for Date in RetryDates if EarliestDate <= int(Date) < Today)
+        return sorted(set(Days))
+
     def __ValidateISBN(self, ISBN):
         ISBN = str(ISBN)
         if len(ISBN) != 13:
@@ -1135,142 +1602,154 @@ class LibraryManager:
         else:
             return (True, "Valid ISBN")
 
-    def __MergeSort(self, UnsortedList):
-        # Base case: a list of 0 or 1 is already sorted
-        if len(UnsortedList) <= 1:
-            return UnsortedList
-        # Splits list in half and recursively sorts each half
-        MiddleIndex = len(UnsortedList) // 2
-        LeftHalf = self.__MergeSort(UnsortedList[:MiddleIndex])
-        RightHalf = self.__MergeSort(UnsortedList[MiddleIndex:])
-        return self.__Merge(LeftHalf, RightHalf)
-
-    def __Merge(self, LeftSide, RightSide):
-        # Merges two sorted halves into one, sorted descending by the second element (copy count per location)
-        MergedList = []
-        LeftPointer = 0
-        RightPointer = 0
-        while LeftPointer < len(LeftSide) and RightPointer < len(RightSide):
-            # Descending order: higher count comes first
-            if LeftSide[LeftPointer][1] >= RightSide[RightPointer][1]:
-                MergedList.append(LeftSide[LeftPointer])
-                LeftPointer += 1
-            else:
-                MergedList.append(RightSide[RightPointer])
-                RightPointer += 1
-        # Appends any remaining elements from either half
-        MergedList.extend(LeftSide[LeftPointer:])
-        MergedList.extend(RightSide[RightPointer:])      
-        return MergedList
-
-    def __FindReservationStock(self, URID):
+    def __AllocateReservationStock(self, RunDate):
         try:
-            # Retrieves reservation details needed for stock allocation
+            # Allocates copies to all of RunDate's reservations together, returning {URID: PickList}
+            # Each picklist entry is a list of UCIDs followed by the room name, or the entry is an error string if there is not enough stock
+            # Reservations are served in the order they were made, so an earlier reservation is never left short for a later one
             self.__Curs.execute("""
-                SELECT ISBN, Quantity, ULocID, ReservationDate
+                SELECT URID, ISBN, Quantity, ULocID
                 FROM Reservations
-                WHERE URID = ?
-            """,(URID,))
-            Result = self.__Curs.fetchone()
-            if not Result:
-                return "Reservation not found."  
-            BookISBN = Result[0]
-            QuantityRemaining = Result[1]
-            ReservationLocID = Result[2]
-            # Finds all available copies: not on active loan and at home location
-            # CurrentLocationID = HomeLocationID prevents allocating copies already
-            # moved by a previous FindReservationStock call earlier in the same StartUp
-            self.__Curs.execute("""
-                SELECT UCID, CurrentLocationID
+                WHERE ReservationDate = ?
+                ORDER BY CreationDate, URID
+            """, (RunDate,))
+            Reservations = self.__Curs.fetchall()
+            # Finds every copy of the reserved books that can be collected: not on active loan and at home location
+            # CurrentLocationID = HomeLocationID also leaves out copies already moved to a reservation
+            self.__Curs.execute("""
+                SELECT Copies.UCID, Copies.ISBN, Copies.CurrentLocationID, Locations.ClassCode
                 FROM Copies
-                WHERE ISBN = ?
-                AND CurrentLocationID = HomeLocationID
-            """,(BookISBN,))
-            RawCopies = self.__Curs.fetchall()
-            # --- PHASE 1 ---
-            # Builds a count of copies per location and a dict mapping each location to its copy IDs
-            LocationCounts = []
-            CopyIDsByLocation = {}
-            for Row in RawCopies:
-                RowUCID = Row[0]
-                ULocID = Row[1]
-                Found = False
-                for Entry in LocationCounts:
-                    if Entry[0] == ULocID:
-                        Entry[1] += 1
-                        Found = True
-                        break
-                if not Found:
-                    LocationCounts.append([ULocID, 1])
-                if ULocID not in CopyIDsByLocation:
-                    CopyIDsByLocation[ULocID] = []
-                CopyIDsByLocation[ULocID].append(RowUCID)
-            # --- PHASE 2 ---
-            # Sorts locations descending by copy count, preferring rooms with more copies for easier collection
-            SortedLocations = self.__MergeSort(LocationCounts)
-            PickList = []
-            ReservedUCIDs = []
-            # --- PHASE 3 ---
-            # Takes copies from each room starting with the most stocked, until the required quantity is met
-            for RoomData in SortedLocations:
-                if QuantityRemaining <= 0:
-                    break
-                RoomID = RoomData[0]
-                AvailableInRoom = RoomData[1]
-                self.__Curs.execute("""
-                    SELECT ClassCode
-                    FROM Locations
-                    WHERE ULocID = ?
-                """, (RoomID,))
-                RoomNameResult = self.__Curs.fetchone()
-                RoomName = RoomNameResult[0] if RoomNameResult else f"Unknown Room ({RoomID})"
-                AmountToTake = min(AvailableInRoom, QuantityRemaining)
-                TakenUCIDs = CopyIDsByLocation[RoomID][:AmountToTake]
-                # Each picklist entry is a list of UCIDs followed by the room name
-                PickList.append(TakenUCIDs + [RoomName])
-                ReservedUCIDs.extend(TakenUCIDs)
-                QuantityRemaining -= AmountToTake
-            if QuantityRemaining > 0:
-                return f"Insufficient stock. Need {QuantityRemaining} more copies."
-            # Updates CurrentLocationID of all allocated copies to the reservation's target location
-            for ReservedUCID in ReservedUCIDs:
-                self.__Curs.execute("""
-                    UPDATE Copies
-                    SET CurrentLocationID = ?
-                    WHERE UCID = ?
-                """, (ReservationLocID, ReservedUCID))
-            # Commits, Returns picklist
+                LEFT JOIN Locations ON Copies.CurrentLocationID = Locations.ULocID
+                WHERE Copies.ISBN IN (SELECT ISBN FROM Reservations WHERE ReservationDate = ?)
+                AND NOT EXISTS (SELECT 1 FROM Loans WHERE Loans.UCID = Copies.UCID AND Loans.ReturnDate IS NULL)
+                AND Copies.CurrentLocationID = Copies.HomeLocationID
+                ORDER BY Copies.UCID
+            """, (RunDate,))
+            # One pass builds each book's copies by room, the number of copies left per book, and each room's name
+            CopiesByRoom = {}
+            CopiesLeft = {}
+            RoomNames = {}
+            for UCID, ISBN, ULocID, ClassCode in self.__Curs.fetchall():
+                CopiesByRoom.setdefault(ISBN, {}).setdefault(ULocID, []).append(UCID)
+                CopiesLeft[ISBN] = CopiesLeft.get(ISBN, 0) + 1
+                RoomNames[ULocID] = ClassCode if ClassCode is not None else f"Unknown Room ({ULocID})"
+            Allocations = {}
+            Moves = []
+            for URID, ISBN, Quantity, ReservationLocID in Reservations:
+                # Copies of a book are interchangeable, so a reservation can be met whenever enough are left
+                # A reservation that cannot be met takes nothing, leaving its copies for later reservations
+                if CopiesLeft.get(ISBN, 0) < Quantity:
+                    Allocations[URID] = f"Insufficient stock. Need {Quantity - CopiesLeft.get(ISBN, 0)} more copies."
+                    continue
+                CopiesLeft[ISBN] -= Quantity
+                Rooms = CopiesByRoom[ISBN]
+                QuantityRemaining = Quantity
+                PickList = []
+                while QuantityRemaining > 0:
+                    # Copies already in the reservation's room are taken first, as they need no collecting
+                    # Then the room with the fewest copies that covers the rest, so one more room is visited and fuller rooms are kept for later reservations
+                    # If no room covers the rest, the fullest room, so as few rooms as possible are visited
+                    if ReservationLocID in Rooms:
+                        RoomID = ReservationLocID
+                    else:
+                        Covering = [Room for Room in Rooms if len(Rooms[Room]) >= QuantityRemaining]
+                        if Covering:
+                            RoomID = min(Covering, key=lambda Room: len(Rooms[Room]))
+                        else:
+                            RoomID = max(Rooms, key=lambda Room: len(Rooms[Room]))
+                    TakenUCIDs = Rooms[RoomID][:QuantityRemaining]
+                    Rooms[RoomID] = Rooms[RoomID][QuantityRemaining:]
+                    if not Rooms[RoomID]:
+                        del Rooms[RoomID]
+                    PickList.append(TakenUCIDs + [RoomNames[RoomID]])
+                    Moves.extend((ReservationLocID, TakenUCID) for TakenUCID in TakenUCIDs)
+                    QuantityRemaining -= len(TakenUCIDs)
+                Allocations[URID] = PickList
+            # Updates CurrentLocationID of all allocated copies to their reservation's location
+            StockStamp = self.__StockStamp()
+            self.__Curs.executemany("""
+                UPDATE Copies
+                SET CurrentLocationID = ?
+                WHERE UCID = ?
+            """, Moves)
+            # Commits, Returns picklists
             self.__Conn.commit()
-            return PickList
+            # Moving copies does not change how many are free on any day, so no timeline needs changing
+            self.__UpdateStock(None, StockStamp)
+            return Allocations
         # Error handling and logging
         except Exception as e:
-            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error in FindReservationStock: {e}")
-            return None
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error allocating reservation stock for {RunDate}: {e}")
+            return f"System error: {e}"
 
-    def __BinarySearchInsertOrMerge(self, Timeline, Date, Delta):
-        # Binary search: finds the position of Date in the sorted Timeline
-        # If the date already exists, merges by adding Delta to its existing value
-        # If not, inserts a new [Date, Delta] entry at the correct position to maintain sort order
-        Left = 0
-        Right = len(Timeline) - 1
-        Found = False
-        while Left <= Right:
-            Mid = (Left + Right) // 2
-            if Timeline[Mid][0] == Date:
-                Timeline[Mid][1] += Delta
-                Found = True
-                break
-            elif Timeline[Mid][0] < Date:
-                Left = Mid + 1
-            else:
-                Right = Mid - 1
-        if not Found:
-            Timeline.insert(Left, [Date, Delta])
+    def __StockStamp(self):
+        # What the stock timelines must have been built from to still be current (see StockTimelines):
+        # today's date, PRAGMA data_version (which changes when another connection commits) and the write counters
+        self.__Curs.execute("PRAGMA main.data_version")
+        DataVersion = self.__Curs.fetchone()[0]
+        return (int(datetime.now().strftime("%Y%m%d")), DataVersion, self.GetTableVersions(StockTimelines.Tables))
+
+    def __GetStockTimeline(self, ISBN, LastDate):
+        # Returns the book's free copies per day from today until at least LastDate, building it if it is not cached
+        Stamp = self.__StockStamp()
+        LastDay = StockTimeline.DayNumber(LastDate)
+        Timeline = self.__StockTimelines.Get(ISBN, Stamp, LastDay)
+        if Timeline is not None:
+            return Timeline
+        Today = Stamp[0]
+        # Every active loan of the book. Its copy is out until the due date, or indefinitely once overdue
+        self.__Curs.execute("""
+            SELECT Loans.UCID, Loans.DueDate
+            FROM Loans
+            INNER JOIN Copies ON Loans.UCID = Copies.UCID
+            WHERE Copies.ISBN = ? AND Loans.ReturnDate IS NULL
+        """, (ISBN,))
+        ActiveLoans = self.__Curs.fetchall()
+        self.__Curs.execute("SELECT COUNT(*) FROM Copies WHERE ISBN = ?", (ISBN,))
+        Free = self.__Curs.fetchone()[0] - len({Row[0] for Row in ActiveLoans})
+        # Each reservation needs its copies on its reservation date only
+        self.__Curs.execute("""
+            SELECT ReservationDate, SUM(Quantity)
+            FROM Reservations
+            WHERE ISBN = ? AND ReservationDate >= ?
+            GROUP BY ReservationDate
+        """, (ISBN, Today))
+        Reserved = {StockTimeline.DayNumber(Row[0]): Row[1] for Row in self.__Curs.fetchall()}
+        DueDays = [StockTimeline.DayNumber(Row[1]) for Row in ActiveLoans]
+        Timeline = StockTimeline(StockTimeline.DayNumber(Today), LastDay, Free, DueDays, Reserved)
+        self.__StockTimelines.Put(ISBN, Timeline)
+        return Timeline
+
+    def __UpdateStock(self, ISBN, OldStamp, Change=None):
+        # Called after a loan or reservation method commits, with the stamp from before its write
+        # Change(Timeline) makes the same change to the book's cached timeline, so it does not need rebuilding
+        self.__UpdateStocks(OldStamp, {ISBN: Change})
+
+    def __UpdateStocks(self, OldStamp, Changes):
+        # As __UpdateStock, for a write to several books at once. Changes maps each ISBN to its Change
+        try:
+            self.__StockTimelines.Update(OldStamp, self.__StockStamp(), Changes)
+        # The write has already been committed, so an error here only drops the cache
+        except Exception as e:
+            self.__StockTimelines.Clear()
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error updating stock timelines: {e}")
+
+    def __CopiesFreeOn(self, ISBN, ReservationDate):
+        # Copies of the book a new reservation could take on ReservationDate: copies not on loan now,
+        # plus active loans due back by then, minus copies already reserved for that day
+        # May be negative if the day is already overbooked. Returns an error string for a date that cannot be reserved
+        try:
+            Day = StockTimeline.DayNumber(ReservationDate)
+        except (TypeError, ValueError):
+            return "Error: Reservation date must be a valid date (YYYYMMDD)"
+        if int(ReservationDate) < int(datetime.now().strftime("%Y%m%d")):
+            return "Error: Reservation date cannot be in the past"
+        return self.__GetStockTimeline(ISBN, ReservationDate).FreeOn(Day)
 
     def __LoanStockConflictCheck(self, UCID, LoanDate, DueDate):
         try:
             # The check works at ISBN level, not copy level - all copies of the same book are interchangeable
-            # So we find the ISBN first, then count and track stock across all copies of that book
+            # So we find the ISBN first, then check stock across all copies of that book
             self.__Curs.execute("""
                 SELECT ISBN FROM Copies WHERE UCID = ?
             """, (UCID,))
@@ -1279,74 +1758,50 @@ class LibraryManager:
             if not result:
                 return False
             ISBN = result[0]
-            # Starting stock = number of copies of this book not currently on an active loan
+            # The book's timeline holds the copies not on loan now (Free), and for each day the copies free that day:
+            # Free, plus active loans due back by then, minus copies reserved for that day
             # We do not need to track loans being issued during the window - any loan that will be issued
             # in the future does not exist yet, so it cannot be counted. When it is eventually issued,
             # it will run this same check at that point. Only already-committed events (active loans
-            # returning, and existing reservations) need to be modelled in the timeline
-            self.__Curs.execute("""
-                SELECT COUNT(*)
-                FROM Copies
-                WHERE ISBN = ?
-                AND UCID NOT IN (SELECT UCID FROM Loans WHERE ReturnDate IS NULL)
-            """, (ISBN,))
-            StartingStock = self.__Curs.fetchone()[0]
-            # The Timeline is a sorted list of [date, delta] pairs representing every day within the
-            # loan window on which the available stock changes, and by how much (+ve = stock increases,
-            # -ve = stock decreases). Binary search keeps it sorted as events are inserted or merged
-            Timeline = []
-            # Phase 1: loan return events
-            # Each active loan for this book that is due back within the window will return a copy,
-            # increasing available stock by 1 on its due date
-            # Loans issued after today but before DueDate are not included - they do not exist yet
-            self.__Curs.execute("""
-                SELECT Loans.DueDate
-                FROM Loans
-                INNER JOIN Copies ON Loans.UCID = Copies.UCID
-                WHERE Copies.ISBN = ?
-                AND Loans.ReturnDate IS NULL AND Loans.DueDate BETWEEN ? AND ?
-            """,(ISBN, LoanDate, DueDate))
-            for row in self.__Curs.fetchall():
-                ReturnDate = int(row[0])
-                self.__BinarySearchInsertOrMerge(Timeline, ReturnDate, 1)
-            # Phase 2: reservation events
-            # Each reservation reduces stock by its Quantity on the reservation date, and restores it
-            # the following day. This models a reservation as a one-day commitment - the books are needed
-            # that day only, and are free again afterwards
-            self.__Curs.execute("""
-                SELECT ReservationDate, Quantity
-                FROM Reservations
-                WHERE ISBN = ? AND ReservationDate BETWEEN ? AND ?
-            """,(ISBN, LoanDate, DueDate))
-            for row in self.__Curs.fetchall():
-                ResDate = int(row[0])
-                Qty = row[1]
-                self.__BinarySearchInsertOrMerge(Timeline, ResDate, -Qty)
-                # timedelta is used here rather than simple integer arithmetic because dates are stored
-                # as integers in YYYYMMDD format - adding 1 would break at month and year boundaries
-                DateObj = datetime.strptime(str(ResDate), "%Y%m%d")
-                NextDay = int((DateObj + timedelta(days=1)).strftime("%Y%m%d"))
-                self.__BinarySearchInsertOrMerge(Timeline, NextDay, Qty)
-            # Phase 3: simulate the running balance
-            # Subtract 1 from starting stock to account for the new loan being proposed
-            RunningBalance = StartingStock - 1
-            # If already negative, there are no free copies right now - reject immediately
-            if RunningBalance < 0:
+            # returning, and existing reservations) are modelled in the timeline
+            Timeline = self.__GetStockTimeline(ISBN, DueDate)
+            # The proposed loan takes one copy now, so there must be a free copy now, and on every day of the loan window
+            # there must be a copy to spare after reservations, otherwise a reservation could not be fulfilled
+            if Timeline.Free < 1:
                 return False
-            # Apply each event in chronological order. If the balance goes negative at any point,
-            # it means the proposed loan would leave insufficient stock to fulfil a reservation
-            # or accommodate a returning copy's absence - reject
-            for Event in Timeline:
-                RunningBalance += Event[1]
-                if RunningBalance < 0:
-                    return False
-            # Balance never went negative throughout the entire loan window - safe to issue
-            return True
+            return Timeline.LowestBetween(StockTimeline.DayNumber(LoanDate), StockTimeline.DayNumber(DueDate)) >= 1
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"Conflict Check Error: {e}")
             return False
-# --- Getter Methods --- 
+# --- Getter Methods ---
+    def GetTableVersions(self, Tables):
+        try:
+            # Reads the write counters of the given tables (LibraryData.db tables and sysconfig.Staff), see SchemaManager version 4
+            # Returns a tuple in the same order as Tables, which changes whenever any of them is written to
+            # PRAGMA data_version changes when another connection commits to that database, and total_changes when this one writes,
+            # so while neither has moved, the counters read last time are still current and are not read again
+            self.__Curs.execute("PRAGMA main.data_version")
+            MainVersion = self.__Curs.fetchone()[0]
+            self.__Curs.execute("PRAGMA sysconfig.data_version")
+            SysVersion = self.__Curs.fetchone()[0]
+            Stamp = (MainVersion, SysVersion, self.__Conn.total_changes)
+            if Stamp != self.__VersionStamp:
+                # Every counter is read at once, there are only a handful
+                self.__Curs.execute("""
+                    SELECT TableName, Version FROM TableVersions
+                    UNION ALL
+                    SELECT TableName, Version FROM sysconfig.TableVersions
+                """)
+                self.__TableVersions = dict(self.__Curs.fetchall())
+                self.__VersionStamp = Stamp
+            return tuple(self.__TableVersions.get(Table) for Table in Tables)
+        # Error handling and logging, None tells the caller the versions are unknown so nothing should be cached
+        except Exception as e:
+            self.__VersionStamp = None
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} encountered an error reading table versions: {e}")
+            return None
+
     def GetAuthorDetails(self, UAID):
         try:
             # Retrieves and returns author details
@@ -1464,6 +1919,86 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve details for reservation {URID} and encountered an error: {e}")
             return f"System error: {e}"
 
+    def GetReservableQuantity(self, ISBN, ReservationDate):
+        try:
+            # Permission check
+            if self.__AM.CheckPermission("Teacher") != True:
+                return "Access Denied: Insufficient Permissions."
+            # The most copies of the book a new reservation for ReservationDate could take, shown as the create form is filled in
+            Available = self.__CopiesFreeOn(ISBN, ReservationDate)
+            return Available if isinstance(Available, str) else max(Available, 0)
+        # Error handling and logging
+        except Exception as e:
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to check copies available for book {ISBN} on {ReservationDate} and encountered an error: {e}")
+            return f"System error: {e}"
+
+    def GetAvailabilityCalendar(self, StartDate, Days, ISBNList=None):
+        try:
+            # Permission check
+            if self.__AM.CheckPermission("Teacher") != True:
+                return "Access Denied: Insufficient Permissions."
+            # The copies a new reservation could take on each of Days days from StartDate, for every book with copies or those in ISBNList
+            # Returns [(ISBN, Title, [Copies free on each day])] ordered by title, with the same counts as GetReservableQuantity
+            Today = int(datetime.now().strftime("%Y%m%d"))
+            try:
+                FirstDay = StockTimeline.DayNumber(StartDate)
+            except (TypeError, ValueError):
+                return "Error: Start date must be a valid date (YYYYMMDD)"
+            if int(StartDate) < Today:
+                return "Error: Start date cannot be in the past"
+            Days = int(Days)
+            if not 1 <= Days <= 366:
+                return "Error: Days must be between 1 and 366"
+            LastDate = int(datetime.fromordinal(FirstDay + Days - 1).strftime("%Y%m%d"))
+            # Limits every query to the ISBNs asked for, if any
+            CopiesFilter = ReservationsFilter = ""
+            Params = ()
+            if ISBNList is not None:
+                Placeholders = ", ".join("?" * len(ISBNList))
+                CopiesFilter = f"AND Copies.ISBN IN ({Placeholders})"
+                ReservationsFilter = f"AND ISBN IN ({Placeholders})"
+                Params = tuple(ISBNList)
+            # Three queries cover every book: copies per book, every active loan, and reservations per book per day in the window
+            self.__Curs.execute(f"""
+                SELECT Books.ISBN, Books.Title, COUNT(*)
+                FROM Copies
+                JOIN Books ON Copies.ISBN = Books.ISBN
+                WHERE 1 = 1 {CopiesFilter}
+                GROUP BY Books.ISBN
+                ORDER BY Books.Title
+            """, Params)
+            Books = self.__Curs.fetchall()
+            self.__Curs.execute(f"""
+                SELECT Copies.ISBN, Loans.UCID, Loans.DueDate
+                FROM Loans
+                JOIN Copies ON Loans.UCID = Copies.UCID
+                WHERE Loans.ReturnDate IS NULL {CopiesFilter}
+            """, Params)
+            LoansByISBN = {}
+            for ISBN, UCID, DueDate in self.__Curs.fetchall():
+                LoansByISBN.setdefault(ISBN, []).append((UCID, StockTimeline.DayNumber(DueDate)))
+            self.__Curs.execute(f"""
+                SELECT ISBN, ReservationDate, SUM(Quantity)
+                FROM Reservations
+                WHERE ReservationDate BETWEEN ? AND ? {ReservationsFilter}
+                GROUP BY ISBN, ReservationDate
+            """, (int(StartDate), LastDate) + Params)
+            ReservedByISBN = {}
+            for ISBN, ReservationDate, Quantity in self.__Curs.fetchall():
+                ReservedByISBN.setdefault(ISBN, {})[StockTimeline.DayNumber(ReservationDate)] = Quantity
+            # Projects each book's free copies across the window, as StockTimeline does for one book
+            Calendar = []
+            for ISBN, Title, CopyCount in Books:
+                ActiveLoans = LoansByISBN.get(ISBN, [])
+                Free = CopyCount - len({UCID for UCID, _ in ActiveLoans})
+                FreePerDay = StockTimeline.FreePerDay(StockTimeline.DayNumber(Today), Free, [Due for _, Due in ActiveLoans], ReservedByISBN.get(ISBN, {}), FirstDay, Days)
+                Calendar.append((ISBN, Title, [max(Count, 0) for Count in FreePerDay]))
+            return Calendar
+        # Error handling and logging
+        except Exception as e:
+            self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve the availability calendar from {StartDate} and encountered an error: {e}")
+            return f"System error: {e}"
+
     def GetAllAuthors(self):
         try:
             # Retrieves all authors
@@ -1478,17 +2013,14 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all authors and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetAllBooks(self):
+    def GetAllBooks(self, PageSize=None, Cursor=None):
         try:
-            # Retrieves all books including linked author names
-            self.__Curs.execute("""
-                SELECT Books.ISBN, Books.Title, Authors.Forename, Authors.Middlenames, Authors.Surname, Books.Genre, Books.Subject
-                FROM Books
-                JOIN BooksAuthors ON Books.ISBN = BooksAuthors.ISBN
-                JOIN Authors ON BooksAuthors.UAID = Authors.UAID
-            """)
-            # Returns as a list of tuples
-            return self.__Curs.fetchall()
+            # Retrieves all books (that have at least one author) including linked author names
+            # Returns every row as a list of tuples, or one Page of books when PageSize is given
+            return self.__FetchBooks(
+                "SELECT ISBN FROM Books WHERE EXISTS (SELECT 1 FROM BooksAuthors WHERE BooksAuthors.ISBN = Books.ISBN)",
+                [], ["ISBN"], PageSize, Cursor
+            )
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all books and encountered an error: {e}")
@@ -1511,18 +2043,18 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve books for author {UAID} and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetAllCopies(self):
+    def GetAllCopies(self, PageSize=None, Cursor=None):
         try:
             # Retrieves all copies including home and current location names
-            self.__Curs.execute("""
+            Select = """
                 SELECT Copies.UCID, Books.Title, Books.ISBN, CurrentLoc.ClassCode, HomeLoc.ClassCode
                 FROM Copies
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Locations AS CurrentLoc ON Copies.CurrentLocationID = CurrentLoc.ULocID
                 JOIN Locations AS HomeLoc ON Copies.HomeLocationID = HomeLoc.ULocID
-            """)
-            # Returns as a list of tuples
-            return self.__Curs.fetchall()
+            """
+            # Returns every row as a list of tuples, or one Page of rows when PageSize is given
+            return Paging.Fetch(self.__Curs, Select, "1", [], ["Copies.UCID"], [0], PageSize, Cursor)
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all copies and encountered an error: {e}")
@@ -1546,44 +2078,43 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of copies for book {ISBN} and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetAllLoans(self):
+    def GetAllLoans(self, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to retrieve all loans: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
             # Retrieves all loans including book title and student name
-            self.__Curs.execute("""
+            Select = """
                 SELECT Loans.ULoanID, Books.Title, Loans.LoanDate, Loans.DueDate, Loans.ReturnDate, Loans.UStuID, Loans.UStaID, Copies.UCID, Students.Forename, Students.Surname
                 FROM Loans
                 JOIN Copies ON Loans.UCID = Copies.UCID
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Students ON Loans.UStuID = Students.UStuID
-            """)
-            # Returns as a list of tuples
-            return self.__Curs.fetchall()
+            """
+            # Returns every row as a list of tuples, or one Page of rows when PageSize is given
+            return Paging.Fetch(self.__Curs, Select, "1", [], ["Loans.ULoanID"], [0], PageSize, Cursor)
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all loans and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetAllActiveLoans(self):
+    def GetAllActiveLoans(self, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to retrieve all active loans: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
             # Retrieves all loans with no return date (i.e. still active)
-            self.__Curs.execute("""
+            Select = """
                 SELECT Loans.ULoanID, Books.Title, Loans.LoanDate, Loans.DueDate, Loans.UStuID, Loans.UStaID, Copies.UCID, Students.Forename, Students.Surname
                 FROM Loans
                 JOIN Copies ON Loans.UCID = Copies.UCID
                 JOIN Books ON Copies.ISBN = Books.ISBN
                 JOIN Students ON Loans.UStuID = Students.UStuID
-                WHERE Loans.ReturnDate IS NULL
-            """)
-            # Returns as a list of tuples
-            return self.__Curs.fetchall()
+            """
+            # Returns every row as a list of tuples, or one Page of rows when PageSize is given
+            return Paging.Fetch(self.__Curs, Select, "Loans.ReturnDate IS NULL", [], ["Loans.ULoanID"], [0], PageSize, Cursor)
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of active loans and encountered an error: {e}")
@@ -1625,22 +2156,22 @@ class LibraryManager:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all locations and encountered an error: {e}")
             return f"System error: {e}"
 
-    def GetAllReservations(self):
+    def GetAllReservations(self, PageSize=None, Cursor=None):
         try:
             # Permission check
             if self.__AM.CheckPermission("Teacher") != True:
                 self.__AM.Log(f"{self.__AM.GetCurrentUser()} attempted to retrieve all reservations: Insufficient permissions")
                 return "Access Denied: Insufficient Permissions."
             # Retrieves all reservations including staff name and location
-            self.__Curs.execute("""
+            Select = """
                 SELECT Reservations.URID, Books.Title, Reservations.ReservationDate, Reservations.Quantity, Reservations.UStaID, Staff.Forename, Staff.Surname, Locations.ClassCode
                 FROM Reservations
                 JOIN Books ON Reservations.ISBN = Books.ISBN
                 JOIN sysconfig.Staff AS Staff ON Reservations.UStaID = Staff.UStaID
                 JOIN Locations ON Reservations.ULocID = Locations.ULocID
-            """)
-            # Returns as a list of tuples
-            return self.__Curs.fetchall()
+            """
+            # Returns every row as a list of tuples, or one Page of rows when PageSize is given
+            return Paging.Fetch(self.__Curs, Select, "1", [], ["Reservations.URID"], [0], PageSize, Cursor)
         # Error handling and logging
         except Exception as e:
             self.__AM.Log(f"User {self.__AM.GetCurrentUser()} attempted to retrieve a list of all reservations and encountered an error: {e}")
@@ -0,0 +1,112 @@
+# This class sends emails over a single SMTP session
+# Opening a connection, STARTTLS and logging in are done once per batch instead of once per email
+# If the server drops the connection part way through a batch, it reconnects and carries on
+# Each message gets its own result, so one bad address does not stop the rest of the batch
+# A failed connect, STARTTLS or login does stop the batch, as every later message would fail for the same reason
+# SMTPClass can be swapped for a stand-in (e.g. a local debugging server or a stub) when testing
+
+# Used for sending email notifications
+import smtplib
+from email.mime.text import MIMEText
+
+class Mailer:
+
+    # SMTP errors that mean the session itself has gone, rather than one message being refused
+    # Any other OSError while sending (reset, timeout etc.) is treated the same way
+    ConnectionErrors = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+
+    def __init__(self, Host, Port, User, Password, Sender, UseTLS=True, Timeout=30, Retries=1, SMTPClass=smtplib.SMTP):
+        self.__Host = Host
+        self.__Port = int(Port)
+        self.__User = User
+        self.__Password = Password
+        self.__Sender = Sender
+        self.__UseTLS = UseTLS
+        self.__Timeout = Timeout
+        # Number of reconnect attempts per message after a dropped connection
+        self.__Retries = Retries
+        self.__SMTPClass = SMTPClass
+        self.__Server = None
+
+    @classmethod
+    def FromSettings(cls, Settings):
+        # Builds a Mailer from a dictionary of SMTP settings (as stored in the Settings table)
+        # Returns an error string if any required setting is missing
+        Required = ["SMTPHost", "SMTPPort", "SMTPUser", "SMTPPassword", "SMTPSender"]
+        if not all(Settings.get(k) for k in Required):
+            return "Error: SMTP settings incomplete"
+        return cls(Settings["SMTPHost"], Settings["SMTPPort"], Settings["SMTPUser"], Settings["SMTPPassword"], Settings["SMTPSender"])
+
+    def __enter__(self):
+        self.Open()
+        return self
+
+    def __exit__(self, ExcType, ExcValue, Traceback):
+        self.Close()
+
+    def Open(self):
+        # Connects, upgrades to TLS and logs in once for the whole session
+        self.__Server = self.__SMTPClass(self.__Host, self.__Port, timeout=self.__Timeout)
+        try:
+            if self.__UseTLS:
+                self.__Server.starttls()
+            # Servers that do not need authentication (such as a local test server) are used without logging in
+            if self.__User:
+                self.__Server.login(self.__User, self.__Password)
+        # A half-open or unauthenticated session is never kept, so the next message starts from a fresh connection
+        except Exception:
+            self.Close()
+            raise
+
+    def Close(self):
+        # Ends the session politely, ignoring a connection that has already dropped
+        if self.__Server is not None:
+            try:
+                self.__Server.quit()
+            except Exception:
+                pass
+            self.__Server = None
+
+    def Send(self, ToAddress, Subject, Body):
+        # Returns True, or an error string for this message
+        # Builds the email
+        Message = MIMEText(Body)
+        Message["Subject"] = Subject
+        Message["From"] = self.__Sender
+        Message["To"] = ToAddress
+        Attempts = 0
+        while True:
+            # Opening is not retried per message, a failure is raised for SendBatch to fail the whole batch
+            if self.__Server is None:
+                self.Open()
+            try:
+                self.__Server.sendmail(self.__Sender, ToAddress, Message.as_string())
+                return True
+            # SMTPException is itself an OSError, so it is checked first
+            # Refused recipient, rejected message etc. The session is still usable for the next message
+            except smtplib.SMTPException as e:
+                if not isinstance(e, self.ConnectionErrors):
+                    return f"System error: {e}"
+                Error = e
+            except OSError as e:
+                Error = e
+            # The connection dropped, reconnects and tries this message again
+            self.Close()
+            Attempts += 1
+            if Attempts > self.__Retries:
+                return f"System error: {Error}"
+
+    def SendBatch(self, Messages):
+        # Messages is a list of (ToAddress, Subject, Body)
+        # Returns a list of (ToAddress, Result) in the same order, where Result is True or an error string
+        Results = []
+        try:
+            for ToAddress, Subject, Body in Messages:
+                Results.append((ToAddress, self.Send(ToAddress, Subject, Body)))
+        # The session could not be opened (unknown host, timeout, STARTTLS unsupported, login refused etc.)
+        # Fails this message and the rest once, without trying each of them
+        except OSError as e:
+            Results.extend((ToAddress, f"System error: {e}") for ToAddress, Subject, Body in Messages[len(Results):])
+        finally:
+            self.Close()
+        return Results
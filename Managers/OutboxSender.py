@@ -0,0 +1,156 @@
+# This class sends the emails queued in the Outbox table (SystemConfig.db)
+# Notification methods only queue their emails, so they finish straight away even if the SMTP server is slow or down
+# A small pool of worker threads claims batches of due emails and sends each batch over one SMTP session
+# A failed email is retried after a delay that doubles each attempt (BaseDelay, 2 x BaseDelay, ... up to MaxDelay)
+# After MaxAttempts it is marked 'Dead' and left for a SysAdmin to re-queue from the email settings tab
+# Emails are claimed with a single UPDATE, so several workers (and several copies of the program) never send the same email
+
+# Imports SQLite for database operations
+import sqlite3
+# Used to run the workers off the Tk thread
+import threading
+# Used for claim and retry times
+from datetime import datetime, timedelta
+# Used to send each batch over one SMTP session
+from Managers.Mailer import Mailer
+
+class OutboxSender:
+
+    # Minutes after which an email still marked 'Sending' is assumed to belong to a crashed worker and is claimed again
+    StaleClaimMinutes = 10
+    # Days sent emails are kept for, after which they are deleted
+    SentRetentionDays = 30
+
+    def __init__(self, Log=print, Workers=2, BatchSize=50, PollInterval=5, MaxAttempts=6, BaseDelay=60, MaxDelay=3600, DBPath="Databases/SystemConfig.db", MailerFactory=None):
+        # Log is a function taking a message, normally AccountManager.Log
+        self.__Log = Log
+        self.__Workers = Workers
+        self.__BatchSize = BatchSize
+        self.__PollInterval = PollInterval
+        self.__MaxAttempts = MaxAttempts
+        self.__BaseDelay = BaseDelay
+        self.__MaxDelay = MaxDelay
+        self.__DBPath = DBPath
+        # Builds a Mailer from the settings dictionary, can be swapped for a stand-in when testing
+        self.__MailerFactory = MailerFactory if MailerFactory is not None else Mailer.FromSettings
+        self.__Threads = []
+        self.__Stopping = threading.Event()
+        self.__WakeUp = threading.Event()
+
+    def Start(self):
+        # Starts the worker threads, each with its own connection
+        self.__Stopping.clear()
+        for Number in range(self.__Workers):
+            Thread = threading.Thread(target=self.__Work, name=f"OutboxSender-{Number + 1}", daemon=True)
+            Thread.start()
+            self.__Threads.append(Thread)
+
+    def Stop(self):
+        # Lets each worker finish the batch it is sending, then stops them
+        self.__Stopping.set()
+        self.__WakeUp.set()
+        for Thread in self.__Threads:
+            Thread.join()
+        self.__Threads = []
+
+    def Wake(self):
+        # Checks the outbox now instead of waiting for the next poll, e.g. straight after queueing
+        self.__WakeUp.set()
+
+    def Drain(self):
+        # Sends every email that is due on the calling thread and returns a summary, used by RunDailyJobs.py
+        # Emails waiting for a retry later are left in the outbox for the next run
+        Conn = sqlite3.connect(self.__DBPath, timeout=30)
+        Totals = {"Sent": 0, "Retrying": 0, "Dead": 0}
+        try:
+            self.__PurgeSent(Conn)
+            while True:
+                Counts = self.__SendDue(Conn)
+                if Counts is None:
+                    break
+                for Key in Totals:
+                    Totals[Key] += Counts[Key]
+        finally:
+            Conn.close()
+        return f"Outbox: {Totals['Sent']} sent, {Totals['Retrying']} to retry, {Totals['Dead']} given up."
+
+    def __Work(self):
+        # SQLite connections cannot be shared between threads, so each worker opens its own
+        Conn = sqlite3.connect(self.__DBPath, timeout=30)
+        try:
+            self.__PurgeSent(Conn)
+            while not self.__Stopping.is_set():
+                try:
+                    Counts = self.__SendDue(Conn)
+                # A worker must keep running whatever goes wrong with one batch
+                except Exception as e:
+                    self.__Log(f"Outbox sender error: {e}")
+                    Counts = None
+                # Sleeps until the next poll when there was nothing to send
+                if Counts is None:
+                    self.__WakeUp.wait(self.__PollInterval)
+                    self.__WakeUp.clear()
+        finally:
+            Conn.close()
+
+    def __SendDue(self, Conn):
+        # Claims and sends one batch, returns counts of what happened or None if nothing was due
+        Now = datetime.now()
+        NowText = Now.strftime("%Y-%m-%d %H:%M:%S")
+        StaleBefore = (Now - timedelta(minutes=self.StaleClaimMinutes)).strftime("%Y-%m-%d %H:%M:%S")
+        # Claims the batch in one statement, so no other worker can claim the same emails
+        Batch = Conn.execute("""
+            UPDATE Outbox SET Status = 'Sending', ClaimedAt = ?
+            WHERE UOID IN (
+                SELECT UOID FROM Outbox
+                WHERE (Status = 'Pending' AND NextAttemptAt <= ?) OR (Status = 'Sending' AND ClaimedAt < ?)
+                ORDER BY UOID LIMIT ?
+            )
+            RETURNING UOID, ToAddress, Subject, Body, Attempts
+        """, (NowText, NowText, StaleBefore, self.__BatchSize)).fetchall()
+        Conn.commit()
+        if not Batch:
+            return None
+        # Reads the SMTP settings each batch, so changes made by a SysAdmin apply without restarting
+        Settings = {row[0]: row[1] for row in Conn.execute(
+            "SELECT SettingName, SettingValue FROM Settings WHERE SettingName IN ('SMTPHost', 'SMTPPort', 'SMTPUser', 'SMTPPassword', 'SMTPSender')"
+        )}
+        BatchMailer = self.__MailerFactory(Settings)
+        if isinstance(BatchMailer, str):
+            Results = [(ToAddress, BatchMailer) for UOID, ToAddress, Subject, Body, Attempts in Batch]
+        else:
+            try:
+                Results = BatchMailer.SendBatch([(ToAddress, Subject, Body) for UOID, ToAddress, Subject, Body, Attempts in Batch])
+            # E.g. the server could not be reached at all, every email in the batch is retried
+            except Exception as e:
+                Results = [(ToAddress, f"System error: {e}") for UOID, ToAddress, Subject, Body, Attempts in Batch]
+        # Records the outcome of every email in one transaction
+        Counts = {"Sent": 0, "Retrying": 0, "Dead": 0}
+        SentAt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for (UOID, ToAddress, Subject, Body, Attempts), (_, Result) in zip(Batch, Results):
+            if Result == True:
+                Conn.execute("UPDATE Outbox SET Status = 'Sent', SentAt = ?, Attempts = ?, LastError = NULL WHERE UOID = ?", (SentAt, Attempts + 1, UOID))
+                Counts["Sent"] += 1
+                self.__Log(f"Email sent to {ToAddress}: {Subject}")
+            elif Attempts + 1 >= self.__MaxAttempts:
+                Conn.execute("UPDATE Outbox SET Status = 'Dead', Attempts = ?, LastError = ? WHERE UOID = ?", (Attempts + 1, str(Result), UOID))
+                Counts["Dead"] += 1
+                self.__Log(f"Email to {ToAddress} given up after {Attempts + 1} attempts: {Result}")
+            else:
+                # Exponential backoff, so a server that is down is not retried every few seconds
+                Delay = min(self.__BaseDelay * 2 ** Attempts, self.__MaxDelay)
+                NextAttemptAt = (datetime.now() + timedelta(seconds=Delay)).strftime("%Y-%m-%d %H:%M:%S")
+                Conn.execute(
+                    "UPDATE Outbox SET Status = 'Pending', Attempts = ?, NextAttemptAt = ?, LastError = ? WHERE UOID = ?",
+                    (Attempts + 1, NextAttemptAt, str(Result), UOID)
+                )
+                Counts["Retrying"] += 1
+                self.__Log(f"Email send failed to {ToAddress}, retrying in {Delay} seconds: {Result}")
+        Conn.commit()
+        return Counts
+
+    def __PurgeSent(self, Conn):
+        # Stops the outbox growing forever, dedup keys include the date so old ones are no longer needed
+        Before = (datetime.now() - timedelta(days=self.SentRetentionDays)).strftime("%Y-%m-%d %H:%M:%S")
+        Conn.execute("DELETE FROM Outbox WHERE Status = 'Sent' AND SentAt < ?", (Before,))
+        Conn.commit()
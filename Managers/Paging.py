@@ -0,0 +1,88 @@
+# This class fetches query results one page at a time using keyset pagination
+# Instead of OFFSET (which re-reads every skipped row), each page starts after the sort key of the last row
+# of the previous page, so every page costs the same however far through the results it is
+# The key is handed back to the caller as an opaque cursor string, to be passed in for the next page
+# List and search methods take optional PageSize and Cursor arguments, without them they return every row as before
+
+# Used to turn the last row's sort key into an opaque cursor string and back
+import base64
+import json
+
+class Page:
+
+    def __init__(self, Rows, NextCursor, TotalEstimate, TotalIsExact):
+        # Rows for this page, and the cursor for the next page (None on the last page)
+        self.Rows = Rows
+        self.NextCursor = NextCursor
+        # Only counted for the first page. Counting stops at Paging.CountCap, in which case TotalIsExact is False
+        self.TotalEstimate = TotalEstimate
+        self.TotalIsExact = TotalIsExact
+
+    def DescribeTotal(self):
+        # e.g. "1,234" or "10,000+" for showing beside a table
+        if self.TotalEstimate is None:
+            return ""
+        return f"{self.TotalEstimate:,}" if self.TotalIsExact else f"{self.TotalEstimate:,}+"
+
+class Paging:
+
+    # Largest number of matching rows counted for the total, so counting a huge result set stays cheap
+    CountCap = 10000
+
+    @staticmethod
+    def EncodeCursor(KeyValues):
+        return base64.urlsafe_b64encode(json.dumps(list(KeyValues)).encode()).decode()
+
+    @staticmethod
+    def DecodeCursor(Cursor):
+        # Raises ValueError for a cursor that was not made by EncodeCursor
+        try:
+            return json.loads(base64.urlsafe_b64decode(Cursor.encode()).decode())
+        except Exception:
+            raise ValueError("Invalid page cursor")
+
+    @staticmethod
+    def Fetch(Curs, Select, Where, Params, KeyColumns, KeyIndexes, PageSize=None, Cursor=None):
+        # Select is a query without WHERE / ORDER BY, Where and Params filter it ("1" and [] for everything)
+        # KeyColumns are the unique sort key columns, KeyIndexes their positions in each result row
+        # Returns a list of every row when PageSize is None, otherwise a Page
+        Order = ", ".join(KeyColumns)
+        if PageSize is None:
+            Curs.execute(f"{Select} WHERE {Where} ORDER BY {Order}", Params)
+            return Curs.fetchall()
+        Total, IsExact = None, True
+        if Cursor is None:
+            Total, IsExact = Paging.Count(Curs, f"{Select} WHERE {Where}", Params)
+        Where, Params = Paging.AfterKey(Where, Params, KeyColumns, Cursor)
+        # Fetches one row more than needed, to find out whether there is another page
+        Curs.execute(f"{Select} WHERE {Where} ORDER BY {Order} LIMIT ?", list(Params) + [PageSize + 1])
+        Rows = Curs.fetchall()
+        return Paging.MakePage(Rows, PageSize, lambda Row: [Row[i] for i in KeyIndexes], Total, IsExact)
+
+    @staticmethod
+    def AfterKey(Where, Params, KeyColumns, Cursor):
+        # Adds "(Key columns) > (last key)" to the filter when continuing from a cursor
+        if Cursor is None:
+            return Where, list(Params)
+        KeyValues = Paging.DecodeCursor(Cursor)
+        if len(KeyValues) != len(KeyColumns):
+            raise ValueError("Invalid page cursor")
+        Placeholders = ", ".join("?" for _ in KeyColumns)
+        return f"({Where}) AND ({', '.join(KeyColumns)}) > ({Placeholders})", list(Params) + list(KeyValues)
+
+    @staticmethod
+    def Count(Curs, Query, Params):
+        # Counts the rows of Query up to CountCap, returns (Count, IsExact)
+        Curs.execute(f"SELECT COUNT(*) FROM ({Query} LIMIT {Paging.CountCap + 1})", Params)
+        Count = Curs.fetchone()[0]
+        if Count > Paging.CountCap:
+            return Paging.CountCap, False
+        return Count, True
+
+    @staticmethod
+    def MakePage(Rows, PageSize, GetKey, Total=None, IsExact=True):
+        # Trims the extra row fetched by the caller and builds the cursor from the last row kept
+        HasMore = len(Rows) > PageSize
+        Rows = Rows[:PageSize]
+        NextCursor = Paging.EncodeCursor(GetKey(Rows[-1])) if HasMore and Rows else None
+        return Page(Rows, NextCursor, Total, IsExact)
@@ -0,0 +1,125 @@
+# This class runs the frames' database queries on worker threads, so a slow query never freezes the window
+# Each worker has its own LibraryManager and AccountManager session, as SQLite connections cannot be shared between threads.
+# The session is forked from the main session (see AccountManager.ForkSession) and forked again whenever a different user logs in
+# Every request has a key, normally the tab making it. A new request with the same key supersedes the previous one:
+# if that has not started yet it is dropped, and if it is running its query is interrupted
+# Finished requests are collected on the Tk thread by polling GetFinished() with after(), see Main
+
+# Used to run queries off the Tk thread and hand results back
+import threading
+import queue
+from Managers.LibraryManager import LibraryManager
+
+class QueryFuture:
+
+    def __init__(self, Key, Call, OnDone):
+        # Call takes the worker's (LM, AM) and returns the result, OnDone is then called with the result on the Tk thread
+        self.Key = Key
+        self.Call = Call
+        self.OnDone = OnDone
+        self.Result = None
+        self.Cancelled = False
+        # The worker session running the request, so it can be interrupted
+        self.Session = None
+
+class QueryExecutor:
+
+    def __init__(self, AM, Workers=2):
+        # AM is the main session, whose current user the workers act as
+        self.__AM = AM
+        self.__Pending = queue.Queue()
+        self.__Finished = queue.Queue()
+        # Key -> newest request with that key
+        self.__Latest = {}
+        self.__Lock = threading.Lock()
+        # Daemon threads so closing the window is never held up by a slow query
+        self.__Threads = [threading.Thread(target=self.__Work, name=f"Query-{Number + 1}", daemon=True) for Number in range(Workers)]
+        for Thread in self.__Threads:
+            Thread.start()
+
+    def Submit(self, Key, Call, OnDone):
+        # Queues Call to run on a worker, cancelling the previous request with the same key
+        Future = QueryFuture(Key, Call, OnDone)
+        with self.__Lock:
+            Previous = self.__Latest.get(Key)
+            if Previous is not None:
+                self.__Cancel(Previous)
+            self.__Latest[Key] = Future
+        self.__Pending.put(Future)
+        return Future
+
+    def Cancel(self, Future):
+        with self.__Lock:
+            self.__Cancel(Future)
+            if self.__Latest.get(Future.Key) is Future:
+                del self.__Latest[Future.Key]
+
+    def IsBusy(self, Key):
+        # True while a request with this key is waiting or running
+        with self.__Lock:
+            return Key in self.__Latest
+
+    def GetFinished(self):
+        # Returns every request that has finished since the last call and has not been cancelled
+        Results = []
+        while True:
+            try:
+                Future = self.__Finished.get_nowait()
+            except queue.Empty:
+                return Results
+            with self.__Lock:
+                if Future.Cancelled:
+                    continue
+                if self.__Latest.get(Future.Key) is Future:
+                    del self.__Latest[Future.Key]
+            Results.append(Future)
+
+    def Stop(self):
+        # Interrupts anything still running and stops the workers, which close their sessions
+        with self.__Lock:
+            for Future in list(self.__Latest.values()):
+                self.__Cancel(Future)
+            self.__Latest = {}
+        for Thread in self.__Threads:
+            self.__Pending.put(None)
+        for Thread in self.__Threads:
+            Thread.join(timeout=5)
+
+    def __Cancel(self, Future):
+        # Must be called holding the lock, so the session cannot move on to another request while it is interrupted
+        Future.Cancelled = True
+        if Future.Session is not None:
+            Future.Session.Interrupt()
+
+    def __Work(self):
+        # The worker's session, created on this thread and replaced when the logged in user changes
+        User, LM, AM = None, None, None
+        try:
+            while True:
+                Future = self.__Pending.get()
+                if Future is None:
+                    return
+                if Future.Cancelled:
+                    continue
+                CurrentUser = self.__AM.GetCurrentUser()
+                if LM is None or User != CurrentUser:
+                    if LM is not None:
+                        LM.Exit()
+                    AM = self.__AM.ForkSession()
+                    LM = LibraryManager(AM)
+                    User = CurrentUser
+                with self.__Lock:
+                    if Future.Cancelled:
+                        continue
+                    Future.Session = LM
+                try:
+                    Future.Result = Future.Call(LM, AM)
+                # Manager methods return error strings themselves, this only catches anything unexpected
+                except Exception as e:
+                    Future.Result = f"System error: {e}"
+                with self.__Lock:
+                    Future.Session = None
+                self.__Finished.put(Future)
+        finally:
+            if LM is not None:
+                LM.Exit()
@@ -0,0 +1,210 @@
+# This class contains the versioned schema changes made after the original database definition
+# Each database file stores the version it has been upgraded to in PRAGMA user_version
+# Migrations are applied in order when a manager connects, so existing databases are brought up to date
+# Every statement uses IF NOT EXISTS, so re-running a migration is harmless
+
+# Imports SQLite for database operations
+import sqlite3
+
+class SchemaManager:
+
+    # Space separated names of every author linked to a book, used to fill BooksFTS.Authors
+    BookAuthorNames = """(
+        SELECT group_concat(Authors.Forename || ' ' || COALESCE(Authors.Middlenames || ' ', '') || Authors.Surname, ' ')
+        FROM BooksAuthors JOIN Authors ON BooksAuthors.UAID = Authors.UAID
+        WHERE BooksAuthors.ISBN = {ISBN}
+    )"""
+
+    # Migrations for LibraryData.db, stored as (Version, [Statements]) or (Version, [Statements], "Optional")
+    # An optional migration that fails for any reason other than a locked database is skipped, rather than stopping later migrations
+    # Skipped migrations are recorded in SkippedMigrations and tried again by every later connection, e.g. after an SQLite upgrade adds FTS5
+    # Version 1: secondary indexes for the predicates LibraryManager runs most often
+    # - Loans(ReturnDate, UCID) serves "UCID NOT IN (SELECT UCID FROM Loans WHERE ReturnDate IS NULL)"
+    #   and the Loans-Copies join in the stock conflict check
+    # - Loans(UStuID, ReturnDate) serves the active loan count in IssueLoan
+    # - Loans(DueDate) serves overdue and due tomorrow lookups
+    # - Copies(ISBN, CurrentLocationID) serves every per-book copy count
+    # - Reservations(ISBN, ReservationDate) serves the reservation window in the stock conflict check
+    LibraryMigrations = [
+        (1, [
+            "CREATE INDEX IF NOT EXISTS IdxLoansReturnDateUCID ON Loans(ReturnDate, UCID)",
+            "CREATE INDEX IF NOT EXISTS IdxLoansStudentReturnDate ON Loans(UStuID, ReturnDate)",
+            "CREATE INDEX IF NOT EXISTS IdxLoansDueDate ON Loans(DueDate)",
+            "CREATE INDEX IF NOT EXISTS IdxCopiesISBNLocation ON Copies(ISBN, CurrentLocationID)",
+            "CREATE INDEX IF NOT EXISTS IdxReservationsISBNDate ON Reservations(ISBN, ReservationDate)",
+        ]),
+        # Version 2: FTS5 full text indexes for catalogue search, marked optional as not every SQLite build includes FTS5
+        # - BooksFTS has one row per book (rowid = ISBN) over the ISBN, title, genre, subject and all author names
+        # - AuthorsFTS has one row per author (rowid = UAID)
+        # - Triggers on Books, Authors and BooksAuthors keep both in step with the tables they index
+        (2, [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS BooksFTS USING fts5(ISBN, Title, Genre, Subject, Authors, prefix='2 3')",
+            "CREATE VIRTUAL TABLE IF NOT EXISTS AuthorsFTS USING fts5(Forename, Middlenames, Surname, prefix='2 3')",
+            # Fills both indexes from the existing catalogue
+            f"INSERT INTO BooksFTS(rowid, ISBN, Title, Genre, Subject, Authors) SELECT ISBN, ISBN, Title, Genre, Subject, {BookAuthorNames.format(ISBN='Books.ISBN')} FROM Books",
+            "INSERT INTO AuthorsFTS(rowid, Forename, Middlenames, Surname) SELECT UAID, Forename, Middlenames, Surname FROM Authors",
+            # Books
+            f'''CREATE TRIGGER IF NOT EXISTS BooksFTSInsert AFTER INSERT ON Books BEGIN
+                INSERT INTO BooksFTS(rowid, ISBN, Title, Genre, Subject, Authors) VALUES (NEW.ISBN, NEW.ISBN, NEW.Title, NEW.Genre, NEW.Subject, {BookAuthorNames.format(ISBN='NEW.ISBN')});
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS BooksFTSUpdate AFTER UPDATE ON Books BEGIN
+                DELETE FROM BooksFTS WHERE rowid = OLD.ISBN;
+                INSERT INTO BooksFTS(rowid, ISBN, Title, Genre, Subject, Authors) VALUES (NEW.ISBN, NEW.ISBN, NEW.Title, NEW.Genre, NEW.Subject, {BookAuthorNames.format(ISBN='NEW.ISBN')});
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS BooksFTSDelete AFTER DELETE ON Books BEGIN
+                DELETE FROM BooksFTS WHERE rowid = OLD.ISBN;
+            END''',
+            # Linking and unlinking authors changes a book's author names
+            f'''CREATE TRIGGER IF NOT EXISTS BooksAuthorsFTSInsert AFTER INSERT ON BooksAuthors BEGIN
+                UPDATE BooksFTS SET Authors = {BookAuthorNames.format(ISBN='NEW.ISBN')} WHERE rowid = NEW.ISBN;
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS BooksAuthorsFTSDelete AFTER DELETE ON BooksAuthors BEGIN
+                UPDATE BooksFTS SET Authors = {BookAuthorNames.format(ISBN='OLD.ISBN')} WHERE rowid = OLD.ISBN;
+            END''',
+            # Authors, renaming an author also changes every book they are linked to
+            '''CREATE TRIGGER IF NOT EXISTS AuthorsFTSInsert AFTER INSERT ON Authors BEGIN
+                INSERT INTO AuthorsFTS(rowid, Forename, Middlenames, Surname) VALUES (NEW.UAID, NEW.Forename, NEW.Middlenames, NEW.Surname);
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS AuthorsFTSUpdate AFTER UPDATE ON Authors BEGIN
+                DELETE FROM AuthorsFTS WHERE rowid = OLD.UAID;
+                INSERT INTO AuthorsFTS(rowid, Forename, Middlenames, Surname) VALUES (NEW.UAID, NEW.Forename, NEW.Middlenames, NEW.Surname);
+                UPDATE BooksFTS SET Authors = {BookAuthorNames.format(ISBN='BooksFTS.rowid')}
+                WHERE rowid IN (SELECT ISBN FROM BooksAuthors WHERE UAID = NEW.UAID);
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS AuthorsFTSDelete AFTER DELETE ON Authors BEGIN
+                DELETE FROM AuthorsFTS WHERE rowid = OLD.UAID;
+            END''',
+        ], "Optional"),
+        # Version 3: indexes for the typed search filters (see SearchQuery) not already covered by version 1
+        # - Loans(UCID) serves copy: and isbn: searches of loans
+        # - Reservations(UStaID) serves staff: searches, Reservations(ReservationDate) serves date: and today's reservations
+        (3, [
+            "CREATE INDEX IF NOT EXISTS IdxLoansUCID ON Loans(UCID)",
+            "CREATE INDEX IF NOT EXISTS IdxReservationsStaff ON Reservations(UStaID)",
+            "CREATE INDEX IF NOT EXISTS IdxReservationsDate ON Reservations(ReservationDate)",
+        ]),
+        # Version 4: a write counter for every table, read by LibraryManager.GetTableVersions
+        # - Triggers add one to a table's counter on every insert, update and delete, whichever connection or program makes it
+        # - Cached results (see SearchCache) store the counters of the tables they read, and are only reused while these are unchanged
+        (4, [
+            "CREATE TABLE IF NOT EXISTS TableVersions(TableName TEXT PRIMARY KEY NOT NULL, Version INTEGER NOT NULL DEFAULT 0)",
+            "INSERT OR IGNORE INTO TableVersions (TableName) VALUES ('Authors'), ('Books'), ('BooksAuthors'), ('Copies'), ('Loans'), ('Locations'), ('Reservations'), ('Students')",
+        ] + [
+            f"CREATE TRIGGER IF NOT EXISTS {Table}Version{Event.title()} AFTER {Event} ON {Table} BEGIN UPDATE TableVersions SET Version = Version + 1 WHERE TableName = '{Table}'; END"
+            for Table in ("Authors", "Books", "BooksAuthors", "Copies", "Loans", "Locations", "Reservations", "Students")
+            for Event in ("INSERT", "UPDATE", "DELETE")
+        ]),
+    ]
+
+    # Migrations for SystemConfig.db, stored as (Version, [Statements])
+    # Version 1: job ledger, recording which daily jobs have run for which school day
+    # - Status is 'Running', 'Done', 'Failed' or 'Skipped', the primary key stops a job being claimed twice for one day
+    # - SchedulerStaffID is the account the headless job runner (RunDailyJobs.py) acts as
+    SystemMigrations = [
+        (1, [
+            '''CREATE TABLE IF NOT EXISTS JobLedger(
+                JobName TEXT NOT NULL,
+                RunDate INTEGER NOT NULL,
+                Status TEXT NOT NULL,
+                StartedAt TEXT,
+                FinishedAt TEXT,
+                Result TEXT,
+                PRIMARY KEY(JobName, RunDate)
+            )''',
+            "INSERT OR IGNORE INTO Settings (SettingName, SettingValue) VALUES ('SchedulerStaffID', '')",
+        ]),
+        # Version 2: outbox of emails waiting to be sent by OutboxSender
+        # - Status is 'Pending', 'Sending', 'Sent' or 'Dead' (gave up after too many attempts)
+        # - DedupKey is unique, so queueing the same notice twice (e.g. for the same loans on the same day) is ignored
+        # - Outbox(Status, NextAttemptAt) serves the senders' query for the next emails that are due
+        (2, [
+            '''CREATE TABLE IF NOT EXISTS Outbox(
+                UOID INTEGER PRIMARY KEY,
+                DedupKey TEXT UNIQUE,
+                ToAddress TEXT NOT NULL,
+                Subject TEXT NOT NULL,
+                Body TEXT NOT NULL,
+                Status TEXT NOT NULL DEFAULT 'Pending',
+                Attempts INTEGER NOT NULL DEFAULT 0,
+                NextAttemptAt TEXT NOT NULL,
+                ClaimedAt TEXT,
+                LastError TEXT,
+                CreatedAt TEXT NOT NULL,
+                SentAt TEXT
+            )''',
+            "CREATE INDEX IF NOT EXISTS IdxOutboxStatusNextAttempt ON Outbox(Status, NextAttemptAt)",
+        ]),
+        # Version 3: in-app notifications for staff, used by CreateNotification(s) and DeliverNotifications
+        # - Notifications(UStaID, Delivered) serves the lookup of a staff member's undelivered notifications
+        (3, [
+            '''CREATE TABLE IF NOT EXISTS Notifications(
+                UNID INTEGER PRIMARY KEY NOT NULL,
+                UStaID INTEGER NOT NULL,
+                NotifBody TEXT NOT NULL,
+                Delivered BOOLEAN NOT NULL DEFAULT FALSE,
+                FOREIGN KEY (UStaID) REFERENCES Staff(UStaID)
+            )''',
+            "CREATE INDEX IF NOT EXISTS IdxNotificationsStaffDelivered ON Notifications(UStaID, Delivered)",
+        ]),
+        # Version 4: write counter for Staff, as in LibraryData.db version 4, since staff names appear in cached reservation results
+        (4, [
+            "CREATE TABLE IF NOT EXISTS TableVersions(TableName TEXT PRIMARY KEY NOT NULL, Version INTEGER NOT NULL DEFAULT 0)",
+            "INSERT OR IGNORE INTO TableVersions (TableName) VALUES ('Staff')",
+        ] + [
+            f"CREATE TRIGGER IF NOT EXISTS StaffVersion{Event.title()} AFTER {Event} ON Staff BEGIN UPDATE TableVersions SET Version = Version + 1 WHERE TableName = 'Staff'; END"
+            for Event in ("INSERT", "UPDATE", "DELETE")
+        ]),
+    ]
+
+    @staticmethod
+    def MigrateLibraryData(Conn):
+        return SchemaManager.__Migrate(Conn, SchemaManager.LibraryMigrations)
+
+    @staticmethod
+    def MigrateSystemConfig(Conn):
+        return SchemaManager.__Migrate(Conn, SchemaManager.SystemMigrations)
+
+    @staticmethod
+    def GetVersion(Conn):
+        return Conn.execute("PRAGMA user_version").fetchone()[0]
+
+    @staticmethod
+    def __Migrate(Conn, Migrations):
+        # Reads the version this database has already been upgraded to, and any optional migrations skipped on the way
+        CurrentVersion = SchemaManager.GetVersion(Conn)
+        Skipped = set()
+        if Conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'SkippedMigrations'").fetchone():
+            Skipped = {Row[0] for Row in Conn.execute("SELECT Version FROM SkippedMigrations")}
+        for Version, Statements, *Options in Migrations:
+            # Skips migrations that have already been applied, a skipped optional migration is tried again
+            if Version <= CurrentVersion and Version not in Skipped:
+                continue
+            try:
+                # Explicit transaction, so a failed migration's CREATE statements are rolled back as well
+                if not Conn.in_transaction:
+                    Conn.execute("BEGIN")
+                for Statement in Statements:
+                    Conn.execute(Statement)
+                if Version in Skipped:
+                    # Applied at last, user_version is already past it
+                    Conn.execute("DELETE FROM SkippedMigrations WHERE Version = ?", (Version,))
+                else:
+                    # PRAGMA values cannot be bound as parameters, Version is always an int from the list above
+                    Conn.execute(f"PRAGMA user_version = {int(Version)}")
+                Conn.commit()
+                CurrentVersion = max(CurrentVersion, Version)
+            except sqlite3.OperationalError as e:
+                Conn.rollback()
+                # Still unsupported (or locked), it stays recorded and is tried again by the next connection
+                if Version in Skipped:
+                    continue
+                # Another connection may hold a lock, the next connection will retry the migration
+                if "locked" in str(e) or "Optional" not in Options:
+                    break
+                # An optional feature this SQLite build does not support (e.g. "no such module: fts5") is skipped and recorded
+                Conn.execute("CREATE TABLE IF NOT EXISTS SkippedMigrations(Version INTEGER PRIMARY KEY NOT NULL)")
+                Conn.execute("INSERT OR IGNORE INTO SkippedMigrations (Version) VALUES (?)", (Version,))
+                Conn.execute(f"PRAGMA user_version = {int(Version)}")
+                Conn.commit()
+                CurrentVersion = Version
+        return CurrentVersion
@@ -0,0 +1,115 @@
+# This class keeps the results of recent searches, so typing, deleting and retyping a search does not query the database again
+# Each result is stored with the write counters of the tables it read (see LibraryManager.GetTableVersions),
+# and is only reused while none of those tables has been written to, by this program or any other
+# The least recently used result is dropped once MaxEntries are held
+# When a search extends an earlier one (e.g. "mac" then "macb") and the earlier result was complete,
+# the new result is found by filtering the earlier rows rather than by another query, as it can only contain those rows
+# Only first pages are cached, later pages of a long result are always fetched with their cursor
+
+# Used to keep entries in least recently used order
+from collections import OrderedDict
+# Workers on several threads share one cache
+import threading
+import string
+# Used to check a search has no typed filters before narrowing it
+from Managers.SearchQuery import SearchQuery
+from Managers.Paging import Page
+
+class SearchCache:
+
+    # Number of results kept
+    MaxEntries = 64
+    # Staff is always checked, as staff accounts and names change what a search returns
+    AlwaysCheck = ("Staff",)
+    # SQLite's LIKE only ignores the case of ASCII letters, so narrowing does the same
+    AsciiLower = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+    def __init__(self):
+        # (User, Kind, Term) -> (Versions, Result)
+        self.__Entries = OrderedDict()
+        self.__Lock = threading.Lock()
+
+    def Fetch(self, LM, AM, Kind, Term, Tables, Run, Cursor=None, Narrow=None):
+        # Returns the cached result of a search, or Run()'s result which is then cached
+        # Kind names the search (e.g. "Loans"), Tables are the tables it reads
+        # Narrow is (Mode, Indexes) if earlier results can be filtered for a longer search:
+        # - "words": a typed search (see SearchQuery), where every plain word must appear in one of the columns at Indexes
+        # - "term": the whole search must appear in one of the columns at Indexes
+        if Cursor is not None:
+            return Run()
+        Versions = LM.GetTableVersions(list(Tables) + list(self.AlwaysCheck))
+        if Versions is None:
+            return Run()
+        # Results are kept per user, so a cached result never skips another user's permission check
+        Key = (AM.GetCurrentUser(), Kind, Term)
+        with self.__Lock:
+            Entry = self.__Entries.get(Key)
+            if Entry is not None and Entry[0] == Versions:
+                self.__Entries.move_to_end(Key)
+                return Entry[1]
+            Result = self.__Narrow(Key, Versions, Narrow) if Narrow is not None else None
+        if Result is None:
+            Result = Run()
+        # Error and 'not found' messages are not cached
+        if not isinstance(Result, str):
+            self.__Put(Key, Versions, Result)
+        return Result
+
+    def Clear(self):
+        with self.__Lock:
+            self.__Entries.clear()
+
+    def __Put(self, Key, Versions, Result):
+        with self.__Lock:
+            self.__Entries[Key] = (Versions, Result)
+            self.__Entries.move_to_end(Key)
+            while len(self.__Entries) > self.MaxEntries:
+                self.__Entries.popitem(last=False)
+
+    def __Narrow(self, Key, Versions, Narrow):
+        # Must be called holding the lock. Returns None if no earlier result can be narrowed
+        User, Kind, Term = Key
+        Mode, Indexes = Narrow
+        if not self.__CanNarrow(Mode, Term):
+            return None
+        # The longest earlier search that the new one extends, from the same user and still up to date
+        Best = None
+        for (EntryUser, EntryKind, EntryTerm), (EntryVersions, EntryResult) in self.__Entries.items():
+            if EntryUser != User or EntryKind != Kind or EntryVersions != Versions:
+                continue
+            if not EntryTerm or not Term.startswith(EntryTerm) or not self.__CanNarrow(Mode, EntryTerm):
+                continue
+            # A result with more pages to come does not hold every matching row
+            if isinstance(EntryResult, Page) and EntryResult.NextCursor is not None:
+                continue
+            if Best is None or len(EntryTerm) > len(Best[0]):
+                Best = (EntryTerm, EntryResult)
+        if Best is None:
+            return None
+        Rows = Best[1].Rows if isinstance(Best[1], Page) else Best[1]
+        Needles = SearchQuery(Term).Words if Mode == "words" else [Term]
+        Needles = [Needle.translate(self.AsciiLower) for Needle in Needles]
+        Narrowed = [Row for Row in Rows if all(self.__RowContains(Row, Indexes, Needle) for Needle in Needles)]
+        # The search's own 'not found' message is used when nothing is left
+        if not Narrowed:
+            return None
+        if isinstance(Best[1], Page):
+            return Page(Narrowed, None, len(Narrowed), True)
+        return Narrowed
+
+    def __CanNarrow(self, Mode, Term):
+        # LIKE wildcards would match differently when filtered here
+        if "%" in Term or "_" in Term:
+            return False
+        if Mode == "words":
+            # Typed filters, quoted phrases and bare IDs (which are looked up exactly) are left to the database
+            Query = SearchQuery(Term)
+            return not Query.Filters and '"' not in Term and Query.GetExactID() is None
+        return True
+
+    def __RowContains(self, Row, Indexes, Needle):
+        for Index in Indexes:
+            # NULL never matches LIKE
+            if Row[Index] is not None and Needle in str(Row[Index]).translate(self.AsciiLower):
+                return True
+        return False
@@ -0,0 +1,64 @@
+# This class turns what a user types into a search box into SQL predicates
+# Typed filters such as loan:123, student:45, isbn:978..., title:macbeth or due<20261101
+# become equality or range comparisons on the underlying column, so SQLite can use its indexes
+# Anything without a field name is a plain word, matched as a substring across the method's usual columns
+# A search that is just a number is tried as an exact ID first, see LibraryManager.SearchLoans
+
+# Used to split the search into filters and words
+import re
+
+class SearchQuery:
+
+    # field, operator, value (quoted values may contain spaces), or a plain word / quoted phrase
+    TokenPattern = re.compile(r'(\w+)(<=|>=|<|>|:|=)("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+    # SQL used for each operator on ID and date fields
+    Comparisons = {":": "=", "=": "=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+    def __init__(self, Text):
+        # Filters is a list of (Field, Operator, Value), Words is a list of plain words
+        self.Filters = []
+        self.Words = []
+        for Match in self.TokenPattern.finditer(str(Text)):
+            Field, Operator, Value, Phrase, Word = Match.groups()
+            if Field:
+                self.Filters.append((Field.lower(), Operator, Value.strip('"')))
+            elif Phrase is not None:
+                if Phrase.strip():
+                    self.Words.append(Phrase.strip())
+            else:
+                self.Words.append(Word)
+
+    def GetExactID(self):
+        # Returns the number if the whole search is a single number (e.g. a scanned ID), otherwise None
+        if not self.Filters and len(self.Words) == 1 and self.Words[0].isdigit():
+            return int(self.Words[0])
+        return None
+
+    def Compile(self, Fields, SubstringColumns):
+        # Fields maps each field name to (Column, Type), where Type is "id", "date" or "text"
+        # SubstringColumns are the columns a plain word is matched against with LIKE
+        # Returns (Where, Params), raises ValueError with a message for the user if a filter is not valid
+        Conditions = []
+        Params = []
+        for Field, Operator, Value in self.Filters:
+            if Field not in Fields:
+                raise ValueError(f"Unknown search field '{Field}'. Fields for this search: {', '.join(Fields)}")
+            Column, Type = Fields[Field]
+            if Type == "text":
+                # Text fields only support ':' / '=', matched as a substring as titles are rarely typed in full
+                if Operator not in (":", "="):
+                    raise ValueError(f"'{Field}' can only be searched with ':'")
+                Conditions.append(f"{Column} LIKE ?")
+                Params.append(f"%{Value}%")
+            else:
+                # Dates may be typed as 20261101 or 2026-11-01
+                Number = Value.replace("-", "") if Type == "date" else Value
+                if not Number.isdigit():
+                    raise ValueError(f"'{Field}' must be a number" if Type == "id" else f"'{Field}' must be a date as YYYYMMDD")
+                Conditions.append(f"{Column} {self.Comparisons[Operator]} ?")
+                Params.append(int(Number))
+        # Each plain word must appear in at least one of the substring columns
+        for Word in self.Words:
+            Conditions.append("(" + " OR ".join(f"{Column} LIKE ?" for Column in SubstringColumns) + ")")
+            Params.extend([f"%{Word}%"] * len(SubstringColumns))
+        return (" AND ".join(Conditions) if Conditions else "1"), Params
@@ -0,0 +1,38 @@
+# This class times how long the window and its frames take to build, and writes a report to the log
+# Main times the managers and top-level frames as the program starts, and reports once the window is first idle
+# DashboardFrame builds each content frame the first time it is opened, and times that here too,
+# so the log shows what start-up no longer has to build and what each first visit costs instead
+
+# Used for timings that are not affected by the system clock changing
+import time
+
+class StartupTimer:
+
+    def __init__(self, Log):
+        # Log is AccountManager.Log, or any function taking one message
+        self.__Log = Log
+        self.__Start = time.perf_counter()
+        # (Name, Milliseconds) in the order they were timed
+        self.__Timings = []
+        self.__Reported = False
+
+    def Time(self, Name, Build):
+        # Calls Build, records how long it took under Name and returns its result
+        Start = time.perf_counter()
+        Result = Build()
+        Milliseconds = (time.perf_counter() - Start) * 1000
+        if self.__Reported:
+            # Built after start-up, e.g. a content frame opened for the first time
+            self.__Log(f"Built {Name} on first use in {Milliseconds:.0f} ms")
+        else:
+            self.__Timings.append((Name, Milliseconds))
+        return Result
+
+    def Report(self):
+        # Logs the start-up timings and the total time since the timer was created, once
+        if self.__Reported:
+            return
+        self.__Reported = True
+        Total = (time.perf_counter() - self.__Start) * 1000
+        Parts = ", ".join(f"{Name} {Milliseconds:.0f} ms" for Name, Milliseconds in self.__Timings)
+        self.__Log(f"Start-up took {Total:.0f} ms ({Parts})")
@@ -0,0 +1,167 @@
+# These classes keep, for each book checked recently, how many of its copies are free on each day from today onwards,
+# so a loan's stock conflict check (see LibraryManager.__LoanStockConflictCheck) is one range minimum query
+# rather than a rebuild of the book's whole timeline from the database
+# A StockTimeline is a segment tree over days: each leaf is one day's free copies, each node the lowest day below it,
+# so adding to a run of days or finding the lowest day in a run only visits about 2 * log2(days) nodes
+# StockTimelines holds one timeline per ISBN. A timeline is built the first time its ISBN is checked and is then
+# updated in place by the loan and reservation methods as they write (see LibraryManager.__UpdateStock)
+# StockTimeline.FreePerDay gives the same counts for a run of days without building a tree, for calendars covering many books
+
+# Used to turn YYYYMMDD dates into day numbers, so consecutive days are consecutive leaves
+from datetime import date
+# Used for the running total of copies returned in FreePerDay
+from itertools import accumulate
+
+class StockTimeline:
+
+    # Days covered by a new timeline at least, enough for a loan period or a reservation made well in advance
+    MinDays = 366
+
+    def __init__(self, FirstDay, LastDay, Free, DueDays, Reserved):
+        # FirstDay is today's day number, LastDay the latest day the timeline must cover
+        # Free is the number of copies not on an active loan, DueDays the due date of each active loan
+        # and Reserved maps each day to the number of copies reserved for it
+        self.FirstDay = FirstDay
+        self.Free = Free
+        Size = 1
+        while Size < max(self.MinDays, LastDay - FirstDay + 1):
+            Size *= 2
+        self.Days = Size
+        # Loans due back on each day. Overdue loans are not expected back, so never return a copy
+        Returns = [0] * Size
+        for Due in DueDays:
+            if FirstDay <= Due < FirstDay + Size:
+                Returns[Due - FirstDay] += 1
+        # Node 1 is the root and node N has children 2N and 2N + 1, so the leaves are nodes Size to 2 * Size - 1
+        # Lowest holds the lowest free count below each node, Pending an amount added to every day below it
+        self.__Lowest = [0] * (2 * Size)
+        self.__Pending = [0] * (2 * Size)
+        Running = Free
+        for Day in range(Size):
+            Running += Returns[Day]
+            self.__Lowest[Size + Day] = Running - Reserved.get(FirstDay + Day, 0)
+        for Node in range(Size - 1, 0, -1):
+            self.__Lowest[Node] = min(self.__Lowest[2 * Node], self.__Lowest[2 * Node + 1])
+
+    @staticmethod
+    def DayNumber(Date):
+        # Dates are stored as YYYYMMDD integers, splitting them arithmetically avoids strptime
+        Date = int(Date)
+        return date(Date // 10000, Date // 100 % 100, Date % 100).toordinal()
+
+    @staticmethod
+    def FreePerDay(Today, Free, DueDays, Reserved, FirstDay, Days):
+        # The free copies on each of Days days from FirstDay (not before Today), as a timeline built today would give
+        # Loans due back before FirstDay are already back by then, later ones are added to a running total from their due date
+        Returns = [0] * Days
+        for Due in DueDays:
+            if Today <= Due < FirstDay:
+                Free += 1
+            elif FirstDay <= Due < FirstDay + Days:
+                Returns[Due - FirstDay] += 1
+        Running = list(accumulate(Returns, initial=Free))[1:]
+        return [Running[Day] - Reserved.get(FirstDay + Day, 0) for Day in range(Days)]
+
+    def Covers(self, Day):
+        return self.FirstDay <= Day < self.FirstDay + self.Days
+
+    def LowestBetween(self, FirstDay, LastDay):
+        # The fewest free copies on any day from FirstDay to LastDay inclusive, LastDay must be covered
+        return self.__LowestIn(1, 0, self.Days, max(FirstDay, self.FirstDay) - self.FirstDay, LastDay - self.FirstDay + 1)
+
+    def FreeOn(self, Day):
+        return self.LowestBetween(Day, Day)
+
+    def Loan(self, DueDay, Count=1):
+        # Count copies go out on loan today until DueDay
+        self.Free -= Count
+        self.__AddSpan(DueDay, -Count)
+
+    def Return(self, DueDay):
+        # The copy of a loan due on DueDay comes back today
+        self.Free += 1
+        self.__AddSpan(DueDay, 1)
+
+    def Extend(self, OldDueDay, NewDueDay):
+        self.__AddSpan(OldDueDay, 1)
+        self.__AddSpan(NewDueDay, -1)
+
+    def Reserve(self, Day, Quantity):
+        # Quantity copies are needed on Day only (negative to release them)
+        if Day >= self.FirstDay:
+            self.__Add(1, 0, self.Days, Day - self.FirstDay, Day - self.FirstDay + 1, -Quantity)
+
+    def __AddSpan(self, DueDay, Delta):
+        # A loan keeps its copy from today until its due date, or indefinitely once it is overdue
+        End = DueDay - self.FirstDay if DueDay >= self.FirstDay else self.Days
+        self.__Add(1, 0, self.Days, 0, min(End, self.Days), Delta)
+
+    def __Add(self, Node, Low, High, From, To, Delta):
+        # Node covers days Low to High - 1, Delta is added to days From to To - 1
+        if To <= Low or High <= From:
+            return
+        if From <= Low and High <= To:
+            self.__Lowest[Node] += Delta
+            self.__Pending[Node] += Delta
+            return
+        Middle = (Low + High) // 2
+        self.__Add(2 * Node, Low, Middle, From, To, Delta)
+        self.__Add(2 * Node + 1, Middle, High, From, To, Delta)
+        self.__Lowest[Node] = min(self.__Lowest[2 * Node], self.__Lowest[2 * Node + 1]) + self.__Pending[Node]
+
+    def __LowestIn(self, Node, Low, High, From, To):
+        if To <= Low or High <= From:
+            return float("inf")
+        if From <= Low and High <= To:
+            return self.__Lowest[Node]
+        Middle = (Low + High) // 2
+        return min(self.__LowestIn(2 * Node, Low, Middle, From, To), self.__LowestIn(2 * Node + 1, Middle, High, From, To)) + self.__Pending[Node]
+
+class StockTimelines:
+
+    # The tables whose write counters show whether the timelines are still current
+    Tables = ("Copies", "Loans", "Reservations")
+
+    def __init__(self):
+        # ISBN -> StockTimeline. ISBNs are keyed as text, as methods may be passed them as text or as integers
+        self.__Timelines = {}
+        # (Today, PRAGMA data_version, write counters) the timelines were last brought up to date with
+        self.__Stamp = None
+
+    def Get(self, ISBN, Stamp, LastDay):
+        # Returns the ISBN's timeline if it is current and covers LastDay, otherwise None
+        # Stamp is (Today, PRAGMA data_version, write counters), see LibraryManager.__StockStamp
+        # A different stamp means a write the timelines were not told about (e.g. from another connection, or RemoveCopy),
+        # or a new day, so every timeline is dropped and rebuilt when next needed
+        if Stamp != self.__Stamp:
+            self.Clear()
+            # Unknown write counters mean nothing can be kept
+            if Stamp[2] is not None:
+                self.__Stamp = Stamp
+            return None
+        Timeline = self.__Timelines.get(str(ISBN))
+        if Timeline is None or not Timeline.Covers(LastDay):
+            return None
+        return Timeline
+
+    def Put(self, ISBN, Timeline):
+        if self.__Stamp is not None:
+            self.__Timelines[str(ISBN)] = Timeline
+
+    def Update(self, OldStamp, NewStamp, Changes):
+        # Called by a method that has just written and committed, with the stamps from before and after its write
+        # Changes maps each ISBN written to a function making the same change to its timeline, or to None if there is no change
+        # If nothing else wrote in between (the same day, and no commit from another connection), each change is applied
+        # to its ISBN's timeline if held, and the other timelines stay current
+        if OldStamp != self.__Stamp or OldStamp[:2] != NewStamp[:2] or NewStamp[2] is None:
+            self.Clear()
+            return
+        for ISBN, Change in Changes.items():
+            Timeline = self.__Timelines.get(str(ISBN))
+            if Timeline is not None and Change is not None:
+                Change(Timeline)
+        self.__Stamp = NewStamp
+
+    def Clear(self):
+        self.__Timelines = {}
+        self.__Stamp = None
@@ -0,0 +1,40 @@
+# Headless daily jobs
+# Runs the same once-per-school-day jobs as StartUp (due tomorrow reminders, overdue notices and
+# reservation pick lists) without opening the Tk window, so they can be scheduled from cron, e.g.
+#     0 7 * * 1-5 cd /path/to/NEA && python RunDailyJobs.py
+# The jobs run as the staff account in the SchedulerStaffID setting (set by a SysAdmin), or the ID given:
+#     python RunDailyJobs.py 3
+# The job ledger means a login later in the day does not send anything a second time
+# The queued emails are then sent before exiting, anything that fails is retried by the next run or the open program
+
+# Used to read the optional staff ID and set the exit code
+import sys
+import os
+# Imports the classes from the Managers folder
+from Managers.AccountManager import AccountManager
+from Managers.LibraryManager import LibraryManager
+from Managers.OutboxSender import OutboxSender
+
+
+def Main(Args):
+    # The database paths are relative, so runs from the project folder wherever cron starts it
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    StaffID = Args[0] if Args else None
+    AM = AccountManager()
+    Result = AM.StartSchedulerSession(StaffID)
+    if "successfully" not in Result:
+        print(Result)
+        AM.Exit()
+        return 1
+    LM = LibraryManager(AM)
+    Result = LM.StartUp()
+    print(Result)
+    # Sends everything the jobs queued on this thread, there is no window to keep responsive
+    print(OutboxSender(AM.Log).Drain())
+    # Exit() also writes any queued log messages
+    LM.Exit()
+    return 0 if Result.startswith("StartUp complete") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(Main(sys.argv[1:]))